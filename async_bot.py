@@ -0,0 +1,933 @@
+# async_bot.py - AsyncTeleBot asosidagi asyncio runtime (BOT_RUNTIME=async)
+#
+# Asosiy oqimlar (start/ro'yxatdan o'tish, startaplarni ko'rish, qo'shilish,
+# admin ekranlari) shu yerda async ko'rinishda. Hali ko'chirilmagan bo'limlar
+# main.py dagi sinxron handlerlarga thread orqali uzatiladi.
+import asyncio
+import logging
+
+from telebot import asyncio_helper, types, util
+from telebot.async_telebot import AsyncTeleBot
+from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
+
+import async_db as adb
+from cards import render_startup_card, ROLE_PUBLIC, ROLE_ADMIN
+import main as legacy
+from main import (
+    BOT_TOKEN, CHANNEL_USERNAME, CATEGORY_EMOJIS,
+    is_admin_user, escape_html, format_value, parse_referral_id,
+    create_back_button, create_main_menu, get_category_keyboard,
+    set_user_state, get_user_state, clear_user_state, clear_user_data,
+    clear_pro_payment_data, update_channel_post, TELEGRAM_API_URL, tg
+)
+
+if TELEGRAM_API_URL:
+    asyncio_helper.API_URL = TELEGRAM_API_URL + '/bot{0}/{1}'
+    asyncio_helper.FILE_URL = TELEGRAM_API_URL + '/file/bot{0}/{1}'
+
+bot = AsyncTeleBot(BOT_TOKEN, parse_mode='HTML')
+
+
+# ==================== YORDAMCHI FUNKSIYALAR ====================
+
+async def get_bot_username():
+    # Identifikatsiya va a'zolik keshi sinxron runtime bilan umumiy (main.tg)
+    username = tg.cached_username()
+    if username:
+        tg.count('get_me.cached')
+        return username
+    try:
+        tg.count('get_me')
+        me = await bot.get_me()
+        tg.remember_me(me)
+        return me.username
+    except Exception:
+        tg.count('get_me.error')
+        return None
+
+async def set_state(user_id: int, state: str):
+    await adb.run_sync(set_user_state, user_id, state)
+
+async def get_state(user_id: int) -> str:
+    return await adb.run_sync(get_user_state, user_id)
+
+async def clear_state(user_id: int):
+    await adb.run_sync(clear_user_state, user_id)
+
+async def main_menu_markup(user_id: int):
+    return await adb.run_sync(create_main_menu, user_id)
+
+async def owner_display_name(owner_id) -> str:
+    user = await adb.get_user(owner_id)
+    return f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
+
+async def edit_or_send(chat_id, message_id, text, reply_markup=None):
+    try:
+        await bot.edit_message_text(text, chat_id, message_id, reply_markup=reply_markup)
+    except Exception:
+        await bot.send_message(chat_id, text, reply_markup=reply_markup)
+
+async def safe_delete(chat_id, message_id):
+    try:
+        await bot.delete_message(chat_id, message_id)
+    except Exception:
+        pass
+
+async def is_subscribed(user_id: int, trust_negative: bool = True) -> bool:
+    # Tekshiruv va kesh sinxron runtime bilan bitta joyda (main.tg)
+    return await adb.run_sync(tg.is_channel_member, user_id, trust_negative)
+
+
+# ==================== SINXRON HANDLERLARGA UZATISH ====================
+
+async def _has_legacy_step(message) -> bool:
+    """main.py dagi suhbat (fsm) shu chatda davom etyaptimi"""
+    return await adb.run_sync(legacy.conversations.active, message.chat.id)
+
+async def forward_message_to_legacy(message):
+    await asyncio.to_thread(legacy.bot.process_new_messages, [message])
+
+async def forward_callback_to_legacy(call):
+    await asyncio.to_thread(legacy.bot.process_new_callback_query, [call])
+
+@bot.message_handler(func=_has_legacy_step, content_types=util.content_type_media)
+async def handle_legacy_next_step(message):
+    await forward_message_to_legacy(message)
+
+
+# ==================== START - BOSHLASH ====================
+
+@bot.message_handler(commands=['start', 'help', 'boshlash'])
+async def start_command(message):
+    user_id = message.from_user.id
+    username = message.from_user.username or ""
+    first_name = message.from_user.first_name or ""
+    referral_id = parse_referral_id(message)
+
+    user = await adb.get_user(user_id)
+
+    if not user and referral_id:
+        try:
+            await adb.register_referral(referral_id, user_id)
+        except Exception as e:
+            logging.error(f"Referral register xatosi: {e}")
+
+    try:
+        if not await is_subscribed(user_id):
+            await ask_for_subscription(message.chat.id)
+            return
+    except Exception as e:
+        logging.error(f"Obuna tekshirishda xatolik: {e}")
+        await ask_for_subscription(message.chat.id)
+        return
+
+    if not user:
+        await adb.save_user(user_id, username, first_name)
+        await request_phone_number(message.chat.id, user_id)
+    elif not user.get('phone'):
+        await request_phone_number(message.chat.id, user_id)
+    else:
+        await send_welcome_back_message(message.chat.id, user_id, first_name)
+
+async def ask_for_subscription(chat_id):
+    markup = InlineKeyboardMarkup()
+    markup.row(
+        InlineKeyboardButton('🔗 Kanalga otish', url=f'https://t.me/{CHANNEL_USERNAME[1:]}'),
+        InlineKeyboardButton('✅ Tekshirish', callback_data='check_subscription')
+    )
+    await bot.send_message(
+        chat_id,
+        "Davom etish uchun rasmiy kanalimizga obuna bo'ling:\n"
+        f"👉 {CHANNEL_USERNAME}",
+        reply_markup=markup
+    )
+
+@bot.callback_query_handler(func=lambda call: call.data == 'check_subscription')
+async def check_subscription_callback(call):
+    user_id = call.from_user.id
+    chat_id = call.message.chat.id
+    try:
+        # Hozirgina obuna bo'lgan bo'lishi mumkin - manfiy kesh ishlatilmaydi
+        if not await is_subscribed(user_id, trust_negative=False):
+            await bot.answer_callback_query(call.id, "❌ Iltimos, kanalga obuna bo'ling!", show_alert=True)
+            return
+
+        user = await adb.get_user(user_id)
+        if not user:
+            await adb.save_user(user_id, call.from_user.username or "", call.from_user.first_name or "")
+
+        await bot.answer_callback_query(call.id, "✅ Obuna tasdiqlandi")
+        await safe_delete(chat_id, call.message.message_id)
+
+        if not user or not user.get('phone'):
+            await request_phone_number(chat_id, user_id)
+        else:
+            await send_welcome_back_message(chat_id, user_id, user.get('first_name', 'Foydalanuvchi'))
+    except Exception as e:
+        logging.error(f"Obuna tekshirishda xatolik: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+async def request_phone_number(chat_id, user_id):
+    """Foydalanuvchidan telefon raqamni so'rash"""
+    await set_state(user_id, 'waiting_phone')
+
+    markup = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
+    markup.add(KeyboardButton('📱 Telefon raqamni yuborish', request_contact=True))
+    markup.add(KeyboardButton('🔙 Orqaga'))
+
+    await bot.send_message(chat_id, "Iltimos, telefon raqamingizni yuboring:", reply_markup=markup)
+
+async def _is_waiting_phone(message) -> bool:
+    return await get_state(message.from_user.id) == 'waiting_phone'
+
+@bot.message_handler(content_types=['contact'], func=_is_waiting_phone)
+async def handle_contact(message):
+    """Telefon raqamni qabul qilish (profil tahriri main.py da qoladi)"""
+    user_id = message.from_user.id
+    await adb.update_user_field(user_id, 'phone', message.contact.phone_number)
+
+    try:
+        await confirm_referral_reward(user_id)
+    except Exception as e:
+        logging.error(f"Referral confirm xatosi: {e}")
+
+    await clear_state(user_id)
+
+    user = await adb.get_user(user_id) or {}
+    first_name = user.get('first_name', 'Foydalanuvchi')
+    await bot.send_message(
+        message.chat.id,
+        f"✅ <b>{first_name}, qoyil ro'yxatdan o'tdingiz!</b>\n\n",
+        reply_markup=await main_menu_markup(user_id)
+    )
+
+async def confirm_referral_reward(user_id: int):
+    inviter_id = await adb.confirm_referral(user_id)
+    if not inviter_id:
+        return
+
+    confirmed = await adb.get_confirmed_referral_count(inviter_id)
+    reward_count = await adb.get_referral_reward_count(inviter_id)
+    next_goal = (reward_count + 1) * 10
+
+    try:
+        await bot.send_message(
+            inviter_id,
+            f"✅ <b>Yangi referral tasdiqlandi!</b>\n\n"
+            f"Hisob: <b>{confirmed}</b> / <b>{next_goal}</b>"
+        )
+    except Exception:
+        pass
+
+    if confirmed >= next_goal:
+        sub = await adb.add_pro_subscription(inviter_id, months=1, source='referral', note='referral_reward')
+        await adb.add_referral_reward(inviter_id, months=1)
+        end_at = sub.get('end_at', '')[:10] if sub else ''
+        try:
+            await bot.send_message(
+                inviter_id,
+                "🎉 <b>Tabriklaymiz!</b>\n\n"
+                "Siz 10 ta referral to'pladingiz.\n"
+                f"Pro 1 oy berildi. Tugash: <b>{end_at or 'N/A'}</b>"
+            )
+        except Exception:
+            pass
+
+async def send_welcome_back_message(chat_id, user_id, first_name):
+    """Avval ro'yxatdan o'tgan foydalanuvchi uchun"""
+    await clear_state(user_id)
+    await bot.send_message(
+        chat_id,
+        f"🎉 <b>Qaytganingiz bilan, {first_name}!</b>\n\n"
+        f"🚀 <b>GarajHub</b> startaplar platformasiga xush kelibsiz!\n\n",
+        reply_markup=await main_menu_markup(user_id)
+    )
+
+async def show_main_menu(chat_id, user_id):
+    """Asosiy menyuni ko'rsatish"""
+    await clear_state(user_id)
+    await bot.send_message(
+        chat_id,
+        "🏠 <b>Asosiy menyu</b>\n\nQuyidagi menyudan kerakli bo'limni tanlang:",
+        reply_markup=await main_menu_markup(user_id)
+    )
+
+
+# ==================== STARTAPLAR ====================
+
+def startups_menu_markup():
+    markup = ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
+    markup.add(
+        KeyboardButton('🎯 Tavsiyalar'),
+        KeyboardButton('🔎 Kategoriya bo\'yicha'),
+        KeyboardButton('🏠 Asosiy menyu')
+    )
+    return markup
+
+@bot.message_handler(func=lambda message: message.text == '🌐 Startaplar')
+async def show_startups_menu(message):
+    await set_state(message.from_user.id, 'in_startups_menu')
+    await bot.send_message(message.chat.id, "🌐 <b>Startaplar bo'limi:</b>\n\nKerakli bo'limni tanlang:",
+                           reply_markup=startups_menu_markup())
+
+async def _is_in_startups_menu(message) -> bool:
+    return message.text == '🔎 Kategoriya bo\'yicha' and await get_state(message.from_user.id) == 'in_startups_menu'
+
+@bot.message_handler(func=_is_in_startups_menu)
+async def show_categories(message):
+    await set_state(message.from_user.id, 'choosing_category')
+    markup = await adb.run_sync(get_category_keyboard)
+    await bot.send_message(message.chat.id, "🏷️ <b>Kategoriya tanlang:</b>", reply_markup=markup)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('category_'))
+async def handle_category_selection(call):
+    try:
+        category_name = call.data.split('_')[1]
+        await show_category_startups(call.message.chat.id, category_name, 1, call.message.message_id)
+        await bot.answer_callback_query(call.id)
+    except Exception as e:
+        logging.error(f"Category selection error: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+async def show_category_startups(chat_id, category_name, page, message_id=None):
+    try:
+        per_page = 5
+        page_startups, total = await adb.get_startups_by_category_page(category_name, page, per_page)
+
+        if not page_startups:
+            markup = InlineKeyboardMarkup()
+            markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_categories'))
+            text = f"🏷️ <b>{category_name}</b> kategoriyasida hozircha startup mavjud emas."
+            if message_id:
+                await edit_or_send(chat_id, message_id, text, markup)
+            else:
+                await bot.send_message(chat_id, text, reply_markup=markup)
+            return
+
+        total_pages = max(1, (total + per_page - 1) // per_page)
+        page = min(max(1, page), total_pages)
+        start_idx = (page - 1) * per_page
+
+        # Sahifadagi egalarni parallel olish
+        owner_names = await asyncio.gather(*(owner_display_name(s['owner_id']) for s in page_startups))
+
+        emoji = CATEGORY_EMOJIS.get(category_name, '🏷️')
+        text = f"{emoji} <b>{category_name} startaplari</b>\n\n"
+        for i, (startup, owner_name) in enumerate(zip(page_startups, owner_names), start=start_idx + 1):
+            status_emoji = '✅' if startup.get('current_members', 0) < startup.get('max_members', 10) else '❌'
+            text += f"{i}. <b>{startup['name']}</b> – {owner_name} {status_emoji}\n"
+
+        markup = InlineKeyboardMarkup(row_width=5)
+        numbers = [
+            InlineKeyboardButton(f'{i}️⃣', callback_data=f'cat_startup_{startup["_id"]}')
+            for i, startup in enumerate(page_startups, start=start_idx + 1)
+        ]
+        if numbers:
+            markup.row(*numbers)
+
+        nav_buttons = []
+        if page > 1:
+            nav_buttons.append(InlineKeyboardButton('◀️ Oldingi', callback_data=f'cat_page_{category_name}_{page-1}'))
+        if page < total_pages:
+            nav_buttons.append(InlineKeyboardButton('Keyingi ▶️', callback_data=f'cat_page_{category_name}_{page+1}'))
+        if nav_buttons:
+            markup.row(*nav_buttons)
+
+        markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_categories'))
+
+        if message_id:
+            try:
+                await bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id, reply_markup=markup)
+            except Exception:
+                await safe_delete(chat_id, message_id)
+                await bot.send_message(chat_id, text, reply_markup=markup)
+        else:
+            await bot.send_message(chat_id, text, reply_markup=markup)
+    except Exception as e:
+        logging.error(f"Show category startups error: {e}")
+        await bot.send_message(chat_id, "⚠️ Xatolik yuz berdi!", reply_markup=create_back_button(True))
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('cat_page_'))
+async def handle_category_page(call):
+    try:
+        parts = call.data.split('_')
+        await show_category_startups(call.message.chat.id, parts[2], int(parts[3]), call.message.message_id)
+        await bot.answer_callback_query(call.id)
+    except Exception as e:
+        logging.error(f"Category page error: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('cat_startup_'))
+async def handle_category_startup_view(call):
+    try:
+        startup_id = call.data.split('_')[2]
+        card = await adb.run_sync(render_startup_card, startup_id, ROLE_PUBLIC)
+        if not card:
+            await bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
+            return
+
+        text = card.text
+        markup = card.markup([[InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_categories')]])
+
+        chat_id = call.message.chat.id
+        message_id = call.message.message_id
+        if card.logo:
+            try:
+                await bot.edit_message_media(
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    media=types.InputMediaPhoto(card.logo, caption=text, parse_mode='HTML'),
+                    reply_markup=markup
+                )
+            except Exception:
+                try:
+                    await bot.edit_message_caption(chat_id=chat_id, message_id=message_id, caption=text, reply_markup=markup)
+                except Exception:
+                    await bot.send_photo(chat_id, card.logo, caption=text, reply_markup=markup)
+        else:
+            await edit_or_send(chat_id, message_id, text, markup)
+
+        await bot.answer_callback_query(call.id)
+    except Exception as e:
+        logging.error(f"Category startup view xatosi: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+
+# ==================== QO'SHILISH JARAYONI ====================
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('join_startup_'))
+async def handle_join_startup(call):
+    try:
+        startup_id = call.data.replace('join_startup_', '', 1)
+        user_id = call.from_user.id
+
+        startup = await adb.get_startup(startup_id)
+        if not startup:
+            await bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
+            return
+
+        if startup.get('current_members', 0) >= startup.get('max_members', 10):
+            await bot.answer_callback_query(call.id, "❌ A'zolar to'ldi!", show_alert=True)
+            return
+
+        if startup['owner_id'] == user_id:
+            await bot.answer_callback_query(call.id, "❌ Siz bu startupning egasisiz!", show_alert=True)
+            return
+
+        request_id = await adb.get_join_request_id(startup_id, user_id)
+        if request_id:
+            member_request = await adb.get_join_request(request_id)
+            if member_request:
+                answers = {
+                    'pending': "📩 Sizning so'rovingiz hali ko'rib chiqilmoqda!",
+                    'accepted': "✅ Siz allaqachon bu startupda a'zosiz!",
+                    'rejected': "❌ So'rovingiz avval rad etilgan."
+                }
+                answer = answers.get(member_request['status'])
+                if answer:
+                    await bot.answer_callback_query(call.id, answer, show_alert=True)
+            return
+
+        await adb.add_startup_member(startup_id, user_id)
+        request_id = await adb.get_join_request_id(startup_id, user_id)
+        if not request_id:
+            logging.error(f"Join request saqlanmadi: startup_id={startup_id}, user_id={user_id}")
+            await bot.answer_callback_query(call.id, "⚠️ So'rovni saqlashda xatolik yuz berdi.", show_alert=True)
+            return
+
+        await bot.answer_callback_query(call.id, "✅ So'rovingiz muvaffaqiyatli yuborildi.", show_alert=True)
+
+        user = await adb.get_user(user_id)
+        if not user:
+            try:
+                await adb.save_user(user_id, call.from_user.username or "", call.from_user.first_name or "")
+                user = await adb.get_user(user_id)
+            except Exception as e:
+                logging.warning(f"Join so'rovida user create bo'lmadi: {e}")
+                user = None
+
+        user = user or {}
+        first_name = user.get('first_name') or (call.from_user.first_name or "")
+        last_name = user.get('last_name') or (call.from_user.last_name or "")
+        user_name = f"{first_name} {last_name}".strip() or call.from_user.username or f"User {user_id}"
+
+        text = (
+            f"🆕 <b>Qo'shilish so'rovi</b>\n\n"
+            f"👤 <b>Foydalanuvchi:</b> <a href='tg://user?id={user_id}'>{escape_html(user_name)}</a>\n"
+            f"📞 <b>Telefon:</b> {escape_html(format_value(user.get('phone')))}\n"
+            f"🔧 <b>Mutaxassislik:</b> {escape_html(format_value(user.get('specialization')))}\n"
+            f"📈 <b>Tajriba:</b> {escape_html(format_value(user.get('experience')))}\n"
+            f"📝 <b>Bio:</b> {escape_html(format_value(user.get('bio')))}\n\n"
+            f"🎯 <b>Startup:</b> {escape_html(startup['name'])}"
+        )
+
+        markup = InlineKeyboardMarkup()
+        markup.add(
+            InlineKeyboardButton('✅ Tasdiqlash', callback_data=f'approve_join_{request_id}'),
+            InlineKeyboardButton('❌ Rad etish', callback_data=f'reject_join_{request_id}')
+        )
+
+        try:
+            await bot.send_message(startup['owner_id'], text, reply_markup=markup)
+        except Exception as e:
+            logging.error(f"Egaga xabar yuborishda xatolik: {e}")
+    except Exception as e:
+        logging.error(f"Join startup xatosi: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('approve_join_'))
+async def approve_join_request(call):
+    try:
+        request_id = call.data.split('_')[2]
+        member = await adb.get_join_request(request_id)
+        if not member:
+            await bot.answer_callback_query(call.id, "❌ So'rov topilmadi!", show_alert=True)
+            return
+
+        startup_id = str(member['startup_id'])
+        user_id = member['user_id']
+
+        startup = await adb.get_startup(startup_id)
+        if not startup:
+            await bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
+            return
+
+        if startup.get('current_members', 0) >= startup.get('max_members', 10):
+            await adb.update_join_request(request_id, 'rejected')
+            try:
+                await bot.edit_message_text("❌ <b>A'zolar to'ldi, so'rov rad etildi.</b>",
+                                            call.message.chat.id, call.message.message_id)
+            except Exception:
+                pass
+            await bot.answer_callback_query(call.id, "❌ A'zolar to'ldi!")
+            try:
+                await bot.send_message(
+                    user_id,
+                    "❌ <b>Afsus, startupda joy qolmagan.</b>\n\n"
+                    "Boshqa startaplarga qo'shilishingiz mumkin."
+                )
+            except Exception:
+                pass
+            return
+
+        await adb.update_join_request(request_id, 'accepted')
+
+        try:
+            await bot.send_message(
+                user_id,
+                f"🎉 <b>Tabriklaymiz!</b>\n\n"
+                f"✅ Sizning so'rovingiz qabul qilindi.\n\n"
+                f"🎯 <b>Startup:</b> {startup['name']}\n"
+                f"🔗 <b>Guruhga qo'shilish:</b> {startup.get('group_link', '—')}"
+            )
+        except Exception as e:
+            logging.error(f"Foydalanuvchiga xabar yuborishda xatolik: {e}")
+
+        try:
+            await bot.edit_message_text("✅ <b>So'rov tasdiqlandi va foydalanuvchiga havola yuborildi.</b>",
+                                        call.message.chat.id, call.message.message_id)
+        except Exception:
+            pass
+        await bot.answer_callback_query(call.id, "✅ Tasdiqlandi!")
+
+        # Kanal postini yangilash (main.py dagi sinxron funksiya)
+        try:
+            await asyncio.to_thread(update_channel_post, startup_id)
+        except Exception:
+            pass
+    except Exception as e:
+        logging.error(f"Approve join xatosi: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('reject_join_'))
+async def reject_join_request(call):
+    try:
+        request_id = call.data.split('_')[2]
+        await adb.update_join_request(request_id, 'rejected')
+
+        member = await adb.get_join_request(request_id)
+        if member:
+            try:
+                await bot.send_message(
+                    member['user_id'],
+                    "❌ <b>Afsus, so'rovingiz rad etildi.</b>\n\n"
+                    "Boshqa startaplarga qo'shilishingiz mumkin."
+                )
+            except Exception:
+                pass
+
+        try:
+            await bot.edit_message_text("❌ <b>So'rov rad etildi.</b>", call.message.chat.id, call.message.message_id)
+        except Exception:
+            pass
+        await bot.answer_callback_query(call.id, "✅ Rad etildi!")
+    except Exception as e:
+        logging.error(f"Reject join xatosi: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+@bot.callback_query_handler(func=lambda call: call.data == 'full_members')
+async def handle_full_members(call):
+    await bot.answer_callback_query(call.id, "❌ A'zolar to'ldi!", show_alert=True)
+
+
+# ==================== ADMIN PANEL ====================
+
+def _admin_text(message, text: str) -> bool:
+    return message.text == text and is_admin_user(message.chat.id)
+
+@bot.message_handler(func=lambda message: _admin_text(message, '⚙️ Admin panel'))
+async def admin_panel(message):
+    await set_state(message.chat.id, 'in_admin_panel')
+    await send_admin_panel(message.chat.id)
+
+async def send_admin_panel(chat_id):
+    stats = await adb.get_statistics()
+
+    markup = ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
+    markup.add(
+        KeyboardButton('📊 Dashboard'),
+        KeyboardButton('🚀 Startaplar'),
+        KeyboardButton('👥 Foydalanuvchilar'),
+        KeyboardButton('⭐ Pro sozlamalar'),
+        KeyboardButton('🧾 Pro to\'lovlar'),
+        KeyboardButton('📢 Xabar yuborish'),
+        KeyboardButton('🏠 Asosiy menyu')
+    )
+
+    welcome_text = (
+        f"👨‍💼 <b>Admin Panel</b>\n\n"
+        f"📊 <b>Statistika:</b>\n"
+        f" 👥 Foydalanuvchilar: <b>{stats['total_users']}</b>\n"
+        f" 🚀 Startaplar: <b>{stats['total_startups']}</b>\n"
+        f" ⏳ Kutilayotgan: <b>{stats['pending_startups']}</b>\n"
+        f" ▶️ Faol: <b>{stats['active_startups']}</b>\n"
+        f" ✅ Yakunlangan: <b>{stats['completed_startups']}</b>"
+    )
+    await bot.send_message(chat_id, welcome_text, reply_markup=markup)
+
+@bot.message_handler(func=lambda message: _admin_text(message, '📊 Dashboard'))
+async def admin_dashboard(message):
+    await send_admin_dashboard(message.chat.id)
+
+async def send_admin_dashboard(chat_id):
+    stats, recent_users, recent_startups = await asyncio.gather(
+        adb.get_statistics(), adb.get_recent_users(5), adb.get_recent_startups(5)
+    )
+
+    dashboard_text = (
+        f"📊 <b>Dashboard</b>\n\n"
+        f"📈 <b>Umumiy statistikalar:</b>\n"
+        f" 👥 Foydalanuvchilar: <b>{stats['total_users']}</b>\n"
+        f" 🚀 Startaplar: <b>{stats['total_startups']}</b>\n"
+        f" ⏳ Kutilayotgan: <b>{stats['pending_startups']}</b>\n"
+        f" ▶️ Faol: <b>{stats['active_startups']}</b>\n"
+        f" ✅ Yakunlangan: <b>{stats['completed_startups']}</b>\n\n"
+    )
+
+    if recent_users:
+        dashboard_text += "👥 <b>So'nggi foydalanuvchilar:</b>\n"
+        for i, user in enumerate(recent_users, 1):
+            name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() or "Noma'lum"
+            dashboard_text += f"{i}. <b>{name}</b>\n"
+        dashboard_text += "\n"
+
+    if recent_startups:
+        dashboard_text += "🚀 <b>So'nggi startaplar:</b>\n"
+        for i, startup in enumerate(recent_startups, 1):
+            status_emoji = {
+                'pending': '⏳',
+                'active': '▶️',
+                'completed': '✅',
+                'rejected': '❌'
+            }.get(startup['status'], '❓')
+            dashboard_text += f"{i}. {startup['name']} {status_emoji}\n"
+
+    markup = InlineKeyboardMarkup()
+    markup.add(
+        InlineKeyboardButton('🔄 Yangilash', callback_data='refresh_dashboard'),
+        InlineKeyboardButton('📈 To\'liq statistikalar', callback_data='full_stats'),
+        InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_admin_panel')
+    )
+    await bot.send_message(chat_id, dashboard_text, reply_markup=markup)
+
+@bot.message_handler(func=lambda message: _admin_text(message, '🚀 Startaplar'))
+async def admin_startups_menu(message):
+    await send_admin_startups_menu(message.chat.id)
+
+async def send_admin_startups_menu(chat_id):
+    stats = await adb.get_statistics()
+
+    markup = InlineKeyboardMarkup(row_width=2)
+    markup.add(
+        InlineKeyboardButton('⏳ Kutilayotgan', callback_data='pending_startups_1'),
+        InlineKeyboardButton('▶️ Faol', callback_data='active_startups_1'),
+        InlineKeyboardButton('✅ Yakunlangan', callback_data='completed_startups_1'),
+        InlineKeyboardButton('❌ Rad etilgan', callback_data='rejected_startups_1'),
+        InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_admin_panel')
+    )
+
+    text = (
+        f"🚀 <b>Startaplar boshqaruvi</b>\n\n"
+        f"📊 <b>Statistikalar:</b>\n"
+        f" ⏳ Kutilayotgan: <b>{stats['pending_startups']}</b>\n"
+        f" ▶️ Faol: <b>{stats['active_startups']}</b>\n"
+        f" ✅ Yakunlangan: <b>{stats['completed_startups']}</b>\n"
+        f" ❌ Rad etilgan: <b>{stats['rejected_startups']}</b>"
+    )
+    await bot.send_message(chat_id, text, reply_markup=markup)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('pending_startups_'))
+async def show_pending_startups(call):
+    if not is_admin_user(call.from_user.id):
+        await bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
+        return
+    await send_pending_startups(call.message.chat.id, call.message.message_id, int(call.data.split('_')[2]))
+    await bot.answer_callback_query(call.id)
+
+async def send_pending_startups(chat_id, message_id, page: int):
+    startups, total = await adb.get_pending_startups(page)
+
+    markup = InlineKeyboardMarkup()
+    if not startups:
+        text = "⏳ <b>Kutilayotgan startaplar yo'q.</b>"
+    else:
+        total_pages = max(1, (total + 4) // 5)
+        owner_names = await asyncio.gather(*(owner_display_name(s['owner_id']) for s in startups))
+
+        text = "⏳ <b>Kutilayotgan startaplar</b>\n\n"
+        for i, (startup, owner_name) in enumerate(zip(startups, owner_names), start=(page - 1) * 5 + 1):
+            text += f"{i}. <b>{startup['name']}</b> – {owner_name}\n\n"
+
+        nav_buttons = []
+        if page > 1:
+            nav_buttons.append(InlineKeyboardButton('◀️ Oldingi', callback_data=f'pending_startups_{page-1}'))
+        if page < total_pages:
+            nav_buttons.append(InlineKeyboardButton('Keyingi ▶️', callback_data=f'pending_startups_{page+1}'))
+        if nav_buttons:
+            markup.row(*nav_buttons)
+
+        for i, startup in enumerate(startups):
+            startup_name_short = startup['name'][:20] + '...' if len(startup['name']) > 20 else startup['name']
+            markup.add(InlineKeyboardButton(f'{i+1}. {startup_name_short}',
+                                            callback_data=f'admin_view_startup_{startup["_id"]}'))
+
+    markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_admin_startups'))
+    await edit_or_send(chat_id, message_id, text, markup)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('admin_view_startup_'))
+async def admin_view_startup_details(call):
+    if not is_admin_user(call.from_user.id):
+        await bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
+        return
+
+    try:
+        startup_id = call.data.split('_')[3]
+        card = await adb.run_sync(render_startup_card, startup_id, ROLE_ADMIN)
+        if not card:
+            await bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
+            return
+
+        text = "🖼 <b>Startup ma'lumotlari</b>\n\n" + card.text
+        markup = card.markup([[InlineKeyboardButton('🔙 Orqaga', callback_data='pending_startups_1')]])
+
+        chat_id = call.message.chat.id
+        try:
+            if card.logo:
+                await bot.edit_message_media(
+                    chat_id=chat_id,
+                    message_id=call.message.message_id,
+                    media=types.InputMediaPhoto(card.logo, caption=text, parse_mode='HTML'),
+                    reply_markup=markup
+                )
+            else:
+                await bot.edit_message_text(text=text, chat_id=chat_id, message_id=call.message.message_id,
+                                            reply_markup=markup)
+        except Exception:
+            if card.logo:
+                await bot.send_photo(chat_id, card.logo, caption=text, reply_markup=markup)
+            else:
+                await bot.send_message(chat_id, text, reply_markup=markup)
+
+        await bot.answer_callback_query(call.id)
+    except Exception as e:
+        logging.error(f"Admin view startup xatosi: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('admin_approve_'))
+async def admin_approve_startup(call):
+    if not is_admin_user(call.from_user.id):
+        await bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
+        return
+
+    try:
+        startup_id = call.data.split('_')[2]
+        await adb.update_startup_status(startup_id, 'active')
+
+        startup = await adb.get_startup(startup_id)
+        if not startup:
+            await bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
+            return
+
+        try:
+            await bot.send_message(
+                startup['owner_id'],
+                f"🎉 <b>Tabriklaymiz!</b>\n\n"
+                f"✅ '<b>{startup['name']}</b>' startupingiz tasdiqlandi va kanalga joylandi!"
+            )
+        except Exception:
+            pass
+
+        owner_name = await owner_display_name(startup['owner_id'])
+        channel_text = (
+            f"🚀 <b>{startup['name']}</b>\n\n"
+            f"📝 {startup['description']}\n\n"
+            f"👤 <b>Muallif:</b> {owner_name}\n"
+            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
+            f"🔧 <b>Kerakli mutaxassislar:</b>\n{startup.get('required_skills', '—')}\n\n"
+            f"👥 <b>A'zolar:</b> 0 / {startup.get('max_members', '—')}\n\n"
+            f"➕ <b>O'z startupingizni yaratish uchun:</b> @{await get_bot_username()}"
+        )
+
+        markup = InlineKeyboardMarkup()
+        markup.add(InlineKeyboardButton('🤝 Startupga qo\'shilish', callback_data=f'join_startup_{startup_id}'))
+
+        try:
+            if startup.get('logo'):
+                sent_message = await bot.send_photo(CHANNEL_USERNAME, startup['logo'], caption=channel_text, reply_markup=markup)
+            else:
+                sent_message = await bot.send_message(CHANNEL_USERNAME, channel_text, reply_markup=markup)
+            await adb.update_startup_post_id(startup_id, sent_message.message_id)
+        except Exception as e:
+            logging.error(f"Kanalga post yuborishda xatolik: {e}")
+
+        await bot.answer_callback_query(call.id, "✅ Startup tasdiqlandi!")
+        await send_pending_startups(call.message.chat.id, call.message.message_id, 1)
+    except Exception as e:
+        logging.error(f"Admin approve xatosi: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith('admin_reject_'))
+async def admin_reject_startup(call):
+    if not is_admin_user(call.from_user.id):
+        await bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
+        return
+
+    try:
+        startup_id = call.data.split('_')[2]
+        await adb.update_startup_status(startup_id, 'rejected')
+
+        startup = await adb.get_startup(startup_id)
+        if startup:
+            try:
+                await bot.send_message(
+                    startup['owner_id'],
+                    f"❌ <b>Xabar!</b>\n\n"
+                    f"Sizning '<b>{startup['name']}</b>' startupingiz rad etildi."
+                )
+            except Exception:
+                pass
+
+        await bot.answer_callback_query(call.id, "❌ Startup rad etildi!")
+        await send_pending_startups(call.message.chat.id, call.message.message_id, 1)
+    except Exception as e:
+        logging.error(f"Admin reject xatosi: {e}")
+        await bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
+
+@bot.callback_query_handler(func=lambda call: call.data == 'back_to_admin_panel')
+async def handle_back_to_admin_panel(call):
+    await send_admin_panel(call.message.chat.id)
+    await bot.answer_callback_query(call.id)
+
+@bot.callback_query_handler(func=lambda call: call.data == 'back_to_admin_startups')
+async def handle_back_to_admin_startups(call):
+    await send_admin_startups_menu(call.message.chat.id)
+    await bot.answer_callback_query(call.id)
+
+@bot.callback_query_handler(func=lambda call: call.data == 'refresh_dashboard')
+async def handle_refresh_dashboard(call):
+    await send_admin_dashboard(call.message.chat.id)
+    await bot.answer_callback_query(call.id, "🔄 Dashboard yangilandi!")
+
+@bot.callback_query_handler(func=lambda call: call.data == 'full_stats')
+async def handle_full_stats(call):
+    stats = await adb.get_statistics()
+    await bot.answer_callback_query(
+        call.id,
+        f"👥 Foydalanuvchilar: {stats['total_users']}\n"
+        f"🚀 Startaplar: {stats['total_startups']}\n"
+        f"⏳ Kutilayotgan: {stats['pending_startups']}\n"
+        f"▶️ Faol: {stats['active_startups']}\n"
+        f"✅ Yakunlangan: {stats['completed_startups']}\n"
+        f"❌ Rad etilgan: {stats['rejected_startups']}",
+        show_alert=True
+    )
+
+
+# ==================== NAVIGATSIYA ====================
+
+@bot.callback_query_handler(func=lambda call: call.data == 'back_to_main_menu')
+async def handle_back_to_main_menu(call):
+    await safe_delete(call.message.chat.id, call.message.message_id)
+    await show_main_menu(call.message.chat.id, call.from_user.id)
+    await bot.answer_callback_query(call.id)
+
+@bot.callback_query_handler(func=lambda call: call.data == 'back_to_startups_menu')
+async def handle_back_to_startups_menu(call):
+    await set_state(call.from_user.id, 'in_startups_menu')
+    await edit_or_send(call.message.chat.id, call.message.message_id,
+                       "🌐 <b>Startaplar bo'limi:</b>\n\nKerakli bo'limni tanlang:", startups_menu_markup())
+    await bot.answer_callback_query(call.id)
+
+@bot.callback_query_handler(func=lambda call: call.data == 'back_to_categories')
+async def handle_back_to_categories(call):
+    await set_state(call.from_user.id, 'choosing_category')
+    markup = await adb.run_sync(get_category_keyboard)
+    await edit_or_send(call.message.chat.id, call.message.message_id, "🏷️ <b>Kategoriya tanlang:</b>", markup)
+    await bot.answer_callback_query(call.id)
+
+@bot.message_handler(func=lambda message: message.text == '🏠 Asosiy menyu')
+async def handle_main_menu_button(message):
+    user_id = message.from_user.id
+    await adb.run_sync(clear_user_data, user_id)
+    await adb.run_sync(clear_pro_payment_data, user_id)
+    await show_main_menu(message.chat.id, user_id)
+
+
+# ==================== KO'CHIRILMAGAN BO'LIMLAR ====================
+# Profil, startup yaratish, Startaplarim, Pro/referal va admin xabar yuborish
+# hozircha main.py dagi sinxron handlerlar orqali ishlaydi.
+
+@bot.message_handler(func=lambda message: True, content_types=util.content_type_media)
+async def handle_legacy_message(message):
+    await forward_message_to_legacy(message)
+
+@bot.callback_query_handler(func=lambda call: True)
+async def handle_legacy_callback(call):
+    await forward_callback_to_legacy(call)
+
+
+# ==================== ISHGA TUSHIRISH ====================
+
+async def run_polling():
+    while True:
+        try:
+            try:
+                await bot.remove_webhook()
+            except Exception:
+                pass
+            await bot.infinity_polling(timeout=60, request_timeout=90)
+        except Exception as e:
+            logging.error(f"Async botda xatolik: {e}")
+            await asyncio.sleep(5)
+
+def run():
+    """Async botni joriy threadda ishga tushirish"""
+    try:
+        asyncio.run(run_polling())
+    finally:
+        adb.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    print("🚀 GarajHub Bot (async) ishga tushdi...")
+    run()
@@ -0,0 +1,55 @@
+# async_db.py - db.py funksiyalarining asyncio uchun o'ramlari
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import db
+from config import env_int
+
+
+# pymongo sinxron: so'rovlar cheklangan pool da bajariladi, event loop bloklanmaydi
+ASYNC_DB_WORKERS = env_int("ASYNC_DB_WORKERS", 16)
+_executor = ThreadPoolExecutor(max_workers=max(1, ASYNC_DB_WORKERS), thread_name_prefix="async-db")
+
+
+async def run_sync(func: Callable, *args, **kwargs) -> Any:
+    """Bloklovchi funksiyani DB pool ida bajarish"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def _wrap(func: Callable) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_sync(func, *args, **kwargs)
+    return wrapper
+
+
+get_user = _wrap(db.get_user)
+save_user = _wrap(db.save_user)
+update_user_field = _wrap(db.update_user_field)
+get_startup = _wrap(db.get_startup)
+get_startups_by_category = _wrap(db.get_startups_by_category)
+get_startups_by_category_page = _wrap(db.get_startups_by_category_page)
+get_all_categories = _wrap(db.get_all_categories)
+get_pending_startups = _wrap(db.get_pending_startups)
+update_startup_status = _wrap(db.update_startup_status)
+update_startup_post_id = _wrap(db.update_startup_post_id)
+add_startup_member = _wrap(db.add_startup_member)
+get_join_request_id = _wrap(db.get_join_request_id)
+get_join_request = _wrap(db.get_join_request)
+update_join_request = _wrap(db.update_join_request)
+get_statistics = _wrap(db.get_statistics)
+get_recent_users = _wrap(db.get_recent_users)
+get_recent_startups = _wrap(db.get_recent_startups)
+register_referral = _wrap(db.register_referral)
+confirm_referral = _wrap(db.confirm_referral)
+get_confirmed_referral_count = _wrap(db.get_confirmed_referral_count)
+get_referral_reward_count = _wrap(db.get_referral_reward_count)
+add_referral_reward = _wrap(db.add_referral_reward)
+add_pro_subscription = _wrap(db.add_pro_subscription)
+
+
+def shutdown(wait: bool = True):
+    _executor.shutdown(wait=wait)
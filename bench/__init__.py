@@ -0,0 +1 @@
+# bench - yuklama testlari uchun vositalar (ishlab chiqarish kodi emas)
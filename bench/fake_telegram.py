@@ -0,0 +1,440 @@
+# bench/fake_telegram.py - Yuklama testlari uchun soxta Telegram Bot API serveri
+#
+# main.py ishlatadigan metodlar (getUpdates, sendMessage, sendPhoto,
+# editMessage*, deleteMessage, answerCallbackQuery, getChatMember, getMe)
+# xotirada bajariladi: xabarlar chat bo'yicha saqlanadi, tahrir xatolari
+# (topilmadi, tur mos emas, o'zgarmagan) haqiqiy API dagidek qaytadi.
+# Har bir so'rovga kechikish va tasodifiy 429 qo'shish mumkin.
+#
+#   python -m bench.fake_telegram --port 8081 --latency-ms 40 --rate-429 0.01
+#   TELEGRAM_API_URL=http://127.0.0.1:8081 python main.py
+#
+# Update lar POST /_bench/update (JSON) bilan navbatga qo'yiladi, hisobot
+# GET /_bench/stats da. loadgen.py serverni shu jarayonda ishga tushiradi.
+import argparse
+import email.parser
+import email.policy
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+BOT_USER = {'id': 1000000001, 'is_bot': True, 'first_name': 'GarajHub Bench', 'username': 'garajhub_bench_bot'}
+
+# Kechikish va 429 qo'shilmaydigan metodlar
+UNTHROTTLED = frozenset({'getUpdates', 'getMe', 'deleteWebhook', 'setWebhook', 'getWebhookInfo'})
+SEND_METHODS = {
+    'sendMessage': None,
+    'sendPhoto': 'photo',
+    'sendDocument': 'document',
+    'sendVideo': 'video',
+    'sendAnimation': 'animation',
+    'sendAudio': 'audio',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, code: int, description: str, parameters: Optional[Dict[str, Any]] = None):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+        self.parameters = parameters
+
+
+def _bad_request(description: str) -> ApiError:
+    return ApiError(400, f"Bad Request: {description}")
+
+
+def _decode(value: Any) -> Any:
+    """telebot reply_markup, media va h.k. ni JSON satr sifatida yuboradi"""
+    if isinstance(value, str) and value[:1] in ('{', '['):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _chat_key(value: Any) -> Any:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class FakeTelegram:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, rate_429: float = 0.0,
+                 retry_after: int = 1, member_status: str = 'member', seed: Optional[int] = None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.member_status = member_status
+        self._random = random.Random(seed)
+        self._cond = threading.Condition()
+        self._updates: List[Dict[str, Any]] = []
+        self._next_update_id = 1
+        self._messages: Dict[Tuple[Any, int], Dict[str, Any]] = {}
+        self._next_message_id: Dict[Any, int] = defaultdict(int)
+        # Chat -> bot yuborgan/tahrirlagan xabarlar (loadgen javobni shu yerdan kutadi)
+        self._events: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        self._answered: Dict[str, Dict[str, Any]] = {}
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._injected_429 = 0
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    # ---------- loadgen tomoni ----------
+
+    def push_update(self, update: Dict[str, Any]) -> int:
+        with self._cond:
+            update = dict(update, update_id=self._next_update_id)
+            self._next_update_id += 1
+            self._updates.append(update)
+            self._cond.notify_all()
+            return update['update_id']
+
+    def skip_update_ids(self, last_update_id: int):
+        """Keyingi update_id lar shundan katta bo'lsin (jurnal oldingi bench dan offset saqlagan bo'lsa)"""
+        with self._cond:
+            self._next_update_id = max(self._next_update_id, int(last_update_id) + 1)
+
+    def cursor(self, chat_id: Any) -> int:
+        with self._cond:
+            return len(self._events[_chat_key(chat_id)])
+
+    def wait_events(self, chat_id: Any, cursor: int, timeout: float) -> List[Dict[str, Any]]:
+        """cursor dan keyingi hodisalar (kelmaguncha timeout gacha kutadi)"""
+        chat_id = _chat_key(chat_id)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self._events[chat_id]) <= cursor:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            return list(self._events[chat_id][cursor:])
+
+    def wait_answer(self, callback_query_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while callback_query_id not in self._answered:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._answered.pop(callback_query_id)
+
+    def messages(self, chat_id: Any) -> List[Dict[str, Any]]:
+        """Chatda hozir turgan bot xabarlari (eng yangisi oxirida)"""
+        chat_id = _chat_key(chat_id)
+        with self._cond:
+            items = [dict(m) for (chat, _), m in self._messages.items() if chat == chat_id]
+        return sorted(items, key=lambda m: m['message_id'])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'calls': dict(self._calls),
+                'errors': dict(self._errors),
+                'injected_429': self._injected_429,
+                'queued_updates': len(self._updates),
+                'messages': len(self._messages),
+            }
+
+    # ---------- API ----------
+
+    def call(self, method: str, params: Dict[str, Any]) -> Any:
+        with self._cond:
+            self._calls[method] += 1
+        if method not in UNTHROTTLED:
+            if self.latency or self.jitter:
+                time.sleep(self.latency + self._random.uniform(0, self.jitter))
+            if self.rate_429 and self._random.random() < self.rate_429:
+                with self._cond:
+                    self._injected_429 += 1
+                raise ApiError(429, f"Too Many Requests: retry after {self.retry_after}",
+                               {'retry_after': self.retry_after})
+        handler = getattr(self, f"_api_{method}", None)
+        try:
+            if handler is not None:
+                return handler(params)
+            if method in SEND_METHODS:
+                return self._send(params, SEND_METHODS[method])
+            # Bench uchun ahamiyatsiz metodlar (setMyCommands va h.k.)
+            return True
+        except ApiError as e:
+            with self._cond:
+                self._errors[f"{method}:{e.code}"] += 1
+            raise
+
+    def _api_getMe(self, params):
+        return BOT_USER
+
+    def _api_getUpdates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            # offset dan oldingilari tasdiqlangan
+            self._updates = [u for u in self._updates if u['update_id'] >= offset]
+            while not self._updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+                self._updates = [u for u in self._updates if u['update_id'] >= offset]
+            return self._updates[:limit]
+
+    def _api_getChatMember(self, params):
+        user_id = _chat_key(params.get('user_id'))
+        return {'status': self.member_status,
+                'user': {'id': user_id, 'is_bot': False, 'first_name': f"User {user_id}"}}
+
+    def _message(self, params) -> Tuple[Tuple[Any, int], Dict[str, Any]]:
+        if params.get('inline_message_id'):
+            raise _bad_request("inline messages are not supported by the fake server")
+        key = (_chat_key(params.get('chat_id')), int(params.get('message_id') or 0))
+        message = self._messages.get(key)
+        if message is None:
+            raise _bad_request("message to edit not found")
+        return key, message
+
+    def _record(self, chat_id, message: Dict[str, Any], method: str):
+        self._events[chat_id].append({'method': method, 'message': dict(message)})
+        self._cond.notify_all()
+
+    def _send(self, params, media: Optional[str]):
+        chat_id = _chat_key(params.get('chat_id'))
+        markup = _decode(params.get('reply_markup'))
+        with self._cond:
+            self._next_message_id[chat_id] += 1
+            message = {
+                'message_id': self._next_message_id[chat_id],
+                'date': int(time.time()),
+                'chat': {'id': chat_id if isinstance(chat_id, int) else -1001000000000,
+                         'type': 'private' if isinstance(chat_id, int) and chat_id > 0 else 'channel'},
+                'from': BOT_USER,
+            }
+            if media is None:
+                message['text'] = params.get('text', '')
+            else:
+                file_id = params.get(media) or f"bench-{media}-{uuid.uuid4().hex[:12]}"
+                if media == 'photo':
+                    message['photo'] = [{'file_id': file_id, 'file_unique_id': file_id[-16:], 'width': 640, 'height': 640}]
+                else:
+                    message[media] = {'file_id': file_id, 'file_unique_id': file_id[-16:]}
+                if params.get('caption') is not None:
+                    message['caption'] = params['caption']
+            if isinstance(markup, dict) and 'inline_keyboard' in markup:
+                message['reply_markup'] = markup
+            self._messages[(chat_id, message['message_id'])] = message
+            self._record(chat_id, message, 'send')
+            return message
+
+    def _api_editMessageText(self, params):
+        markup = _decode(params.get('reply_markup'))
+        with self._cond:
+            key, message = self._message(params)
+            if 'text' not in message:
+                raise _bad_request("there is no text in the message to edit")
+            if message['text'] == params.get('text') and message.get('reply_markup') == markup:
+                raise _bad_request("message is not modified: specified new message content and reply markup "
+                                   "are exactly the same as a current content and reply markup of the message")
+            message['text'] = params.get('text', '')
+            self._set_markup(message, markup)
+            self._record(key[0], message, 'edit')
+            return message
+
+    def _api_editMessageCaption(self, params):
+        markup = _decode(params.get('reply_markup'))
+        with self._cond:
+            key, message = self._message(params)
+            if 'text' in message:
+                raise _bad_request("there is no caption in the message to edit")
+            if message.get('caption') == params.get('caption') and message.get('reply_markup') == markup:
+                raise _bad_request("message is not modified")
+            message['caption'] = params.get('caption', '')
+            self._set_markup(message, markup)
+            self._record(key[0], message, 'edit')
+            return message
+
+    def _api_editMessageMedia(self, params):
+        media = _decode(params.get('media')) or {}
+        markup = _decode(params.get('reply_markup'))
+        with self._cond:
+            key, message = self._message(params)
+            if 'text' in message:
+                raise _bad_request("there is no media in the message to edit")
+            kind = media.get('type', 'photo')
+            for field in SEND_METHODS.values():
+                if field:
+                    message.pop(field, None)
+            file_id = media.get('media') or f"bench-{kind}-{uuid.uuid4().hex[:12]}"
+            if str(file_id).startswith('attach://'):
+                file_id = f"bench-{kind}-{uuid.uuid4().hex[:12]}"
+            if kind == 'photo':
+                message['photo'] = [{'file_id': file_id, 'file_unique_id': file_id[-16:], 'width': 640, 'height': 640}]
+            else:
+                message[kind] = {'file_id': file_id, 'file_unique_id': file_id[-16:]}
+            message['caption'] = media.get('caption', '')
+            self._set_markup(message, markup)
+            self._record(key[0], message, 'edit')
+            return message
+
+    def _api_editMessageReplyMarkup(self, params):
+        markup = _decode(params.get('reply_markup'))
+        with self._cond:
+            key, message = self._message(params)
+            if message.get('reply_markup') == markup:
+                raise _bad_request("message is not modified")
+            self._set_markup(message, markup)
+            self._record(key[0], message, 'edit')
+            return message
+
+    @staticmethod
+    def _set_markup(message: Dict[str, Any], markup):
+        if isinstance(markup, dict) and 'inline_keyboard' in markup:
+            message['reply_markup'] = markup
+        else:
+            message.pop('reply_markup', None)
+
+    def _api_deleteMessage(self, params):
+        key = (_chat_key(params.get('chat_id')), int(params.get('message_id') or 0))
+        with self._cond:
+            if self._messages.pop(key, None) is None:
+                raise _bad_request("message to delete not found")
+            self._cond.notify_all()
+        return True
+
+    def _api_answerCallbackQuery(self, params):
+        with self._cond:
+            self._answered[str(params.get('callback_query_id'))] = {
+                'text': params.get('text'), 'show_alert': str(params.get('show_alert')).lower() == 'true'}
+            self._cond.notify_all()
+        return True
+
+    # ---------- HTTP ----------
+
+    def serve(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Serverni fon thread ida ishga tushirish. TELEGRAM_API_URL uchun manzil qaytadi"""
+        fake = self
+
+        class Handler(_RequestHandler):
+            telegram = fake
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='fake-telegram', daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def _parse_multipart(content_type: str, body: bytes) -> Dict[str, Any]:
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if not name:
+            continue
+        if part.get_filename():
+            # Yuklangan fayl - o'rniga soxta file_id
+            fields[name] = None
+        else:
+            fields[name] = part.get_content()
+    return fields
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    telegram: FakeTelegram
+    protocol_version = 'HTTP/1.1'
+
+    def _params(self) -> Dict[str, Any]:
+        parts = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        content_type = self.headers.get('Content-Type', '')
+        if body:
+            if content_type.startswith('application/json'):
+                params.update(json.loads(body))
+            elif content_type.startswith('multipart/form-data'):
+                params.update(_parse_multipart(content_type, body))
+            else:
+                params.update({k: v[-1] for k, v in parse_qs(body.decode(), keep_blank_values=True).items()})
+        return params
+
+    def _reply(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        path = urlsplit(self.path).path
+        params = self._params()
+        if path == '/_bench/update':
+            self._reply(200, {'ok': True, 'result': self.telegram.push_update(params)})
+            return
+        if path == '/_bench/stats':
+            self._reply(200, {'ok': True, 'result': self.telegram.stats()})
+            return
+        segments = path.strip('/').split('/')
+        if len(segments) != 2 or not segments[0].startswith('bot'):
+            self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+            return
+        try:
+            result = self.telegram.call(segments[1], params)
+        except ApiError as e:
+            payload = {'ok': False, 'error_code': e.code, 'description': e.description}
+            if e.parameters:
+                payload['parameters'] = e.parameters
+            self._reply(e.code, payload)
+            return
+        self._reply(200, {'ok': True, 'result': result})
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soxta Telegram Bot API serveri")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--rate-429', type=float, default=0.0, help="429 qaytariladigan so'rovlar ulushi (0..1)")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--member-status', default='member')
+    args = parser.parse_args()
+
+    fake = FakeTelegram(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after, args.member_status)
+    url = fake.serve(args.host, args.port)
+    print(f"Soxta Telegram API: {url}  (TELEGRAM_API_URL={url})")
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(fake.stats(), ensure_ascii=False))
+    except KeyboardInterrupt:
+        fake.shutdown()
+
+
+if __name__ == '__main__':
+    main()
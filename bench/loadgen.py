@@ -0,0 +1,336 @@
+# bench/loadgen.py - Soxta Telegram API ustida sintetik yuklama
+#
+# Bot (main.py) shu jarayonda, soxta API ga ulangan holda polling bilan
+# ishga tushiriladi. N ta virtual foydalanuvchi parallel ravishda
+# ro'yxatdan o'tish, startaplarni ko'rish, qo'shilish va startup yaratish
+# jarayonlaridan o'tadi - bot javobini kutib, keyingi tugmani shu javobdan oladi.
+# Oxirida o'tkazuvchanlik, qadam va handler kechikishlari (p50/p90/p99)
+# hamda MongoDB/Telegram chaqiruvlari soni chiqariladi.
+#
+#   python -m bench.loadgen --users 50 --duration 60 --latency-ms 40 --rate-429 0.01
+#
+# MongoDB kerak. Ma'lumotlar alohida bazaga yoziladi (--db-name, standart
+# garajhub_bench) - ishlab turgan bazaga ulamang. OUTBOX_RATE va BOT_WORKERS
+# odatdagidek muhitdan olinadi.
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from bench.fake_telegram import FakeTelegram
+
+FLOWS = ('registration', 'browse', 'join', 'create')
+CATEGORIES = ('Biznes', "Sog'liq", 'Texnologiya', 'Ekologiya', "Ta'lim",
+              'Dizayn', 'Dasturlash', 'Savdo', 'Media', 'Karyera')
+
+
+class StepTimeout(Exception):
+    pass
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps: Dict[str, List[float]] = defaultdict(list)
+        self.flows: Dict[str, List[float]] = defaultdict(list)
+        self.failures: Dict[str, int] = defaultdict(int)
+        self.updates = 0
+
+    def step(self, name: str, seconds: float):
+        with self._lock:
+            self.steps[name].append(seconds)
+            self.updates += 1
+
+    def flow(self, name: str, seconds: float):
+        with self._lock:
+            self.flows[name].append(seconds)
+
+    def fail(self, name: str):
+        with self._lock:
+            self.failures[name] += 1
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {'count': len(values), 'p50_ms': round(pick(0.5) * 1000, 1),
+            'p90_ms': round(pick(0.9) * 1000, 1), 'p99_ms': round(pick(0.99) * 1000, 1),
+            'max_ms': round(values[-1] * 1000, 1)}
+
+
+class VirtualUser:
+    def __init__(self, fake: FakeTelegram, recorder: Recorder, user_id: int, timeout: float):
+        self.fake = fake
+        self.recorder = recorder
+        self.user_id = user_id
+        self.timeout = timeout
+        self.user = {'id': user_id, 'is_bot': False, 'first_name': f"Bench{user_id % 100000}",
+                     'username': f"bench_{user_id}"}
+        self._message_id = 0
+        self.flow = ''
+
+    # ---------- update lar ----------
+
+    def _message(self, **fields) -> Dict[str, Any]:
+        self._message_id += 1
+        return dict({'message_id': self._message_id, 'date': int(time.time()), 'from': self.user,
+                     'chat': {'id': self.user_id, 'type': 'private', 'first_name': self.user['first_name']}},
+                    **fields)
+
+    def _send(self, step: str, message: Dict[str, Any]):
+        """Xabar yuborib bot javobini (kamida bitta xabar/tahrir) kutish"""
+        cursor = self.fake.cursor(self.user_id)
+        started = time.perf_counter()
+        self.fake.push_update({'message': message})
+        if not self.fake.wait_events(self.user_id, cursor, self.timeout):
+            raise StepTimeout(f"{self.flow}:{step}")
+        self.recorder.step(f"{self.flow}:{step}", time.perf_counter() - started)
+
+    def text(self, step: str, text: str):
+        fields = {'text': text}
+        if text.startswith('/'):
+            fields['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        self._send(step, self._message(**fields))
+
+    def contact(self, step: str, phone: str):
+        self._send(step, self._message(contact={'phone_number': phone, 'first_name': self.user['first_name'],
+                                                 'user_id': self.user_id}))
+
+    def photo(self, step: str):
+        file_id = f"bench-photo-{uuid.uuid4().hex[:12]}"
+        self._send(step, self._message(photo=[{'file_id': file_id, 'file_unique_id': file_id[-16:],
+                                               'width': 640, 'height': 640}]))
+
+    def click(self, step: str, prefix: str) -> Optional[str]:
+        """Oxirgi xabarlardagi prefix bilan boshlanuvchi inline tugmani bosish"""
+        found = self.button(prefix)
+        if found is None:
+            return None
+        message, data = found
+        call_id = uuid.uuid4().hex
+        started = time.perf_counter()
+        self.fake.push_update({'callback_query': {'id': call_id, 'from': self.user, 'message': message,
+                                                  'chat_instance': str(self.user_id), 'data': data}})
+        if self.fake.wait_answer(call_id, self.timeout) is None:
+            raise StepTimeout(f"{self.flow}:{step}")
+        self.recorder.step(f"{self.flow}:{step}", time.perf_counter() - started)
+        return data
+
+    def button(self, prefix: str):
+        for message in reversed(self.fake.messages(self.user_id)):
+            rows = (message.get('reply_markup') or {}).get('inline_keyboard') or []
+            buttons = [b['callback_data'] for row in rows for b in row
+                       if str(b.get('callback_data', '')).startswith(prefix)]
+            if buttons:
+                return message, random.choice(buttons)
+        return None
+
+    # ---------- jarayonlar ----------
+
+    def registration(self):
+        self.text('start', '/start')
+        self.contact('contact', f"+99890{self.user_id % 10000000:07d}")
+
+    def browse(self):
+        self.text('menu', '🌐 Startaplar')
+        if random.random() < 0.5:
+            self.text('recommended', '🎯 Tavsiyalar')
+            self.click('next_page', 'rec_page_')
+        else:
+            self.text('categories', "🔎 Kategoriya bo'yicha")
+            self.click('category', 'category_')
+            self.click('startup', 'cat_startup_')
+
+    def join(self):
+        self.text('menu', '🌐 Startaplar')
+        self.text('categories', "🔎 Kategoriya bo'yicha")
+        for _ in range(3):
+            self.click('category', 'category_')
+            if self.click('startup', 'cat_startup_'):
+                self.click('join', 'join_startup_')
+                return
+            self.click('back', 'back_to_categories')
+
+    def create(self):
+        self.text('start', '🚀 Startup yaratish')
+        self.text('name', f"Bench startup {self.user_id}")
+        self.text('description', "Yuklama testi uchun yaratilgan startup")
+        if not self.click('category', 'create_cat_'):
+            # Pro cheklovi yoki boshqa javob - suhbat boshlanmagan
+            self.text('cancel', '🏠 Asosiy menyu')
+            return
+        if random.random() < 0.5:
+            self.photo('logo')
+        else:
+            self.text('logo', 'Skip')
+        self.text('group_link', 'https://t.me/garajhub_bench')
+        self.text('skills', 'Python, Designer')
+        self.text('max_members', '5')
+
+    def run(self, flows: List[str], deadline: float, stop: threading.Event):
+        plan = [f for f in flows if f != 'registration']
+        created = False
+        first = True
+        while not stop.is_set() and time.monotonic() < deadline:
+            if first and 'registration' in flows:
+                name = 'registration'
+            else:
+                choices = [f for f in plan if f != 'create' or not created]
+                if not choices:
+                    break
+                name = random.choice(choices)
+            first = False
+            self.flow = name
+            started = time.perf_counter()
+            try:
+                getattr(self, name)()
+            except StepTimeout as e:
+                self.recorder.fail(str(e))
+                continue
+            self.recorder.flow(name, time.perf_counter() - started)
+            created = created or name == 'create'
+
+
+def seed(count: int, owner_base: int) -> int:
+    """Ko'rish va qo'shilish uchun faol startaplar (egalari alohida id oralig'ida)"""
+    import db
+    db.init_db()
+    for i in range(count):
+        owner_id = owner_base + i
+        db.save_user(owner_id, f"bench_owner_{owner_id}", f"Owner{i}")
+        db.update_user_field(owner_id, 'phone', f"+99891{i:07d}")
+        startup_id = db.create_startup(
+            name=f"Seed startup {owner_id}",
+            description="Yuklama testi uchun",
+            logo=None if i % 2 else f"bench-seed-logo-{owner_id}",
+            group_link='https://t.me/garajhub_bench',
+            owner_id=owner_id,
+            required_skills='Python',
+            category=CATEGORIES[i % len(CATEGORIES)],
+            max_members=1000,
+        )
+        db.update_startup_status(startup_id, 'active')
+    return count
+
+
+def wait_idle(bot, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if bot.dispatcher.stats()['pending_updates'] == 0:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GarajHub bot uchun sintetik yuklama")
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help="sekund")
+    parser.add_argument('--flows', default=','.join(FLOWS))
+    parser.add_argument('--seed-startups', type=int, default=30)
+    parser.add_argument('--user-base', type=int, default=0, help="virtual foydalanuvchilar id si (0 - vaqtdan)")
+    parser.add_argument('--db-name', default='garajhub_bench')
+    parser.add_argument('--latency-ms', type=float, default=30)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--step-timeout', type=float, default=15)
+    parser.add_argument('--json', dest='json_path', help="hisobotni JSON faylga yozish")
+    args = parser.parse_args()
+
+    flows = [f.strip() for f in args.flows.split(',') if f.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"noma'lum jarayon: {', '.join(sorted(unknown))}")
+
+    fake = FakeTelegram(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after)
+    url = fake.serve()
+    # main.py va db.py import qilinishidan oldin
+    os.environ['TELEGRAM_API_URL'] = url
+    os.environ['MONGODB_DB_NAME'] = args.db_name
+    os.environ.setdefault('BOT_TOKEN', '1000000001:bench')
+
+    user_base = args.user_base or int(time.time()) * 100000
+    seed(args.seed_startups, user_base + 50000)
+
+    import main as app
+    import metrics
+
+    app.bot.resume_updates()
+    fake.skip_update_ids(app.bot.last_update_id)
+    calls_before = metrics.snapshot()['calls']
+
+    polling = threading.Thread(target=app.bot.infinity_polling,
+                               kwargs={'timeout': 5, 'long_polling_timeout': 1}, name='bench-polling', daemon=True)
+    polling.start()
+
+    recorder = Recorder()
+    stop = threading.Event()
+    started = time.monotonic()
+    deadline = started + args.duration
+    users = [VirtualUser(fake, recorder, user_base + i, args.step_timeout) for i in range(args.users)]
+    threads = [threading.Thread(target=u.run, args=(flows, deadline, stop), name=f"bench-user-{i}", daemon=True)
+               for i, u in enumerate(users)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join(args.step_timeout)
+    elapsed = time.monotonic() - started
+    idle = wait_idle(app.bot, args.step_timeout)
+    app.bot.stop_polling()
+    polling.join(5)
+
+    snapshot = metrics.snapshot()
+    calls = {k: v - calls_before.get(k, 0) for k, v in snapshot['calls'].items()}
+    handlers = {name: data for name, data in snapshot['handlers'].items() if name.startswith('bot:')}
+    report = {
+        'users': args.users,
+        'duration_s': round(elapsed, 2),
+        'updates': recorder.updates,
+        'updates_per_s': round(recorder.updates / elapsed, 1) if elapsed else 0.0,
+        'flows': {name: percentiles(v) for name, v in sorted(recorder.flows.items())},
+        'steps': {name: percentiles(v) for name, v in sorted(recorder.steps.items())},
+        'timeouts': dict(recorder.failures),
+        'handlers': dict(sorted(handlers.items(), key=lambda item: -item[1]['count'])),
+        'calls': calls,
+        'db_calls_per_update': round(calls.get('db', 0) / recorder.updates, 2) if recorder.updates else 0.0,
+        'dispatcher': app.bot.dispatcher.stats(),
+        'drained': idle,
+        'fake_telegram': fake.stats(),
+    }
+    fake.shutdown()
+
+    print(f"\n{args.users} foydalanuvchi, {report['duration_s']}s: {report['updates']} update, "
+          f"{report['updates_per_s']} update/s")
+    print(f"MongoDB: {calls.get('db', 0)} chaqiruv ({report['db_calls_per_update']} / update), "
+          f"Telegram: {calls.get('telegram', 0)} chaqiruv, 429: {report['fake_telegram']['injected_429']}")
+    print(f"\n{'qadam':<32}{'soni':>7}{'p50':>9}{'p90':>9}{'p99':>9}")
+    for name, data in report['steps'].items():
+        print(f"{name:<32}{data['count']:>7}{data['p50_ms']:>9}{data['p90_ms']:>9}{data['p99_ms']:>9}")
+    print(f"\n{'handler':<40}{'soni':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'db/chq':>8}")
+    for name, data in report['handlers'].items():
+        print(f"{name[4:]:<40}{data['count']:>7}{data.get('p50_ms', 0):>9}{data.get('p90_ms', 0):>9}"
+              f"{data.get('p99_ms', 0):>9}{data.get('db_calls_avg', 0):>8}")
+    if recorder.failures:
+        print(f"\nJavob kelmagan qadamlar: {json.dumps(report['timeouts'], ensure_ascii=False)}")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if not recorder.failures else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# bench/replay.py - Yozib olingan update oqimini soxta Bot API ustida qayta o'ynatish
+#
+# Ishlab chiqarishda UPDATE_RECORD_PATH=updates.jsonl.gz bilan yozilgan
+# (tozalangan) update lar mahalliy botga asl vaqt oralig'ida (--speed 1),
+# tezlashtirib (--speed 10) yoki kutmasdan (--speed 0) yuboriladi. Handler
+# vaqtlari va DB chaqiruvlari JSON hisobotga yoziladi; ikki revision ning
+# hisobotlari compare bilan solishtiriladi:
+#
+#   git checkout main     && python -m bench.replay run updates.jsonl.gz --speed 0 --out base.json
+#   git checkout feature  && python -m bench.replay run updates.jsonl.gz --speed 0 --out head.json
+#   python -m bench.replay compare base.json head.json --threshold 15
+#
+# Har bir run dan oldin replay bazasi (--db-name, standart garajhub_replay)
+# tozalanadi - ikkala revision bir xil holatdan boshlaydi.
+import argparse
+import gzip
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+from bench.fake_telegram import FakeTelegram
+from bench.loadgen import seed, wait_idle
+
+PROTECTED_DB_NAMES = frozenset({'garajhub'})
+
+
+def read_updates(path: str) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                yield float(item.get('t', 0)), item['u']
+
+
+def revision() -> Dict[str, Any]:
+    try:
+        head = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--', '*.py'], capture_output=True,
+                                    text=True, check=True).stdout.strip())
+    except Exception:
+        return {'commit': None, 'dirty': None}
+    return {'commit': head, 'dirty': dirty}
+
+
+def reset_database(name: str):
+    if name in PROTECTED_DB_NAMES:
+        raise SystemExit(f"'{name}' bazasini tozalash taqiqlangan - --db-name ni o'zgartiring")
+    import db
+    from pymongo import MongoClient
+    client = MongoClient(db.MONGODB_URI, serverSelectionTimeoutMS=db.MONGODB_TIMEOUT_MS)
+    try:
+        client.drop_database(name)
+    finally:
+        client.close()
+
+
+def wait_delivered(fake: FakeTelegram, bot, timeout: float) -> bool:
+    """Soxta API dagi navbat bo'shab, dispatcher ham ishlarini tugatguncha"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if fake.stats()['queued_updates'] == 0:
+            return wait_idle(bot, max(0.0, deadline - time.monotonic()))
+        time.sleep(0.1)
+    return False
+
+
+def run(args) -> int:
+    updates: List[Tuple[float, Dict[str, Any]]] = list(read_updates(args.path))
+    if not updates:
+        print(f"{args.path}: update topilmadi")
+        return 1
+
+    fake = FakeTelegram(args.latency_ms, args.jitter_ms)
+    url = fake.serve()
+    os.environ['TELEGRAM_API_URL'] = url
+    os.environ['MONGODB_DB_NAME'] = args.db_name
+    os.environ.setdefault('BOT_TOKEN', '1000000001:replay')
+    # Kvantillar butun replay bo'yicha hisoblansin
+    os.environ.setdefault('METRICS_WINDOW', str(max(2048, len(updates))))
+    # Soxta serverda Telegram limiti yo'q - handler vaqtiga outbox kutishi qo'shilmasin
+    os.environ.setdefault('OUTBOX_RATE', '100000')
+    os.environ.setdefault('OUTBOX_BURST', '100000')
+    # Replay qayta yozilmasin
+    os.environ.pop('UPDATE_RECORD_PATH', None)
+
+    if not args.keep_db:
+        reset_database(args.db_name)
+    if args.seed_startups:
+        seed(args.seed_startups, 6_000_000_000)
+
+    import main as app
+    import metrics
+
+    app.bot.resume_updates()
+    fake.skip_update_ids(app.bot.last_update_id)
+    calls_before = metrics.snapshot()['calls']
+
+    polling = threading.Thread(target=app.bot.infinity_polling,
+                               kwargs={'timeout': 5, 'long_polling_timeout': 1}, name='replay-polling', daemon=True)
+    polling.start()
+
+    started = time.monotonic()
+    first = updates[0][0]
+    for t, update in updates:
+        if args.speed > 0:
+            delay = started + (t - first) / args.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        fake.push_update(update)
+    delivered = wait_delivered(fake, app.bot, args.drain_timeout)
+    elapsed = time.monotonic() - started
+    app.bot.stop_polling()
+    polling.join(5)
+
+    snapshot = metrics.snapshot()
+    calls = {k: v - calls_before.get(k, 0) for k, v in snapshot['calls'].items()}
+    report = {
+        'revision': revision(),
+        'file': os.path.abspath(args.path),
+        'speed': args.speed,
+        'updates': len(updates),
+        'wall_s': round(elapsed, 2),
+        'updates_per_s': round(len(updates) / elapsed, 1) if elapsed else 0.0,
+        'drained': delivered,
+        'handlers': {name: data for name, data in snapshot['handlers'].items() if name.startswith('bot:')},
+        'calls': calls,
+        'db_calls_per_update': round(calls.get('db', 0) / len(updates), 2),
+        'dispatcher': app.bot.dispatcher.stats(),
+        'fake_telegram': fake.stats(),
+    }
+    fake.shutdown()
+
+    dirty = " (o'zgargan)" if report['revision']['dirty'] else ''
+    print(f"{report['updates']} update, {report['wall_s']}s ({report['updates_per_s']} update/s), "
+          f"MongoDB: {calls.get('db', 0)}, Telegram: {calls.get('telegram', 0)}, "
+          f"revision: {report['revision']['commit']}{dirty}")
+    if not delivered:
+        print("⚠️ Barcha update lar ishlanib ulgurmadi (--drain-timeout)")
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Hisobot: {args.out}")
+    return 0 if delivered else 1
+
+
+def _delta(base: float, head: float) -> str:
+    if not base:
+        return '—'
+    return f"{(head - base) / base * 100:+.0f}%"
+
+
+def compare(args) -> int:
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.head, encoding='utf-8') as f:
+        head = json.load(f)
+
+    print(f"base: {base['revision'].get('commit')}  head: {head['revision'].get('commit')}  "
+          f"({base['updates']} / {head['updates']} update)")
+    print(f"DB chaqiruv / update: {base['db_calls_per_update']} -> {head['db_calls_per_update']}")
+    print(f"\n{'handler':<40}{'soni':>7}{'p50':>17}{'p90':>17}{'p99':>17}{'db/chq':>13}")
+
+    regressions = []
+    names = sorted(set(base['handlers']) | set(head['handlers']),
+                   key=lambda n: -max(base['handlers'].get(n, {}).get('count', 0),
+                                      head['handlers'].get(n, {}).get('count', 0)))
+    for name in names:
+        a = base['handlers'].get(name, {})
+        b = head['handlers'].get(name, {})
+        row = f"{name[4:]:<40}{b.get('count', 0):>7}"
+        for q in ('p50_ms', 'p90_ms', 'p99_ms'):
+            row += f"{a.get(q, 0):>7}->{b.get(q, 0):<6}{_delta(a.get(q, 0), b.get(q, 0)):>4}"
+        row += f"{a.get('db_calls_avg', 0):>6}->{b.get('db_calls_avg', 0):<5}"
+        print(row)
+
+        if min(a.get('count', 0), b.get('count', 0)) < args.min_count:
+            continue
+        p90_a, p90_b = a.get('p90_ms', 0), b.get('p90_ms', 0)
+        if p90_b - p90_a > args.min_ms and p90_a and (p90_b - p90_a) / p90_a * 100 > args.threshold:
+            regressions.append(f"{name[4:]}: p90 {p90_a} -> {p90_b} ms")
+        if b.get('db_calls_avg', 0) > a.get('db_calls_avg', 0):
+            regressions.append(f"{name[4:]}: DB chaqiruv {a.get('db_calls_avg', 0)} -> {b.get('db_calls_avg', 0)}")
+
+    if regressions:
+        print("\n❌ Sekinlashish:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\n✅ Sekinlashish topilmadi")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yozilgan update larni qayta o'ynatish benchmarki")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help="update larni o'ynatib hisobot yozish")
+    run_parser.add_argument('path', help="UPDATE_RECORD_PATH bilan yozilgan .jsonl yoki .jsonl.gz")
+    run_parser.add_argument('--speed', type=float, default=0, help="1 - asl tezlik, 10 - 10x, 0 - kutmasdan")
+    run_parser.add_argument('--out', default='replay_report.json')
+    run_parser.add_argument('--db-name', default='garajhub_replay')
+    run_parser.add_argument('--keep-db', action='store_true', help="bazani tozalamaslik")
+    run_parser.add_argument('--seed-startups', type=int, default=30)
+    run_parser.add_argument('--latency-ms', type=float, default=0)
+    run_parser.add_argument('--jitter-ms', type=float, default=0)
+    run_parser.add_argument('--drain-timeout', type=float, default=120)
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser('compare', help="ikki hisobotni solishtirish")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--threshold', type=float, default=10, help="p90 o'sishi chegarasi, %%")
+    compare_parser.add_argument('--min-ms', type=float, default=1, help="bundan kichik farq e'tiborga olinmaydi")
+    compare_parser.add_argument('--min-count', type=int, default=20)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,394 @@
+# broadcast.py - Telegram limitlariga mos, qayta tiklanadigan ommaviy xabar yuborish
+#
+# Ish holati va har bir qabul qiluvchining natijasi MongoDB da saqlanadi, shuning
+# uchun jarayon qayta ishga tushsa yuborilganlar qayta yuborilmaydi. Faqat
+# to'xtash paytida yuborilayotgan (ko'pi bilan worker soni) xabarlar takrorlanishi mumkin.
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from telebot.apihelper import ApiTelegramException
+
+from config import env_int
+import db
+from outbox import send_priority, PRIORITY_ADMIN, PRIORITY_BROADCAST
+from telegram_transport import without_retries
+
+logger = logging.getLogger(__name__)
+
+
+# Telegram: barcha chatlarga ~30 xabar/s, bitta chatga ~1 xabar/s
+BROADCAST_RATE = env_int("BROADCAST_RATE", 25)
+BROADCAST_PER_CHAT_INTERVAL = env_int("BROADCAST_PER_CHAT_INTERVAL_MS", 1000) / 1000
+BROADCAST_WORKERS = env_int("BROADCAST_WORKERS", 8)
+BROADCAST_BATCH_SIZE = env_int("BROADCAST_BATCH_SIZE", 200)
+BROADCAST_MAX_ATTEMPTS = env_int("BROADCAST_MAX_ATTEMPTS", 3)
+BROADCAST_MAX_RATE_LIMITS = env_int("BROADCAST_MAX_RATE_LIMITS", 10)
+BROADCAST_PROGRESS_INTERVAL = env_int("BROADCAST_PROGRESS_INTERVAL", 5)
+BROADCAST_LEASE_SECONDS = env_int("BROADCAST_LEASE_SECONDS", 60)
+# Ish shuncha marta xato bilan to'xtasa "failed" deb belgilanadi
+BROADCAST_JOB_MAX_ERRORS = env_int("BROADCAST_JOB_MAX_ERRORS", 5)
+
+
+class TokenBucket:
+    """Sekundiga `rate` ta token; 429 kelganda hamma worker retry_after gacha to'xtaydi"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = max(0.1, float(rate))
+        self.capacity = max(1.0, float(capacity or rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    elapsed = max(0.0, now - self._updated)
+                    self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # Pauzadan keyin yig'ilgan token lar bilan birdaniga portlash bo'lmasin
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class ChatThrottle:
+    """Bitta chatga ketma-ket xabarlar orasida minimal interval"""
+
+    def __init__(self, interval: float = BROADCAST_PER_CHAT_INTERVAL, max_chats: int = 10000):
+        self.interval = interval
+        self.max_chats = max_chats
+        self._next_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, chat_id: int):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at.get(chat_id, 0.0))
+            self._next_at[chat_id] = slot + self.interval
+            if len(self._next_at) > self.max_chats:
+                self._next_at = {key: value for key, value in self._next_at.items() if value > now}
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def send_payload(bot, chat_id: int, payload: Dict[str, Any]):
+    kind = payload.get('kind') or 'text'
+    text = payload.get('text') or ''
+    if kind == 'photo':
+        bot.send_photo(chat_id, payload['file_id'], caption=text or None)
+    elif kind == 'video':
+        bot.send_video(chat_id, payload['file_id'], caption=text or None)
+    elif kind == 'document':
+        bot.send_document(chat_id, payload['file_id'], caption=text or None)
+    else:
+        bot.send_message(chat_id, f"📢 <b>Yangilik!</b>\n\n{text}")
+
+
+def _retry_after(error: ApiTelegramException) -> int:
+    result = error.result_json if isinstance(error.result_json, dict) else {}
+    parameters = result.get('parameters') or {}
+    try:
+        return max(1, int(parameters.get('retry_after', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+
+def format_progress(job: Dict, finished: bool = False) -> str:
+    total = int(job.get('total') or 0)
+    sent = int(job.get('sent') or 0)
+    failed = int(job.get('failed') or 0)
+    done = sent + failed
+    percent = done / total * 100 if total else 0.0
+
+    if finished and job.get('status') == 'cancelled':
+        title = "⛔ <b>Xabar yuborish to'xtatildi</b>"
+    elif finished and job.get('status') == 'failed':
+        title = "⚠️ <b>Xabar yuborish xatolik bilan to'xtadi</b>"
+    elif finished:
+        title = "✅ <b>Xabar yuborish yakunlandi!</b>"
+    else:
+        title = "📤 <b>Xabar yuborilmoqda...</b>"
+
+    text = (
+        f"{title}\n\n"
+        f"👥 Foydalanuvchilar: {total} ta\n"
+        f"✅ Yuborildi: {sent} ta\n"
+        f"❌ Yuborilmadi: {failed} ta\n"
+    )
+    if finished:
+        rate = sent / done * 100 if done else 0.0
+        return text + f"\n📊 Umumiy foiz: {rate:.1f}%"
+    return text + f"\n⏳ Jarayon: {done}/{total} ({percent:.1f}%)"
+
+
+class BroadcastEngine:
+    """Broadcast ishlarini fon thread larida bajaradi va holatini MongoDB da yuritadi"""
+
+    def __init__(self, bot, rate: float = BROADCAST_RATE, workers: int = BROADCAST_WORKERS):
+        self.bot = bot
+        self.workers = max(1, workers)
+        # Bitta bot token: bir vaqtdagi barcha ishlar umumiy limitni bo'lishadi
+        self.bucket = TokenBucket(rate)
+        self.chats = ChatThrottle()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._runners: Dict[int, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    # ---------- boshqaruv ----------
+
+    def start(self, payload: Dict[str, Any], created_by: str, admin_chat_id: Optional[int] = None) -> Dict:
+        """Yangi ish yaratib darhol qaytadi; yuborish fon thread ida bo'ladi"""
+        job = db.create_broadcast_job(payload, created_by, admin_chat_id)
+        self._spawn(job['id'])
+        return job
+
+    def resume(self) -> int:
+        """Tugallanmagan ishlarni davom ettirish (bot ishga tushganda chaqiriladi)"""
+        count = 0
+        try:
+            for job in db.get_unfinished_broadcast_jobs():
+                if self._spawn(job['id']):
+                    count += 1
+        except Exception as e:
+            logger.error(f"Broadcast ishlarini tiklashda xatolik: {e}")
+        if count:
+            logger.info(f"{count} ta broadcast ishi davom ettirilmoqda")
+        return count
+
+    def cancel(self, job_id: int) -> bool:
+        # Runner keyingi heartbeat da bekor qilinganini ko'rib to'xtaydi
+        return db.cancel_broadcast_job(job_id)
+
+    def active_jobs(self):
+        with self._lock:
+            return sorted(job_id for job_id, thread in self._runners.items() if thread.is_alive())
+
+    def _spawn(self, job_id: int) -> bool:
+        with self._lock:
+            thread = self._runners.get(job_id)
+            if thread is not None and thread.is_alive():
+                return False
+            thread = threading.Thread(target=self._run_job, args=(job_id,), name=f"broadcast-{job_id}", daemon=True)
+            self._runners[job_id] = thread
+            thread.start()
+            return True
+
+    # ---------- ishni bajarish ----------
+
+    def _run_job(self, job_id: int):
+        errors = 0
+        while True:
+            try:
+                job = db.claim_broadcast_job(job_id, self.owner, BROADCAST_LEASE_SECONDS)
+                if job is None:
+                    # Boshqa (yoki restart dan oldingi) jarayon lease ni ushlab turibdi -
+                    # lease tugagach qayta urinamiz, ish tugagan bo'lsa chiqamiz
+                    wait = self._lease_wait(job_id)
+                    if wait is None:
+                        return
+                    time.sleep(wait)
+                    continue
+                if job['status'] == 'preparing':
+                    db.prepare_broadcast_recipients(job_id)
+                db.release_broadcast_in_flight(job_id)
+                db.start_broadcast_job(job_id)
+                self._execute(db.get_broadcast_job(job_id))
+                return
+            except Exception as e:
+                errors += 1
+                logger.error(f"Broadcast #{job_id} xatolik bilan to'xtadi ({errors}/{BROADCAST_JOB_MAX_ERRORS}): {e}",
+                             exc_info=True)
+                if self._fail_or_release(job_id, e, errors):
+                    return
+                time.sleep(min(5 * 2 ** errors, BROADCAST_LEASE_SECONDS))
+
+    @staticmethod
+    def _lease_wait(job_id: int) -> Optional[float]:
+        """Joriy lease tugashigacha sekund. Ish tugagan/bekor qilingan bo'lsa None"""
+        job = db.get_broadcast_job(job_id)
+        if not job or job.get('status') not in db.BROADCAST_ACTIVE_STATUSES:
+            return None
+        heartbeat = job.get('heartbeat_at')
+        if not isinstance(heartbeat, datetime):
+            return 1.0
+        if heartbeat.tzinfo is None:
+            heartbeat = heartbeat.replace(tzinfo=timezone.utc)
+        remaining = BROADCAST_LEASE_SECONDS - (datetime.now(timezone.utc) - heartbeat).total_seconds()
+        return max(1.0, remaining + 1)
+
+    def _fail_or_release(self, job_id: int, error: Exception, errors: int) -> bool:
+        """Xatodan keyin: chegara oshsa ish "failed" (True), aks holda qayta urinish uchun bo'shatiladi"""
+        try:
+            if errors >= BROADCAST_JOB_MAX_ERRORS:
+                db.finish_broadcast_job(job_id, 'failed', error=str(error))
+                job = db.get_broadcast_job(job_id)
+                if job and job.get('status') == 'failed':
+                    self._report(job, {'message_id': job.get('progress_message_id'), 'reported_at': 0.0},
+                                 finished=True)
+                return True
+            db.release_broadcast_job(job_id, self.owner, str(error))
+        except Exception as e:
+            # DB ishlamayapti - keyingi urinishda yana ko'ramiz
+            logger.error(f"Broadcast #{job_id} holati yangilanmadi: {e}")
+        return False
+
+    def _execute(self, job: Dict):
+        job_id = job['id']
+        payload = job.get('payload') or {}
+        items: "queue.Queue[Optional[int]]" = queue.Queue(maxsize=self.workers * 2)
+        threads = [
+            threading.Thread(target=self._worker, args=(job_id, payload, items),
+                             name=f"broadcast-{job_id}-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        progress = {'message_id': job.get('progress_message_id'), 'reported_at': 0.0}
+        self._report(job, progress)
+        alive = True
+        last_beat = time.monotonic()
+
+        def tick() -> bool:
+            nonlocal job, last_beat
+            if time.monotonic() - last_beat < BROADCAST_PROGRESS_INTERVAL:
+                return True
+            last_beat = time.monotonic()
+            current = db.heartbeat_broadcast_job(job_id, self.owner)
+            if current is None:
+                return False
+            job = current
+            self._report(job, progress)
+            return True
+
+        fed = False
+        try:
+            while alive:
+                batch = db.claim_broadcast_recipients(job_id, BROADCAST_BATCH_SIZE)
+                if not batch:
+                    break
+                for user_id in batch:
+                    while alive:
+                        try:
+                            items.put(user_id, timeout=1)
+                            break
+                        except queue.Full:
+                            alive = tick()
+                    if not alive:
+                        break
+                    alive = tick()
+            fed = alive
+        finally:
+            if not fed:
+                # Bekor qilingan yoki DB xatosi: navbatda qolganlar yuborilmaydi
+                self._drain(items)
+            # Xato _run_job ga faqat worker lar to'xtagandan keyin chiqadi - aks holda
+            # release_broadcast_in_flight ular yuborayotganlarni qaytarib, xabar ikki marta ketadi
+            for _ in threads:
+                items.put(None)
+            for thread in threads:
+                thread.join()
+
+        if alive:
+            db.finish_broadcast_job(job_id, 'completed')
+        final = db.get_broadcast_job(job_id) or job
+        if final.get('status') in ('completed', 'cancelled'):
+            self._report(final, progress, finished=True)
+        logger.info(
+            f"Broadcast #{job_id} {final.get('status')}: sent={final.get('sent')}, "
+            f"failed={final.get('failed')}, total={final.get('total')}"
+        )
+
+    @staticmethod
+    def _drain(items: queue.Queue):
+        while True:
+            try:
+                items.get_nowait()
+            except queue.Empty:
+                return
+
+    def _worker(self, job_id: int, payload: Dict[str, Any], items: queue.Queue):
+        while True:
+            user_id = items.get()
+            if user_id is None:
+                return
+            try:
+                sent, attempts, error = self._deliver(user_id, payload)
+                db.finish_broadcast_recipient(job_id, user_id, sent, attempts, error)
+            except Exception as e:
+                logger.error(f"Broadcast #{job_id} qabul qiluvchi {user_id} xatosi: {e}")
+
+    def _deliver(self, chat_id: int, payload: Dict[str, Any]) -> Tuple[bool, int, Optional[str]]:
+        attempts = 0
+        rate_limits = 0
+        error = None
+        while attempts < BROADCAST_MAX_ATTEMPTS and rate_limits <= BROADCAST_MAX_RATE_LIMITS:
+            self.bucket.acquire()
+            self.chats.wait(chat_id)
+            attempts += 1
+            try:
+                # 429 ni transport emas, shu yerdagi umumiy bucket boshqaradi
+                with without_retries(), send_priority(PRIORITY_BROADCAST):
+                    send_payload(self.bot, chat_id, payload)
+                return True, attempts, None
+            except ApiTelegramException as e:
+                error = e.description
+                if e.error_code == 429:
+                    # Limit oshdi: urinish hisoblanmaydi, barcha worker lar kutadi
+                    rate_limits += 1
+                    attempts -= 1
+                    self.bucket.pause(_retry_after(e))
+                    continue
+                if e.error_code in (400, 403):
+                    # Bot bloklangan, chat topilmadi yoki foydalanuvchi o'chirilgan
+                    return False, attempts, error
+                time.sleep(min(2 ** attempts, 10))
+            except Exception as e:
+                error = str(e)
+                time.sleep(min(2 ** attempts, 10))
+        return False, attempts, error
+
+    # ---------- admin ga hisobot ----------
+
+    def _report(self, job: Dict, progress: Dict, finished: bool = False):
+        chat_id = job.get('admin_chat_id')
+        if not chat_id:
+            return
+        now = time.monotonic()
+        if not finished and now - progress['reported_at'] < BROADCAST_PROGRESS_INTERVAL:
+            return
+        progress['reported_at'] = now
+        text = format_progress(job, finished)
+        try:
+            with send_priority(PRIORITY_ADMIN):
+                if progress['message_id']:
+                    self.bot.edit_message_text(text, chat_id, progress['message_id'])
+                else:
+                    message = self.bot.send_message(chat_id, text)
+                    progress['message_id'] = message.message_id
+                    db.set_broadcast_progress_message(job['id'], message.message_id)
+        except ApiTelegramException as e:
+            if 'message is not modified' not in str(e):
+                logger.warning(f"Broadcast #{job['id']} progress xabari yangilanmadi: {e}")
+        except Exception as e:
+            logger.warning(f"Broadcast #{job['id']} progress xabari yangilanmadi: {e}")
@@ -0,0 +1,257 @@
+# cards.py - Startap kartalari (matn + tugmalar) va ularning versiyali keshi
+#
+# Kesh kaliti (startup_id, version, role). Versiya startap yoki uning a'zoligi
+# yozilganda db.py da oshiriladi, shuning uchun eskirgan karta qaytmaydi.
+# Boshqa jarayon yozuvlari uchun CARD_CACHE_TTL qo'shimcha chegara.
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import env_int
+import db
+
+
+CARD_CACHE_TTL = env_int("CARD_CACHE_TTL", 60)
+CARD_CACHE_MAX_ENTRIES = env_int("CARD_CACHE_MAX_ENTRIES", 5000)
+
+# Karta ko'rinishlari
+ROLE_PUBLIC = 'public'      # tavsiyalar va kategoriya bo'yicha ko'rish
+ROLE_MEMBER = 'member'      # qo'shilgan startap
+ROLE_OWNER = 'owner'        # "Startaplarim"
+ROLE_ADMIN = 'admin'        # admin panel
+ROLE_CHANNEL = 'channel'    # kanal posti
+
+STATUS_TEXTS = {
+    'pending': '⏳ Kutilmoqda',
+    'active': '▶️ Faol',
+    'completed': '✅ Yakunlangan',
+    'rejected': '❌ Rad etilgan'
+}
+
+# (matn, 'callback' | 'url', qiymat)
+Button = Tuple[str, str, str]
+
+
+class Card:
+    __slots__ = ('startup_id', 'version', 'text', 'rows', 'logo', 'current_members', 'max_members')
+
+    def __init__(self, startup: Dict, text: str, rows: List[List[Button]],
+                 current_members: int, max_members: int):
+        self.startup_id = startup['_id']
+        self.version = startup.get('version', 0)
+        self.text = text
+        self.rows = rows
+        self.logo = startup.get('logo')
+        self.current_members = current_members
+        self.max_members = max_members
+
+    @property
+    def is_full(self) -> bool:
+        return self.current_members >= self.max_members
+
+    def markup(self, extra_rows: Iterable[Iterable[InlineKeyboardButton]] = ()) -> InlineKeyboardMarkup:
+        """Har safar yangi markup: ko'rinishga xos tugmalar keshlangan kartani o'zgartirmaydi"""
+        markup = InlineKeyboardMarkup()
+        for row in self.rows:
+            markup.row(*[_button(item) for item in row])
+        for row in extra_rows:
+            markup.row(*row)
+        return markup
+
+
+def _button(item: Button) -> InlineKeyboardButton:
+    label, kind, value = item
+    if kind == 'url':
+        return InlineKeyboardButton(label, url=value)
+    return InlineKeyboardButton(label, callback_data=value)
+
+
+class CardCache:
+    def __init__(self, ttl: int = CARD_CACHE_TTL, max_entries: int = CARD_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._items: "OrderedDict[Hashable, Tuple[float, Card]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Card]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, card: Card):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, card)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._items), 'hits': self.hits, 'misses': self.misses}
+
+
+_cache = CardCache()
+
+
+def format_date(value) -> str:
+    if not value or value == '—':
+        return '—'
+    if isinstance(value, datetime):
+        return value.strftime('%d-%m-%Y')
+    try:
+        return datetime.fromisoformat(str(value)).strftime('%d-%m-%Y')
+    except Exception:
+        return str(value)
+
+
+def _owner_info(owner_id) -> Tuple[str, str]:
+    user = db.get_user(owner_id)
+    name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
+    contact = f"@{user.get('username', '')}" if user and user.get('username') else f"ID: {owner_id}"
+    return name, contact
+
+
+def _join_row(startup: Dict, full: bool, label: str = '🤝 Startupga qo\'shilish') -> List[Button]:
+    if full:
+        return [('❌ A\'zolar to\'ldi', 'callback', 'full_members')]
+    return [(label, 'callback', f'join_startup_{startup["_id"]}')]
+
+
+def _build(startup: Dict, role: str, bot_username: Optional[str]) -> Card:
+    sid = startup['_id']
+    owner_name, owner_contact = _owner_info(startup['owner_id'])
+    max_members = startup.get('max_members', 10)
+    current_members = 0 if role == ROLE_ADMIN else int(startup.get('current_members') or 0)
+    full = current_members >= max_members
+    rows: List[List[Button]] = []
+
+    if role == ROLE_ADMIN:
+        created_at = startup.get('created_at') or '—'
+        text = (
+            f"🎯 <b>Nomi:</b> {startup['name']}\n"
+            f"📌 <b>Tavsif:</b> {startup['description']}\n\n"
+            f"👤 <b>Muallif:</b> {owner_name}\n"
+            f"📱 <b>Aloqa:</b> {owner_contact}\n"
+            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
+            f"🔧 <b>Kerak:</b> {startup.get('required_skills', '—')}\n"
+            f"👥 <b>Maksimal a'zolar:</b> {startup.get('max_members', '—')}\n"
+            f"🔗 <b>Guruh havolasi:</b> {startup.get('group_link', '—')}\n"
+            f"📅 <b>Yaratilgan sana:</b> {str(created_at)[:10]}\n"
+            f"📊 <b>Holati:</b> {startup['status']}"
+        )
+        status = startup['status']
+        if status == 'pending':
+            rows.append([('✅ Tasdiqlash', 'callback', f'admin_approve_{sid}'),
+                         ('❌ Rad etish', 'callback', f'admin_reject_{sid}')])
+        elif status == 'active':
+            rows.append([('✅ Faol', 'callback', 'already_active')])
+        elif status == 'completed':
+            rows.append([('✅ Yakunlangan', 'callback', 'already_completed')])
+        elif status == 'rejected':
+            rows.append([('❌ Rad etilgan', 'callback', 'already_rejected')])
+
+    elif role == ROLE_OWNER:
+        status = startup['status']
+        text = (
+            f"🎯 <b>Nomi:</b> {startup['name']}\n"
+            f"📊 <b>Holati:</b> {STATUS_TEXTS.get(status, status)}\n"
+            f"📅 <b>Boshlanish sanasi:</b> {format_date(startup.get('started_at', '—'))}\n"
+            f"👤 <b>Muallif:</b> {owner_name}\n"
+            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
+            f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n"
+            f"📌 <b>Tavsif:</b> {startup['description']}"
+        )
+        if status == 'pending':
+            rows.append([('⏳ Admin tasdig\'ini kutyapti', 'callback', 'waiting_approval')])
+        elif status == 'active':
+            rows.append([('👥 A\'zolar', 'callback', f'view_members_{sid}_1')])
+            rows.append([('⏹️ Yakunlash', 'callback', f'complete_startup_{sid}')])
+        elif status == 'completed':
+            rows.append([('👥 A\'zolar', 'callback', f'view_members_{sid}_1')])
+            if startup.get('results'):
+                rows.append([('📊 Natijalar', 'callback', f'view_results_{sid}')])
+        elif status == 'rejected':
+            rows.append([('❌ Rad etilgan', 'callback', 'rejected_info')])
+
+    elif role == ROLE_CHANNEL:
+        text = (
+            f"🚀 <b>{startup['name']}</b>\n\n"
+            f"📝 {startup['description']}\n\n"
+            f"👤 <b>Muallif:</b> {owner_name}\n"
+            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
+            f"🔧 <b>Kerakli mutaxassislar:</b>\n{startup.get('required_skills', '—')}\n\n"
+            f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n\n"
+        )
+        if full:
+            text += "❌ <b>Startup to'ldi, yangi a'zolar qabul qilinmaydi.</b>\n\n"
+        else:
+            text += f"➕ <b>O'z startupingizni yaratish uchun:</b> @{bot_username}"
+        rows.append(_join_row(startup, full))
+
+    else:
+        text = (
+            f"🎯 <b>Nomi:</b> {startup['name']}\n"
+            f"📅 <b>Boshlangan sana:</b> {format_date(startup.get('started_at', '—'))}\n"
+            f"👤 <b>Muallif:</b> {owner_name}\n"
+            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
+            f"🔧 <b>Kerakli mutaxassislar:</b> {startup.get('required_skills', '—')}\n"
+            f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n"
+            f"📌 <b>Tavsif:</b> {startup['description']}"
+        )
+        if role == ROLE_MEMBER:
+            text += f"\n🔗 <b>Guruh havolasi:</b> {startup.get('group_link', '—')}"
+            if startup.get('group_link'):
+                rows.append([('📲 Guruhga kirish', 'url', startup['group_link'])])
+        else:
+            rows.append(_join_row(startup, full))
+
+    return Card(startup, text, rows, current_members, max_members)
+
+
+def _cache_key(sid: str, version, role: str, bot_username: Optional[str]) -> Tuple:
+    # Kanal kartasi matnida @bot_username bor - u ham kalitga kiradi
+    if role == ROLE_CHANNEL:
+        return sid, version, role, bot_username
+    return sid, version, role
+
+
+def render_startup_card(startup_id, role: str = ROLE_PUBLIC, startup: Optional[Dict] = None,
+                        bot_username: Optional[str] = None) -> Optional[Card]:
+    """Startap kartasini qaytarish. Versiya ma'lum va keshda bo'lsa DB ga murojaat qilinmaydi."""
+    sid = str(startup_id)
+    version = startup.get('version') if startup else db.get_known_startup_version(sid)
+    if version is not None:
+        card = _cache.get(_cache_key(sid, version, role, bot_username))
+        if card is not None:
+            return card
+
+    if startup is None:
+        startup = db.get_startup(sid)
+        if not startup:
+            return None
+    card = _build(startup, role, bot_username)
+    _cache.put(_cache_key(sid, card.version, role, bot_username), card)
+    return card
+
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats()
@@ -0,0 +1,182 @@
+# channel_updater.py - Kanal postlarini kechiktirib, birlashtirib yangilash
+#
+# Bir startup uchun qisqa vaqt ichida kelgan so'rovlar bitta tahrirga
+# birlashtiriladi va tahrir paytida eng oxirgi holat o'qiladi.
+import heapq
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from telebot.apihelper import ApiTelegramException
+
+from config import env_int
+from outbox import send_priority, PRIORITY_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+
+CHANNEL_UPDATE_DEBOUNCE = env_int("CHANNEL_UPDATE_DEBOUNCE_MS", 2000) / 1000
+CHANNEL_UPDATE_MAX_DELAY = env_int("CHANNEL_UPDATE_MAX_DELAY_MS", 10000) / 1000
+CHANNEL_UPDATE_MAX_ATTEMPTS = env_int("CHANNEL_UPDATE_MAX_ATTEMPTS", 5)
+CHANNEL_UPDATE_BACKOFF = env_int("CHANNEL_UPDATE_BACKOFF_MS", 2000) / 1000
+CHANNEL_UPDATE_MAX_BACKOFF = env_int("CHANNEL_UPDATE_MAX_BACKOFF_MS", 60000) / 1000
+
+
+class _Pending:
+    __slots__ = ('first_at', 'due_at', 'attempts')
+
+    def __init__(self, now: float, due_at: float):
+        self.first_at = now
+        self.due_at = due_at
+        self.attempts = 0
+
+
+def is_not_modified(error: Exception) -> bool:
+    return 'message is not modified' in str(error)
+
+
+class ChannelPostUpdater:
+    """Kalit bo'yicha kechiktirilgan, birlashtiriladigan va qayta urinadigan yangilash navbati.
+
+    `apply(key)` True qaytarsa yoki "message is not modified" bo'lsa muvaffaqiyat,
+    False - qayta urinish kerak emas, istisno - backoff bilan qayta urinish.
+    """
+
+    def __init__(self, apply: Callable[[Hashable], Any],
+                 debounce: float = CHANNEL_UPDATE_DEBOUNCE,
+                 max_delay: float = CHANNEL_UPDATE_MAX_DELAY,
+                 max_attempts: int = CHANNEL_UPDATE_MAX_ATTEMPTS,
+                 backoff: float = CHANNEL_UPDATE_BACKOFF,
+                 max_backoff: float = CHANNEL_UPDATE_MAX_BACKOFF):
+        self._apply = apply
+        self.debounce = debounce
+        self.max_delay = max(debounce, max_delay)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._cond = threading.Condition()
+        self._pending: Dict[Hashable, _Pending] = {}
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = 0
+        self._running: Optional[Hashable] = None
+        # Tahrir paytida kelgan so'rovlar: tugagach yana rejalashtiriladi
+        self._dirty = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'requested': 0, 'coalesced': 0, 'applied': 0, 'retried': 0, 'dropped': 0}
+
+    def schedule(self, key: Hashable):
+        now = time.monotonic()
+        with self._cond:
+            self._stats['requested'] += 1
+            if key == self._running:
+                self._dirty.add(key)
+                return
+            item = self._pending.get(key)
+            if item is None:
+                item = _Pending(now, now + self.debounce)
+                self._pending[key] = item
+            else:
+                self._stats['coalesced'] += 1
+                if item.attempts:
+                    # Backoff kutilmoqda - muddat qisqartirilmaydi
+                    return
+                item.due_at = min(now + self.debounce, item.first_at + self.max_delay)
+            self._push(key, item.due_at)
+            self._ensure_thread()
+
+    def _push(self, key: Hashable, due_at: float):
+        self._seq += 1
+        heapq.heappush(self._heap, (due_at, self._seq, key))
+        self._cond.notify_all()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="channel-updater", daemon=True)
+            self._thread.start()
+
+    def _next_due(self) -> Optional[Hashable]:
+        while True:
+            while not self._heap:
+                self._cond.wait()
+            due_at, _, key = self._heap[0]
+            item = self._pending.get(key)
+            if item is None or item.due_at != due_at:
+                # Eskirgan heap yozuvi (muddat o'zgargan)
+                heapq.heappop(self._heap)
+                continue
+            wait = due_at - time.monotonic()
+            if wait > 0:
+                self._cond.wait(wait)
+                continue
+            heapq.heappop(self._heap)
+            return key
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                key = self._next_due()
+                item = self._pending[key]
+                self._running = key
+
+            retry_after = None
+            try:
+                with send_priority(PRIORITY_CHANNEL):
+                    ok = self._apply(key) is not False
+                failed = False
+            except ApiTelegramException as e:
+                ok = is_not_modified(e)
+                failed = not ok
+                if e.error_code == 429:
+                    retry_after = (e.result_json or {}).get('parameters', {}).get('retry_after')
+                if failed:
+                    logger.warning(f"Kanal postini yangilash ({key}) xatosi: {e}")
+            except Exception as e:
+                ok = False
+                failed = True
+                logger.warning(f"Kanal postini yangilash ({key}) xatosi: {e}")
+
+            with self._cond:
+                self._running = None
+                dirty = key in self._dirty
+                self._dirty.discard(key)
+                now = time.monotonic()
+                if failed and item.attempts + 1 < self.max_attempts:
+                    item.attempts += 1
+                    self._stats['retried'] += 1
+                    delay = min(self.backoff * 2 ** (item.attempts - 1), self.max_backoff)
+                    if retry_after:
+                        delay = max(delay, float(retry_after))
+                    item.due_at = now + delay
+                    self._push(key, item.due_at)
+                    continue
+
+                del self._pending[key]
+                if ok:
+                    self._stats['applied'] += 1
+                elif failed:
+                    self._stats['dropped'] += 1
+                    logger.error(f"Kanal postini yangilash ({key}) {item.attempts + 1} urinishdan keyin bekor qilindi")
+                if dirty:
+                    fresh = _Pending(now, now + self.debounce)
+                    self._pending[key] = fresh
+                    self._push(key, fresh.due_at)
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Navbatdagi hamma yangilashlarni darhol bajarishga majburlash va kutish (test/shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            for key, item in self._pending.items():
+                item.due_at = time.monotonic()
+                self._push(key, item.due_at)
+            while self._pending or self._running is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(min(0.05, remaining) if remaining is not None else 0.05)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._stats, pending=len(self._pending))
@@ -0,0 +1,29 @@
+# config.py - .env va muhit o'zgaruvchilarini o'qish uchun umumiy yordamchilar
+#
+# Har bir modul o'z nusxasini yozmasin: sozlamalar shu yerdan import qilinadi.
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def env_str(*names: str, default: str = "") -> str:
+    """Birinchi bo'sh bo'lmagan qiymat (qo'shtirnoqlar olib tashlanadi)"""
+    for name in names:
+        value = os.getenv(name)
+        if value is None:
+            continue
+        cleaned = str(value).strip().strip("'").strip('"')
+        if cleaned:
+            return cleaned
+    return default
+
+
+def env_int(name: str, default: int) -> int:
+    """Butun son; berilmagan yoki noto'g'ri bo'lsa default"""
+    raw = env_str(name, default=str(default))
+    try:
+        return int(raw)
+    except Exception:
+        return default
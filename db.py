@@ -3,18 +3,21 @@ import calendar
 import os
 import sqlite3
 import sys
-from collections import defaultdict
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
-
-from pymongo import ASCENDING, DESCENDING, MongoClient, ReturnDocument
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from pymongo import ASCENDING, DESCENDING, MongoClient, ReturnDocument, UpdateOne
 from pymongo.collection import Collection
 from pymongo.database import Database
 from pymongo.errors import DuplicateKeyError
-from dotenv import load_dotenv
 from werkzeug.security import generate_password_hash
 
-load_dotenv()
+from config import env_int, env_str
+from metrics import MongoCallCounter
 
 
 def _ensure_utf8_stdio():
@@ -29,37 +32,35 @@ def _ensure_utf8_stdio():
 
 _ensure_utf8_stdio()
 
-def _env_str(*names: str, default: str = "") -> str:
-    for name in names:
-        value = os.getenv(name)
-        if value is None:
-            continue
-        cleaned = str(value).strip().strip("'").strip('"')
-        if cleaned:
-            return cleaned
-    return default
-
-
-def _env_int(name: str, default: int) -> int:
-    raw = _env_str(name, default=str(default))
-    try:
-        return int(raw)
-    except Exception:
-        return default
-
-
-MONGODB_URI = _env_str("MONGODB_URI", "MONGO_URL", "DATABASE_URL", default="mongodb://127.0.0.1:27017")
-MONGODB_DB_NAME = _env_str("MONGODB_DB_NAME", default="garajhub")
-MONGODB_TIMEOUT_MS = _env_int("MONGODB_TIMEOUT_MS", 5000)
-MONGO_AUTO_MIGRATE = _env_str("MONGO_AUTO_MIGRATE", default="1") == "1"
-SQLITE_MIGRATION_PATH = _env_str("SQLITE_MIGRATION_PATH", default="garajhub.db")
+MONGODB_URI = env_str("MONGODB_URI", "MONGO_URL", "DATABASE_URL", default="mongodb://127.0.0.1:27017")
+MONGODB_DB_NAME = env_str("MONGODB_DB_NAME", default="garajhub")
+MONGODB_TIMEOUT_MS = env_int("MONGODB_TIMEOUT_MS", 5000)
+MONGO_AUTO_MIGRATE = env_str("MONGO_AUTO_MIGRATE", default="1") == "1"
+SQLITE_MIGRATION_PATH = env_str("SQLITE_MIGRATION_PATH", default="garajhub.db")
+SCHEMA_AUTO_MIGRATE = env_str("SCHEMA_AUTO_MIGRATE", default="1") == "1"
+EXPORT_BATCH_SIZE = env_int("EXPORT_BATCH_SIZE", 500)
+CATEGORY_CACHE_TTL = env_int("CATEGORY_CACHE_TTL", 60)
+LIST_TOTAL_CACHE_TTL = env_int("LIST_TOTAL_CACHE_TTL", 30)
+LIST_TOTAL_CACHE_MAX_ENTRIES = env_int("LIST_TOTAL_CACHE_MAX_ENTRIES", 10000)
+# Telegram javobsiz update larni 24 soat saqlaydi - jurnal undan uzoqroq turadi
+UPDATE_JOURNAL_TTL = env_int("UPDATE_JOURNAL_TTL", 2 * 24 * 60 * 60)
 
 USERS_COLLECTION = "users"
 STARTUPS_COLLECTION = "startups"
 STARTUP_MEMBERS_COLLECTION = "startup_members"
+DAILY_USER_STATS_COLLECTION = "daily_user_stats"
+META_COLLECTION = "meta"
+CONVERSATION_STATE_COLLECTION = "conversation_state"
+BROADCAST_JOBS_COLLECTION = "broadcast_jobs"
+BROADCAST_RECIPIENTS_COLLECTION = "broadcast_recipients"
+UPDATE_JOURNAL_COLLECTION = "update_journal"
+
+# Indeks yoki ma'lumot migratsiyasi qo'shilganda oshiriladi
+SCHEMA_VERSION = 5
 
 _mongo_client: Optional[MongoClient] = None
 _db: Optional[Database] = None
+_db_initialized = False
 
 _COUNTER_CONFIG: Dict[str, Tuple[str, str]] = {
     "startups": (STARTUPS_COLLECTION, "id"),
@@ -69,6 +70,7 @@ _COUNTER_CONFIG: Dict[str, Tuple[str, str]] = {
     "referrals": ("referrals", "id"),
     "referral_rewards": ("referral_rewards", "id"),
     "admins": ("admins", "id"),
+    "broadcast_jobs": (BROADCAST_JOBS_COLLECTION, "id"),
 }
 
 _ALLOWED_USER_FIELDS = {
@@ -85,6 +87,24 @@ _ALLOWED_USER_FIELDS = {
 }
 
 
+# Yozuvlardan keyin chaqiriladigan hooklar: event -> callbacklar
+_listeners: Dict[str, List[Any]] = defaultdict(list)
+
+
+def subscribe(event: str, callback):
+    """"startup_status" (startup_id, oldingi, yangi) va "user_profile" (user_id, field) eventlari"""
+    _listeners[event].append(callback)
+
+
+def _emit(event: str, *args):
+    for callback in list(_listeners.get(event, ())):
+        try:
+            callback(*args)
+        except Exception as e:
+            # Hook xatosi yozuvni bekor qilmaydi
+            print(f"db hook error ({event}): {e}")
+
+
 def _now_iso() -> str:
     return datetime.now().isoformat()
 
@@ -143,6 +163,8 @@ def _normalize_startup(doc: Optional[Dict]) -> Optional[Dict]:
         startup_id = 0
     data["id"] = startup_id
     data["_id"] = str(startup_id)
+    data["version"] = _to_int(data.get("version"), 0) or 0
+    _remember_startup_version(startup_id, data["version"])
     return data
 
 
@@ -152,6 +174,8 @@ def _get_client() -> MongoClient:
         _mongo_client = MongoClient(
             MONGODB_URI,
             serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS,
+            # Buyruqlar soni handler metrikalariga yoziladi
+            event_listeners=[MongoCallCounter()],
         )
         _mongo_client.admin.command("ping")
     return _mongo_client
@@ -211,9 +235,11 @@ def _ensure_indexes():
     db[USERS_COLLECTION].create_index([("joined_at", DESCENDING)])
 
     db[STARTUPS_COLLECTION].create_index([("id", ASCENDING)], unique=True)
-    db[STARTUPS_COLLECTION].create_index([("owner_id", ASCENDING)])
+    db[STARTUPS_COLLECTION].create_index([("owner_id", ASCENDING), ("created_at", DESCENDING)])
     db[STARTUPS_COLLECTION].create_index([("status", ASCENDING), ("created_at", DESCENDING)])
-    db[STARTUPS_COLLECTION].create_index([("category", ASCENDING), ("status", ASCENDING)])
+    db[STARTUPS_COLLECTION].create_index(
+        [("category", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]
+    )
     db[STARTUPS_COLLECTION].create_index(
         [("channel_post_id", ASCENDING)],
         unique=True,
@@ -243,6 +269,20 @@ def _ensure_indexes():
     db["admins"].create_index([("id", ASCENDING)], unique=True)
     db["admins"].create_index([("username", ASCENDING)], unique=True)
 
+    db[CONVERSATION_STATE_COLLECTION].create_index([("user_id", ASCENDING)])
+    db[CONVERSATION_STATE_COLLECTION].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+    db[UPDATE_JOURNAL_COLLECTION].create_index([("status", ASCENDING), ("_id", ASCENDING)])
+    db[UPDATE_JOURNAL_COLLECTION].create_index([("created_at", ASCENDING)], expireAfterSeconds=UPDATE_JOURNAL_TTL)
+
+    db[BROADCAST_JOBS_COLLECTION].create_index([("id", ASCENDING)], unique=True)
+    db[BROADCAST_JOBS_COLLECTION].create_index([("status", ASCENDING), ("created_at", DESCENDING)])
+    db[BROADCAST_RECIPIENTS_COLLECTION].create_index(
+        [("job_id", ASCENDING), ("user_id", ASCENDING)],
+        unique=True,
+    )
+    db[BROADCAST_RECIPIENTS_COLLECTION].create_index([("job_id", ASCENDING), ("status", ASCENDING)])
+
 
 def _table_exists(cursor: sqlite3.Cursor, table_name: str) -> bool:
     cursor.execute(
@@ -568,13 +608,61 @@ def _ensure_defaults():
             pass
 
 
-def init_db():
-    """MongoDB ni tayyorlash va kerak bo'lsa SQLite dan migratsiya qilish."""
+def _get_schema_version() -> int:
+    row = _get_db()[META_COLLECTION].find_one({"_id": "schema"}, {"version": 1})
+    return _to_int((row or {}).get("version"), 0) or 0
+
+
+def _set_schema_version(version: int):
+    _get_db()[META_COLLECTION].update_one(
+        {"_id": "schema"},
+        {"$set": {"version": int(version), "migrated_at": _now_iso()}},
+        upsert=True,
+    )
+
+
+# (versiya, funksiya): saqlangan versiya undan kichik bo'lsa bir marta ishlaydi
+_VERSIONED_MIGRATIONS = [
+    (1, lambda: backfill_daily_user_stats()),
+    (4, lambda: reconcile_member_counts()),
+]
+
+
+def migrate() -> int:
+    """Indekslar, default yozuvlar, counterlar va versiyali migratsiyalarni bajarish.
+
+    Oldingi sxema versiyasini qaytaradi.
+    """
+    previous = _get_schema_version()
     _ensure_indexes()
     _migrate_sqlite_to_mongodb()
     _ensure_defaults()
     _sync_counters()
-    print("Database initialized successfully (MongoDB).")
+    for version, step in _VERSIONED_MIGRATIONS:
+        if previous < version:
+            step()
+    _set_schema_version(max(previous, SCHEMA_VERSION))
+    return previous
+
+
+def init_db():
+    """MongoDB ni tayyorlash. Sxema versiyasi mos bo'lsa bootstrap o'tkazib yuboriladi."""
+    global _db_initialized
+    if _db_initialized:
+        return
+
+    version = _get_schema_version()
+    if version >= SCHEMA_VERSION:
+        print(f"Database ready (MongoDB, schema v{version}).")
+    elif SCHEMA_AUTO_MIGRATE:
+        migrate()
+        print("Database initialized successfully (MongoDB).")
+    else:
+        print(
+            f"Database schema v{version} is older than v{SCHEMA_VERSION}. "
+            "Run: python db.py migrate"
+        )
+    _db_initialized = True
 
 
 # ======================== PRO SETTINGS FUNCTIONS ========================
@@ -781,7 +869,8 @@ def get_user(user_id: int) -> Optional[Dict]:
 
 
 def save_user(user_id: int, username: str, first_name: str):
-    _get_db()[USERS_COLLECTION].update_one(
+    joined_at = _now_iso()
+    result = _get_db()[USERS_COLLECTION].update_one(
         {"user_id": int(user_id)},
         {
             "$setOnInsert": {
@@ -796,11 +885,13 @@ def save_user(user_id: int, username: str, first_name: str):
                 "specialization": "",
                 "experience": "",
                 "bio": "",
-                "joined_at": _now_iso(),
+                "joined_at": joined_at,
             }
         },
         upsert=True,
     )
+    if result.upserted_id is not None:
+        _record_user_signup(joined_at)
 
 
 def update_user_field(user_id: int, field: str, value):
@@ -810,6 +901,7 @@ def update_user_field(user_id: int, field: str, value):
         {"user_id": int(user_id)},
         {"$set": {field: value}},
     )
+    _emit("user_profile", int(user_id), field)
 
 
 def update_user_specialization(user_id: int, specialization: str):
@@ -831,6 +923,39 @@ def get_recent_users(limit: int = 10) -> List[Dict]:
 
 
 # ======================== STARTUP FUNCTIONS ========================
+# Har bir startap (yoki uning a'zoligi) yozuvida `version` oshiriladi. Jarayon
+# bilgan eng oxirgi versiya karta keshini DB ga murojaat qilmasdan tekshirishga imkon beradi.
+_startup_versions: Dict[int, int] = {}
+_startup_versions_lock = threading.Lock()
+
+
+def _remember_startup_version(startup_id: int, version: int):
+    with _startup_versions_lock:
+        if version > _startup_versions.get(startup_id, -1):
+            _startup_versions[startup_id] = version
+
+
+def get_known_startup_version(startup_id: str) -> Optional[int]:
+    sid = _to_int(startup_id, None)
+    if sid is None:
+        return None
+    with _startup_versions_lock:
+        return _startup_versions.get(sid)
+
+
+def _update_startup(sid: int, update: Dict[str, Any]) -> Optional[Dict]:
+    """Startapni yangilab versiyani oshirish. Oldingi holatni (status, version) qaytaradi."""
+    update = dict(update)
+    update["$inc"] = dict(update.get("$inc") or {}, version=1)
+    previous = _get_db()[STARTUPS_COLLECTION].find_one_and_update(
+        {"id": sid},
+        update,
+        projection={"status": 1, "version": 1, "category": 1, "owner_id": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous:
+        _remember_startup_version(sid, (_to_int(previous.get("version"), 0) or 0) + 1)
+    return previous
 
 
 def create_startup(
@@ -862,8 +987,10 @@ def create_startup(
             "results": None,
             "channel_post_id": None,
             "current_members": 0,
+            "version": 0,
         }
     )
+    invalidate_list_total("owner", int(owner_id))
     return str(startup_id)
 
 
@@ -880,6 +1007,83 @@ def get_startups_by_owner(owner_id: int) -> List[Dict]:
     return [_normalize_startup(row) for row in rows if row]
 
 
+# Ro'yxat ekranlari uchun yetarli maydonlar (version - karta keshi uchun)
+STARTUP_LIST_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "owner_id": 1, "status": 1,
+    "max_members": 1, "current_members": 1, "version": 1,
+}
+_LIST_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+# (tur, kalit) -> (muddat, jami). Yozuvlarda kalit bo'yicha o'chiriladi
+_list_totals: "OrderedDict[Tuple[str, Any], Tuple[float, int]]" = OrderedDict()
+_list_totals_lock = threading.Lock()
+_list_totals_generation = 0
+
+
+def invalidate_list_total(kind: str, key: Any):
+    global _list_totals_generation
+    with _list_totals_lock:
+        _list_totals.pop((kind, key), None)
+        _list_totals_generation += 1
+
+
+def _cached_total(kind: str, key: Any, query: Dict[str, Any]) -> int:
+    cache_key = (kind, key)
+    now = time.monotonic()
+    with _list_totals_lock:
+        item = _list_totals.get(cache_key)
+        if item is not None and now < item[0]:
+            _list_totals.move_to_end(cache_key)
+            return item[1]
+        generation = _list_totals_generation
+
+    total = _get_db()[STARTUPS_COLLECTION].count_documents(query)
+    if LIST_TOTAL_CACHE_TTL > 0:
+        with _list_totals_lock:
+            if _list_totals_generation == generation:
+                _list_totals[cache_key] = (now + LIST_TOTAL_CACHE_TTL, total)
+                _list_totals.move_to_end(cache_key)
+                while len(_list_totals) > LIST_TOTAL_CACHE_MAX_ENTRIES:
+                    _list_totals.popitem(last=False)
+    return total
+
+
+def _list_page(query: Dict[str, Any], total: int, page: int, per_page: int) -> List[Dict]:
+    per_page = max(1, int(per_page))
+    total_pages = max(1, (total + per_page - 1) // per_page)
+    page = min(max(1, int(page)), total_pages)
+    rows = (
+        _get_db()[STARTUPS_COLLECTION]
+        .find(query, STARTUP_LIST_PROJECTION)
+        .sort(_LIST_SORT)
+        .skip((page - 1) * per_page)
+        .limit(per_page)
+    )
+    return [_normalize_startup(row) for row in rows if row]
+
+
+def get_startups_by_owner_page(owner_id: int, page: int = 1, per_page: int = 5) -> Tuple[List[Dict], int]:
+    """Egasining startaplari sahifasi (qisqa maydonlar) va jami soni. Sahifa chegaraga keltiriladi."""
+    owner_id = int(owner_id)
+    query = {"owner_id": owner_id}
+    total = _cached_total("owner", owner_id, query)
+    return _list_page(query, total, page, per_page), total
+
+
+def get_startup_by_owner_index(owner_id: int, index: int) -> Optional[Dict]:
+    """Egasining ro'yxatidagi index-o'rindagi startap (ro'yxat tartibida)"""
+    if int(index) < 0:
+        return None
+    rows = list(
+        _get_db()[STARTUPS_COLLECTION]
+        .find({"owner_id": int(owner_id)})
+        .sort(_LIST_SORT)
+        .skip(int(index))
+        .limit(1)
+    )
+    return _normalize_startup(rows[0]) if rows else None
+
+
 def get_pending_startups(page: int = 1, per_page: int = 5) -> Tuple[List[Dict], int]:
     db = _get_db()[STARTUPS_COLLECTION]
     offset = (int(page) - 1) * int(per_page)
@@ -920,7 +1124,13 @@ def update_startup_status(startup_id: str, status: str):
     updates: Dict[str, Any] = {"status": status}
     if status == "active":
         updates["started_at"] = _now_iso()
-    _get_db()[STARTUPS_COLLECTION].update_one({"id": sid}, {"$set": updates})
+    previous = _update_startup(sid, {"$set": updates})
+    # Faol startaplar to'plami o'zgarsa kategoriyalar keshi eskiradi
+    if previous and previous.get("status") != status and "active" in (previous.get("status"), status):
+        invalidate_category_cache()
+        invalidate_list_total("category", previous.get("category"))
+    if previous and previous.get("status") != status:
+        _emit("startup_status", str(sid), previous.get("status"), status)
 
 
 def update_startup_results(startup_id: str, results: str, completed_at: datetime):
@@ -930,14 +1140,14 @@ def update_startup_results(startup_id: str, results: str, completed_at: datetime
     updates: Dict[str, Any] = {"results": results}
     if completed_at:
         updates["completed_at"] = completed_at.isoformat()
-    _get_db()[STARTUPS_COLLECTION].update_one({"id": sid}, {"$set": updates})
+    _update_startup(sid, {"$set": updates})
 
 
 def update_startup_post_id(startup_id: str, post_id: int):
     sid = _to_int(startup_id, None)
     if sid is None:
         return
-    _get_db()[STARTUPS_COLLECTION].update_one({"id": sid}, {"$set": {"channel_post_id": int(post_id)}})
+    _update_startup(sid, {"$set": {"channel_post_id": int(post_id)}})
 
 
 def get_startup_by_post_id(post_id: int) -> Optional[Dict]:
@@ -949,7 +1159,7 @@ def update_startup_current_members(startup_id: str, count: int):
     sid = _to_int(startup_id, None)
     if sid is None:
         return
-    _get_db()[STARTUPS_COLLECTION].update_one({"id": sid}, {"$set": {"current_members": int(count)}})
+    _update_startup(sid, {"$set": {"current_members": int(count)}})
 
 
 def get_startups_by_category(category: str) -> List[Dict]:
@@ -959,9 +1169,40 @@ def get_startups_by_category(category: str) -> List[Dict]:
     return [_normalize_startup(row) for row in rows if row]
 
 
+def get_startups_by_category_page(category: str, page: int = 1, per_page: int = 5) -> Tuple[List[Dict], int]:
+    """Kategoriyadagi faol startaplar sahifasi (qisqa maydonlar) va jami soni"""
+    query = {"category": category, "status": "active"}
+    total = _cached_total("category", category, query)
+    return _list_page(query, total, page, per_page), total
+
+
+_category_cache: Dict[str, Any] = {"value": None, "expires_at": 0.0, "generation": 0}
+_category_cache_lock = threading.Lock()
+
+
+def invalidate_category_cache():
+    with _category_cache_lock:
+        _category_cache["value"] = None
+        _category_cache["expires_at"] = 0.0
+        _category_cache["generation"] += 1
+
+
 def get_all_categories() -> List[str]:
+    now = time.monotonic()
+    with _category_cache_lock:
+        cached = _category_cache["value"]
+        if cached is not None and now < _category_cache["expires_at"]:
+            return list(cached)
+        generation = _category_cache["generation"]
+
     categories = _get_db()[STARTUPS_COLLECTION].distinct("category", {"status": "active"})
-    return [category for category in categories if category]
+    result = tuple(category for category in categories if category)
+    with _category_cache_lock:
+        # O'qish vaqtida invalidatsiya bo'lgan bo'lsa eski natijani saqlamaymiz
+        if _category_cache["generation"] == generation:
+            _category_cache["value"] = result
+            _category_cache["expires_at"] = now + CATEGORY_CACHE_TTL
+    return list(result)
 
 
 def get_startups_by_ids(startup_ids: List[int]) -> List[Dict]:
@@ -1007,6 +1248,7 @@ def add_startup_member(startup_id: str, user_id: int):
             "joined_at": _now_iso(),
         }
     )
+    _update_startup(sid, {})
 
 
 def get_join_request_id(startup_id: str, user_id: int) -> Optional[str]:
@@ -1034,10 +1276,22 @@ def get_join_request(request_id: str) -> Optional[Dict]:
 
 
 def update_join_request(request_id: str, status: str):
+    """So'rov holatini o'zgartirish. current_members faqat haqiqiy o'tishda o'zgaradi,
+    shuning uchun takroriy chaqiruv sonni buzmaydi."""
     rid = _to_int(request_id, None)
     if rid is None:
         return
-    _get_db()[STARTUP_MEMBERS_COLLECTION].update_one({"id": rid}, {"$set": {"status": status}})
+    row = _get_db()[STARTUP_MEMBERS_COLLECTION].find_one_and_update(
+        {"id": rid, "status": {"$ne": status}},
+        {"$set": {"status": status}},
+        projection={"startup_id": 1, "status": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    sid = _to_int((row or {}).get("startup_id"), None)
+    if sid is None:
+        return
+    delta = (status == "accepted") - (row.get("status") == "accepted")
+    _update_startup(sid, {"$inc": {"current_members": delta}} if delta else {})
 
 
 def get_startup_members(startup_id: str, page: int = 1, per_page: int = 5) -> Tuple[List[Dict], int]:
@@ -1101,6 +1355,32 @@ def update_startup_member_count(startup_id: str):
     update_startup_current_members(startup_id, count)
 
 
+def reconcile_member_counts() -> int:
+    """current_members ni startup_members dan bitta $group bilan qayta hisoblash.
+
+    Faqat farq qilgan startaplar yoziladi. Tuzatilganlar sonini qaytaradi.
+    """
+    db = _get_db()
+    counts = {
+        row["_id"]: int(row["count"])
+        for row in db[STARTUP_MEMBERS_COLLECTION].aggregate([
+            {"$match": {"status": "accepted"}},
+            {"$group": {"_id": "$startup_id", "count": {"$sum": 1}}},
+        ])
+        if row.get("_id") is not None
+    }
+    fixed = 0
+    for row in db[STARTUPS_COLLECTION].find({}, {"id": 1, "current_members": 1}):
+        sid = _to_int(row.get("id"), None)
+        if sid is None:
+            continue
+        count = counts.get(sid, 0)
+        if row.get("current_members") != count:
+            _update_startup(sid, {"$set": {"current_members": count}})
+            fixed += 1
+    return fixed
+
+
 def get_user_joined_startups(user_id: int) -> List[int]:
     rows = (
         _get_db()[STARTUP_MEMBERS_COLLECTION]
@@ -1115,6 +1395,58 @@ def get_user_joined_startups(user_id: int) -> List[int]:
     return result
 
 
+# ======================== EXPORT (STREAMING) FUNCTIONS ========================
+
+
+def iter_users(
+    batch_size: int = EXPORT_BATCH_SIZE,
+    projection: Optional[Dict[str, Any]] = None,
+    query: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict]:
+    """Foydalanuvchilarni server-side cursor orqali bittadan qaytaradi (xotira doimiy)."""
+    cursor = (
+        _get_db()[USERS_COLLECTION]
+        .find(query or {}, projection)
+        .sort("_id", ASCENDING)
+        .batch_size(max(1, int(batch_size)))
+    )
+    try:
+        for row in cursor:
+            clean = _without_mongo_id(row)
+            if clean:
+                yield clean
+    finally:
+        cursor.close()
+
+
+def iter_startups(
+    batch_size: int = EXPORT_BATCH_SIZE,
+    projection: Optional[Dict[str, Any]] = None,
+    query: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict]:
+    """Startaplarni server-side cursor orqali bittadan qaytaradi (xotira doimiy)."""
+    cursor = (
+        _get_db()[STARTUPS_COLLECTION]
+        .find(query or {}, projection)
+        .sort("_id", ASCENDING)
+        .batch_size(max(1, int(batch_size)))
+    )
+    try:
+        for row in cursor:
+            norm = _normalize_startup(row)
+            if norm:
+                yield norm
+    finally:
+        cursor.close()
+
+
+def get_startup_counts_by_owner() -> Dict[int, int]:
+    rows = _get_db()[STARTUPS_COLLECTION].aggregate(
+        [{"$group": {"_id": "$owner_id", "count": {"$sum": 1}}}]
+    )
+    return {_to_int(row.get("_id"), 0) or 0: int(row.get("count", 0)) for row in rows}
+
+
 # ======================== STATISTICS FUNCTIONS ========================
 
 
@@ -1130,6 +1462,81 @@ def get_statistics() -> Dict:
     }
 
 
+# ======================== USER GROWTH ROLLUP ========================
+
+
+def _app_zone() -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(get_app_settings().get("timezone") or "Asia/Tashkent")
+    except Exception:
+        return None
+
+
+def _day_bucket(value: Any, zone: Optional[ZoneInfo]) -> Optional[str]:
+    dt = _parse_datetime(value)
+    if dt is None:
+        return None
+    if zone is not None:
+        # Naive qiymatlar server vaqti deb hisoblanadi (joined_at shunday yoziladi)
+        dt = dt.astimezone(zone)
+    return dt.date().isoformat()
+
+
+def _record_user_signup(joined_at: str):
+    day = _day_bucket(joined_at, _app_zone())
+    if not day:
+        return
+    _get_db()[DAILY_USER_STATS_COLLECTION].update_one(
+        {"_id": day},
+        {"$inc": {"count": 1}},
+        upsert=True,
+    )
+
+
+def get_app_now() -> datetime:
+    """Sozlamalardagi timezone bo'yicha joriy vaqt."""
+    zone = _app_zone()
+    return datetime.now(zone) if zone is not None else datetime.now()
+
+
+def get_daily_user_counts(start_day: str) -> Dict[str, int]:
+    """start_day (YYYY-MM-DD) dan boshlab kunlik yangi foydalanuvchilar soni."""
+    rows = (
+        _get_db()[DAILY_USER_STATS_COLLECTION]
+        .find({"_id": {"$gte": str(start_day)}})
+        .sort("_id", ASCENDING)
+    )
+    return {row["_id"]: _to_int(row.get("count"), 0) or 0 for row in rows}
+
+
+def get_monthly_user_counts(start_day: str) -> Dict[str, int]:
+    """start_day dan boshlab oylik (YYYY-MM) yangi foydalanuvchilar soni."""
+    result: Dict[str, int] = defaultdict(int)
+    for day, count in get_daily_user_counts(start_day).items():
+        result[day[:7]] += count
+    return dict(result)
+
+
+def backfill_daily_user_stats() -> int:
+    """daily_user_stats ni users jadvalidan qayta hisoblash. Kunlar sonini qaytaradi."""
+    db = _get_db()
+    zone = _app_zone()
+    counts: Dict[str, int] = defaultdict(int)
+    for row in db[USERS_COLLECTION].find({}, {"joined_at": 1, "_id": 0}):
+        day = _day_bucket(row.get("joined_at"), zone)
+        if day:
+            counts[day] += 1
+
+    stats_col = db[DAILY_USER_STATS_COLLECTION]
+    if counts:
+        stats_col.bulk_write(
+            [UpdateOne({"_id": day}, {"$set": {"count": count}}, upsert=True) for day, count in counts.items()],
+            ordered=False,
+        )
+    stats_col.delete_many({"_id": {"$nin": list(counts.keys())}})
+    return len(counts)
+
+
 # ======================== SETTINGS FUNCTIONS ========================
 
 
@@ -1195,3 +1602,331 @@ def delete_admin(admin_id: int) -> bool:
 def update_admin_last_login(admin_id: int):
     _get_db()["admins"].update_one({"id": int(admin_id)}, {"$set": {"last_login": _now_iso()}})
 
+
+# ======================== CONVERSATION STATE FUNCTIONS ========================
+def _state_key(namespace: str, user_id: int) -> str:
+    return f"{namespace}:{int(user_id)}"
+
+
+def _state_expiry(ttl_seconds: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+
+
+def get_conversation_state(namespace: str, user_id: int) -> Optional[Any]:
+    # TTL monitor kechikishi mumkin, shuning uchun muddat so'rovda ham tekshiriladi
+    row = _get_db()[CONVERSATION_STATE_COLLECTION].find_one(
+        {"_id": _state_key(namespace, user_id), "expires_at": {"$gt": datetime.now(timezone.utc)}},
+        {"value": 1},
+    )
+    return row.get("value") if row else None
+
+
+def set_conversation_state(namespace: str, user_id: int, value: Any, ttl_seconds: int):
+    _get_db()[CONVERSATION_STATE_COLLECTION].update_one(
+        {"_id": _state_key(namespace, user_id)},
+        {
+            "$set": {
+                "namespace": namespace,
+                "user_id": int(user_id),
+                "value": value,
+                "expires_at": _state_expiry(ttl_seconds),
+            }
+        },
+        upsert=True,
+    )
+
+
+def update_conversation_state(namespace: str, user_id: int, fields: Dict[str, Any], ttl_seconds: int) -> Dict:
+    key = _state_key(namespace, user_id)
+    now = datetime.now(timezone.utc)
+    col = _get_db()[CONVERSATION_STATE_COLLECTION]
+    # Muddati o'tgan yozuv ustiga maydon qo'shilmasligi uchun avval tozalanadi
+    col.delete_one({"_id": key, "expires_at": {"$lte": now}})
+    updates: Dict[str, Any] = {f"value.{name}": item for name, item in fields.items()}
+    updates.update({"namespace": namespace, "user_id": int(user_id), "expires_at": _state_expiry(ttl_seconds)})
+    row = col.find_one_and_update(
+        {"_id": key},
+        {"$set": updates},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return dict(row.get("value") or {})
+
+
+def delete_conversation_state(namespace: str, user_id: int):
+    _get_db()[CONVERSATION_STATE_COLLECTION].delete_one({"_id": _state_key(namespace, user_id)})
+
+
+def clear_conversation_state(user_id: int):
+    _get_db()[CONVERSATION_STATE_COLLECTION].delete_many({"user_id": int(user_id)})
+
+
+# ======================== UPDATE JOURNAL FUNCTIONS ========================
+def journal_update(update_id: int, payload: str) -> bool:
+    """Update ni navbatga yozish. Avval yozilgan bo'lsa False"""
+    try:
+        _get_db()[UPDATE_JOURNAL_COLLECTION].insert_one({
+            "_id": int(update_id),
+            "status": "queued",
+            "payload": payload,
+            "created_at": datetime.now(timezone.utc),
+        })
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def start_journaled_update(update_id: int) -> bool:
+    """Update ni "started" ga o'tkazish. Avval boshlangan bo'lsa False.
+
+    Jurnalda yo'q update (yozishda xato bo'lgan) ham shu yerda qayd etiladi.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        _get_db()[UPDATE_JOURNAL_COLLECTION].update_one(
+            {"_id": int(update_id), "status": {"$ne": "started"}},
+            {
+                "$set": {"status": "started", "started_at": now},
+                "$unset": {"payload": ""},
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def forget_journaled_update(update_id: int):
+    _get_db()[UPDATE_JOURNAL_COLLECTION].delete_one({"_id": int(update_id), "status": "queued"})
+
+
+def get_queued_updates(limit: int) -> List[Tuple[int, str]]:
+    cursor = (
+        _get_db()[UPDATE_JOURNAL_COLLECTION]
+        .find({"status": "queued"}, {"payload": 1})
+        .sort("_id", ASCENDING)
+        .limit(int(limit))
+    )
+    return [(int(row["_id"]), row["payload"]) for row in cursor]
+
+
+def get_update_offset() -> int:
+    row = _get_db()[META_COLLECTION].find_one({"_id": "update_offset"}, {"value": 1})
+    return _to_int((row or {}).get("value"), 0) or 0
+
+
+def save_update_offset(update_id: int):
+    # $max: kechikkan yozuv offset ni orqaga qaytarmaydi
+    _get_db()[META_COLLECTION].update_one(
+        {"_id": "update_offset"},
+        {"$max": {"value": int(update_id)}, "$set": {"updated_at": _now_iso()}},
+        upsert=True,
+    )
+
+
+# ======================== BROADCAST FUNCTIONS ========================
+BROADCAST_ACTIVE_STATUSES = ("preparing", "queued", "running")
+
+
+def create_broadcast_job(payload: Dict[str, Any], created_by: str, admin_chat_id: Optional[int] = None) -> Dict:
+    job_id = _next_sequence("broadcast_jobs")
+    job = {
+        "_id": job_id,
+        "id": job_id,
+        "payload": payload,
+        "created_by": created_by,
+        "admin_chat_id": _to_int(admin_chat_id, None),
+        "progress_message_id": None,
+        "status": "preparing",
+        "total": 0,
+        "sent": 0,
+        "failed": 0,
+        "created_at": _now_iso(),
+        "started_at": None,
+        "finished_at": None,
+        "owner": None,
+        "heartbeat_at": None,
+    }
+    _get_db()[BROADCAST_JOBS_COLLECTION].insert_one(job)
+    return _without_mongo_id(job)
+
+
+def prepare_broadcast_recipients(job_id: int, batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """Qabul qiluvchilar ro'yxatini yozish. Qayta chaqirilsa mavjud yozuvlar o'zgarmaydi."""
+    db = _get_db()
+    col = db[BROADCAST_RECIPIENTS_COLLECTION]
+    job_id = int(job_id)
+    ops = []
+    for user in iter_users(batch_size=batch_size, projection={"user_id": 1}):
+        user_id = _to_int(user.get("user_id"), None)
+        if user_id is None:
+            continue
+        ops.append(
+            UpdateOne(
+                {"job_id": job_id, "user_id": user_id},
+                {"$setOnInsert": {"status": "pending", "attempts": 0, "error": None}},
+                upsert=True,
+            )
+        )
+        if len(ops) >= batch_size:
+            col.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        col.bulk_write(ops, ordered=False)
+
+    total = col.count_documents({"job_id": job_id})
+    db[BROADCAST_JOBS_COLLECTION].update_one(
+        {"id": job_id, "status": "preparing"},
+        {"$set": {"status": "queued", "total": total}},
+    )
+    return total
+
+
+def claim_broadcast_job(job_id: int, owner: str, lease_seconds: int) -> Optional[Dict]:
+    """Ishni shu jarayonga biriktirish. Boshqa tirik jarayon ushlab turgan bo'lsa None."""
+    now = datetime.now(timezone.utc)
+    row = _get_db()[BROADCAST_JOBS_COLLECTION].find_one_and_update(
+        {
+            "id": int(job_id),
+            "status": {"$in": list(BROADCAST_ACTIVE_STATUSES)},
+            "$or": [
+                {"owner": owner},
+                {"owner": None},
+                {"heartbeat_at": {"$lt": now - timedelta(seconds=lease_seconds)}},
+            ],
+        },
+        {"$set": {"owner": owner, "heartbeat_at": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return _without_mongo_id(row)
+
+
+def start_broadcast_job(job_id: int):
+    _get_db()[BROADCAST_JOBS_COLLECTION].update_one(
+        {"id": int(job_id), "status": "queued"},
+        {"$set": {"status": "running", "started_at": _now_iso()}},
+    )
+
+
+def heartbeat_broadcast_job(job_id: int, owner: str) -> Optional[Dict]:
+    """Lease ni yangilash. Ish bekor qilingan yoki boshqa jarayonga o'tgan bo'lsa None."""
+    row = _get_db()[BROADCAST_JOBS_COLLECTION].find_one_and_update(
+        {"id": int(job_id), "owner": owner, "status": {"$in": list(BROADCAST_ACTIVE_STATUSES)}},
+        {"$set": {"heartbeat_at": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return _without_mongo_id(row)
+
+
+def release_broadcast_in_flight(job_id: int) -> int:
+    """To'xtab qolgan jarayon olgan, lekin natijasi yozilmagan qabul qiluvchilarni qaytarish"""
+    result = _get_db()[BROADCAST_RECIPIENTS_COLLECTION].update_many(
+        {"job_id": int(job_id), "status": "sending"},
+        {"$set": {"status": "pending"}},
+    )
+    return int(result.modified_count)
+
+
+def claim_broadcast_recipients(job_id: int, limit: int) -> List[int]:
+    col = _get_db()[BROADCAST_RECIPIENTS_COLLECTION]
+    job_id = int(job_id)
+    rows = col.find({"job_id": job_id, "status": "pending"}, {"user_id": 1}).limit(max(1, int(limit)))
+    user_ids = [int(row["user_id"]) for row in rows]
+    if user_ids:
+        col.update_many(
+            {"job_id": job_id, "user_id": {"$in": user_ids}, "status": "pending"},
+            {"$set": {"status": "sending"}},
+        )
+    return user_ids
+
+
+def finish_broadcast_recipient(job_id: int, user_id: int, sent: bool, attempts: int, error: Optional[str] = None):
+    db = _get_db()
+    db[BROADCAST_RECIPIENTS_COLLECTION].update_one(
+        {"job_id": int(job_id), "user_id": int(user_id)},
+        {"$set": {"status": "sent" if sent else "failed", "attempts": int(attempts), "error": error}},
+    )
+    db[BROADCAST_JOBS_COLLECTION].update_one(
+        {"id": int(job_id)},
+        {"$inc": {"sent" if sent else "failed": 1}},
+    )
+
+
+def set_broadcast_progress_message(job_id: int, message_id: int):
+    _get_db()[BROADCAST_JOBS_COLLECTION].update_one(
+        {"id": int(job_id)},
+        {"$set": {"progress_message_id": int(message_id)}},
+    )
+
+
+def finish_broadcast_job(job_id: int, status: str = "completed", error: Optional[str] = None):
+    fields = {"status": status, "finished_at": _now_iso(), "owner": None}
+    if error is not None:
+        fields["last_error"] = error
+    _get_db()[BROADCAST_JOBS_COLLECTION].update_one(
+        {"id": int(job_id), "status": {"$in": list(BROADCAST_ACTIVE_STATUSES)}},
+        {"$set": fields},
+    )
+
+
+def release_broadcast_job(job_id: int, owner: str, error: str) -> bool:
+    """Xatodan keyin ishni bo'shatish - keyingi claim lease kutmasdan oladi"""
+    result = _get_db()[BROADCAST_JOBS_COLLECTION].update_one(
+        {"id": int(job_id), "owner": owner, "status": {"$in": list(BROADCAST_ACTIVE_STATUSES)}},
+        {"$set": {"owner": None, "heartbeat_at": None, "last_error": error}, "$inc": {"errors": 1}},
+    )
+    return result.modified_count > 0
+
+
+def cancel_broadcast_job(job_id: int) -> bool:
+    result = _get_db()[BROADCAST_JOBS_COLLECTION].update_one(
+        {"id": int(job_id), "status": {"$in": list(BROADCAST_ACTIVE_STATUSES)}},
+        {"$set": {"status": "cancelled", "finished_at": _now_iso()}},
+    )
+    return result.modified_count > 0
+
+
+def get_broadcast_job(job_id: int) -> Optional[Dict]:
+    row = _get_db()[BROADCAST_JOBS_COLLECTION].find_one({"id": int(job_id)})
+    return _without_mongo_id(row)
+
+
+def get_recent_broadcast_jobs(limit: int = 10) -> List[Dict]:
+    rows = _get_db()[BROADCAST_JOBS_COLLECTION].find().sort("created_at", DESCENDING).limit(int(limit))
+    return [_without_mongo_id(row) for row in rows if row]
+
+
+def get_unfinished_broadcast_jobs() -> List[Dict]:
+    rows = _get_db()[BROADCAST_JOBS_COLLECTION].find(
+        {"status": {"$in": list(BROADCAST_ACTIVE_STATUSES)}}
+    ).sort("created_at", ASCENDING)
+    return [_without_mongo_id(row) for row in rows if row]
+
+
+# ======================== CLI ========================
+
+
+def _main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GarajHub MongoDB buyruqlari")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="Indekslar va sxema migratsiyalarini bajarish")
+    commands.add_parser("backfill-user-stats", help="daily_user_stats ni users dan qayta hisoblash")
+    commands.add_parser("reconcile-members", help="startups.current_members ni a'zolardan qayta hisoblash")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        previous = migrate()
+        print(f"Schema migrated: v{previous} -> v{_get_schema_version()}")
+    elif args.command == "backfill-user-stats":
+        days = backfill_daily_user_stats()
+        print(f"daily_user_stats backfill completed: {days} days")
+    elif args.command == "reconcile-members":
+        fixed = reconcile_member_counts()
+        print(f"current_members reconciled: {fixed} startups fixed")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,235 @@
+# dispatcher.py - Update larni worker pool ga chat bo'yicha tartib bilan tarqatish
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+import telebot
+from telebot import apihelper, types
+
+from config import env_int
+
+logger = logging.getLogger(__name__)
+
+
+BOT_WORKERS = env_int("BOT_WORKERS", 8)
+BOT_MAX_PENDING_UPDATES = env_int("BOT_MAX_PENDING_UPDATES", 1000)
+
+
+class ChatOrderedDispatcher:
+    """Turli chatlar parallel, bitta chat update lari esa kelgan tartibda bajariladi"""
+
+    def __init__(self, handler: Callable[[Any], None], workers: int = BOT_WORKERS,
+                 max_pending: int = BOT_MAX_PENDING_UPDATES, name: str = "bot-worker"):
+        self._handler = handler
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._name = name
+        self._cond = threading.Condition()
+        # Chat kaliti -> navbatdagi update lar; kalit ishlov tugaguncha shu yerda qoladi
+        self._chats: Dict[Hashable, Deque[Any]] = {}
+        self._ready: Deque[Hashable] = deque()
+        self._pending = 0
+        self._busy = 0
+        self._processed = 0
+        self._errors = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+        self._started_at: Optional[float] = None
+        self._threads = []
+        self._stopping = False
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._started_at = time.monotonic()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"{self._name}-{index}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(self, key: Hashable, item: Any, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """Update ni navbatga qo'yish. Navbat to'la bo'lsa block=False da False qaytaradi"""
+        if not self._threads:
+            self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending >= self.max_pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0):
+                    self._rejected += 1
+                    return False
+                self._cond.wait(remaining)
+
+            self._pending += 1
+            queue = self._chats.get(key)
+            if queue is None:
+                self._chats[key] = deque([item])
+                self._ready.append(key)
+                self._cond.notify_all()
+            else:
+                # Chat allaqachon navbatda yoki ishlanmoqda - tartib saqlanadi
+                queue.append(item)
+        return True
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopping:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                item = self._chats[key].popleft()
+                self._busy += 1
+
+            started = time.monotonic()
+            failed = False
+            try:
+                self._handler(item)
+            except Exception as e:
+                failed = True
+                logger.error(f"Update ishlov berishda xatolik: {e}", exc_info=True)
+
+            with self._cond:
+                self._busy -= 1
+                self._pending -= 1
+                self._processed += 1
+                self._busy_seconds += time.monotonic() - started
+                if failed:
+                    self._errors += 1
+                if self._chats[key]:
+                    self._ready.append(key)
+                else:
+                    del self._chats[key]
+                self._cond.notify_all()
+
+    def stop(self, wait: bool = True, timeout: Optional[float] = None):
+        """Navbatdagi update lar tugagach worker larni to'xtatish"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+            return {
+                'workers': self.workers,
+                'busy_workers': self._busy,
+                'pending_updates': self._pending,
+                'queued_updates': self._pending - self._busy,
+                'ready_chats': len(self._ready),
+                'active_chats': len(self._chats),
+                'max_pending': self.max_pending,
+                'processed': self._processed,
+                'errors': self._errors,
+                'rejected': self._rejected,
+                'utilization': round(self._busy_seconds / (uptime * self.workers), 4) if uptime else 0.0,
+            }
+
+
+def update_chat_key(update) -> Hashable:
+    """Update qaysi chatga tegishli ekanini aniqlash (tartib shu kalit bo'yicha)"""
+    for name in ('message', 'edited_message', 'channel_post', 'edited_channel_post'):
+        message = getattr(update, name, None)
+        if message is not None:
+            return message.chat.id
+
+    callback = getattr(update, 'callback_query', None)
+    if callback is not None:
+        if callback.message is not None:
+            return callback.message.chat.id
+        return callback.from_user.id
+
+    for name in ('my_chat_member', 'chat_member', 'chat_join_request'):
+        event = getattr(update, name, None)
+        if event is not None:
+            return event.chat.id
+
+    for name in ('inline_query', 'chosen_inline_result', 'shipping_query',
+                 'pre_checkout_query', 'poll_answer'):
+        event = getattr(update, name, None)
+        user = getattr(event, 'from_user', None) or getattr(event, 'user', None)
+        if user is not None:
+            return user.id
+
+    return ('update', update.update_id)
+
+
+class DispatchingTeleBot(telebot.TeleBot):
+    """Update larni ChatOrderedDispatcher orqali bajaradigan TeleBot"""
+
+    def __init__(self, *args, workers: int = BOT_WORKERS, max_pending: int = BOT_MAX_PENDING_UPDATES, **kwargs):
+        # Handler lar dispatcher worker larida bajariladi, telebot ning o'z pool i kerak emas
+        kwargs['threaded'] = False
+        super().__init__(*args, **kwargs)
+        self.dispatcher = ChatOrderedDispatcher(self._process_update, workers=workers, max_pending=max_pending)
+        # UpdateJournal - offset ni saqlash va takroriy update larni tashlab yuborish (None - o'chiq)
+        self.journal = None
+        # UpdateRecorder - qabul qilingan update larni replay uchun yozish (None - o'chiq)
+        self.recorder = None
+
+    def get_updates(self, offset=None, limit=None, timeout=20, allowed_updates=None, long_polling_timeout=20):
+        # Asl JSON jurnal uchun saqlanadi (restart dan keyin qayta bajarish)
+        json_updates = apihelper.get_updates(
+            self.token, offset=offset, limit=limit, timeout=timeout, allowed_updates=allowed_updates,
+            long_polling_timeout=long_polling_timeout)
+        return [parse_update(json.dumps(item)) for item in json_updates]
+
+    def resume_updates(self) -> int:
+        """Saqlangan offset dan davom etish va navbatda qolib ketgan update larni qayta qo'yish"""
+        if self.journal is None:
+            return 0
+        self.last_update_id = max(self.last_update_id, self.journal.load_offset())
+        payloads = self.journal.pending()
+        for payload in payloads:
+            update = parse_update(payload)
+            self.dispatcher.submit(update_chat_key(update), update)
+        if payloads:
+            logger.info(f"{len(payloads)} ta ishlanmagan update navbatga qaytarildi")
+        return len(payloads)
+
+    def process_new_updates(self, updates):
+        for update in updates:
+            # Offset darhol suriladi, aks holda keyingi getUpdates shu update larni qayta oladi
+            if update.update_id > self.last_update_id:
+                self.last_update_id = update.update_id
+            self.enqueue_update(update)
+        if self.journal is not None and updates:
+            self.journal.flush()
+
+    def enqueue_update(self, update, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """Bitta update ni navbatga qo'yish (webhook uchun block=False).
+
+        Avval qabul qilingan update uchun ham True - Telegram uni qayta yubormasin.
+        """
+        journal = self.journal
+        payload = getattr(update, 'raw_json', None) or json.dumps({'update_id': update.update_id})
+        if journal is not None and not journal.accept(update.update_id, payload):
+            return True
+        accepted = self.dispatcher.submit(update_chat_key(update), update, block=block, timeout=timeout)
+        if not accepted and journal is not None:
+            journal.forget(update.update_id)
+        if accepted and self.recorder is not None:
+            self.recorder.record(payload)
+        return accepted
+
+    def _process_update(self, update):
+        if self.journal is not None and not self.journal.begin(update.update_id):
+            logger.info(f"Update #{update.update_id} avval ishlangan, o'tkazib yuborildi")
+            return
+        super().process_new_updates([update])
+
+
+def parse_update(payload: str):
+    """JSON matndan Update; asl matn raw_json da qoladi"""
+    update = types.Update.de_json(payload)
+    update.raw_json = payload
+    return update
@@ -0,0 +1,82 @@
+# fanout.py - Bir nechta qabul qiluvchiga parallel yuborish
+#
+# Handler xabarlarni navbatga qo'yib darhol o'z foydalanuvchisiga javob beradi.
+# Yuborishlar umumiy worker pulida bajariladi, tezlik chegarasi va ustuvorlik
+# outbox orqali saqlanadi. Natija har bir qabul qiluvchi bo'yicha qaytadi.
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from config import env_int
+from outbox import send_priority, PRIORITY_ADMIN
+
+logger = logging.getLogger(__name__)
+
+
+FANOUT_WORKERS = env_int("FANOUT_WORKERS", 8)
+
+
+class FanOutResult:
+    """recipient -> None (yuborildi) yoki xato matni"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.outcomes: Dict[Any, Optional[str]] = {}
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for error in self.outcomes.values() if error is None)
+
+    @property
+    def failed(self) -> int:
+        return len(self.outcomes) - self.sent
+
+
+class FanOut:
+    def __init__(self, workers: int = FANOUT_WORKERS):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fanout")
+
+    def send(self, recipients: Iterable[Any], send: Callable[[Any], Any],
+             priority: int = PRIORITY_ADMIN, label: str = "fanout",
+             on_done: Optional[Callable[[FanOutResult], None]] = None) -> "Future[FanOutResult]":
+        """send(recipient) ni har bir qabul qiluvchi uchun parallel chaqirish. Darhol qaytadi.
+
+        on_done hamma yuborishlar tugagach (worker thread da) chaqiriladi.
+        """
+        targets = list(dict.fromkeys(recipients))
+        result = FanOutResult(label)
+        future: "Future[FanOutResult]" = Future()
+        lock = threading.Lock()
+        remaining = [len(targets)]
+
+        def finish():
+            if on_done is not None:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    logger.error(f"{label}: on_done xatosi: {e}")
+            future.set_result(result)
+
+        def deliver(recipient):
+            try:
+                with send_priority(priority):
+                    send(recipient)
+                error = None
+            except Exception as e:
+                error = str(e)
+                logger.warning(f"{label}: {recipient} ga yuborilmadi: {e}")
+            with lock:
+                result.outcomes[recipient] = error
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                finish()
+
+        if not targets:
+            finish()
+            return future
+        for recipient in targets:
+            self._executor.submit(deliver, recipient)
+        return future
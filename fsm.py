@@ -0,0 +1,249 @@
+# fsm.py - Ko'p qadamli suhbatlar uchun deklarativ holat mashinasi
+#
+# register_next_step_handler callback lari faqat jarayon xotirasida turadi,
+# tashlab ketilgan suhbatlarda to'planib qoladi va qayta ishga tushirishda
+# yo'qoladi. Bu yerda suhbat (flow) qadamlar, validatorlar va o'tishlar
+# sifatida e'lon qilinadi, chat holati esa StateStore da TTL bilan saqlanadi.
+# Suhbat restart dan keyin va istalgan worker da davom etadi, tashlab
+# ketilganlari TTL tugagach o'chadi.
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from telebot import util
+
+from config import env_int, env_str
+from state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+# Oxirgi javobdan keyin shuncha vaqt o'tsa suhbat unutiladi
+FSM_TTL_SECONDS = env_int("FSM_TTL_SECONDS", 60 * 60)
+# Suhbat restart dan keyin va boshqa worker da davom etishi uchun holat
+# MongoDB da turadi; "memory" faqat bitta jarayonli lokal ishga mos
+FSM_STORE_BACKEND = env_str("FSM_STORE_BACKEND", default="mongo").lower()
+
+NAMESPACE = 'fsm'
+
+
+class Invalid(Exception):
+    """Validator javobni rad etdi; matn foydalanuvchiga ko'rsatiladi"""
+
+
+class Step:
+    __slots__ = ('name', 'handler', 'prompt', 'validate', 'next', 'back')
+
+    def __init__(self, name: str, handler: Optional[Callable] = None, prompt: Optional[Callable] = None,
+                 validate: Optional[Callable] = None, next: Optional[str] = None, back: Optional[str] = None):
+        self.name = name
+        # handler(message, ctx[, value]) -> keyingi qadam nomi yoki None (step.next).
+        # value - validator natijasi (validator bo'lsa)
+        self.handler = handler
+        # prompt(ctx) - qadamga kirilganda savol yuborish
+        self.prompt = prompt
+        # validate(message) -> value, yoki Invalid
+        self.validate = validate
+        self.next = next
+        # "Orqaga" bosilganda qaytiladigan qadam (None - suhbat bekor qilinadi)
+        self.back = back
+
+
+class Flow:
+    def __init__(self, name: str, on_cancel: Optional[Callable] = None,
+                 on_invalid: Optional[Callable] = None, cancel_texts: Iterable[str] = ('🔙 Orqaga',)):
+        self.name = name
+        # on_cancel(message, ctx), on_invalid(ctx, error_text)
+        self.on_cancel = on_cancel
+        self.on_invalid = on_invalid
+        self.cancel_texts = frozenset(cancel_texts)
+        self.steps: Dict[str, Step] = {}
+        self.first: Optional[str] = None
+
+    def _add(self, step: Step):
+        if step.name in self.steps:
+            raise ValueError(f"{self.name}: '{step.name}' qadami allaqachon bor")
+        self.steps[step.name] = step
+        if self.first is None:
+            self.first = step.name
+
+    def step(self, name: str, prompt: Optional[Callable] = None, validate: Optional[Callable] = None,
+             next: Optional[str] = None, back: Optional[str] = None):
+        """Xabar bilan yakunlanadigan qadam (dekorator)"""
+        def decorator(handler):
+            self._add(Step(name, handler, prompt, validate, next, back))
+            return handler
+        return decorator
+
+    def wait(self, name: str, prompt: Optional[Callable] = None, back: Optional[str] = None):
+        """Tashqi handler (masalan, callback) engine.goto bilan yakunlaydigan qadam.
+
+        Bu qadamda kelgan xabarlar odatdagi handlerlarga o'tadi.
+        """
+        self._add(Step(name, None, prompt, None, None, back))
+
+
+class Context:
+    """Bitta chatdagi suhbat holati; data StateStore da saqlanadi"""
+
+    __slots__ = ('engine', 'flow', 'step', 'chat_id', 'data', 'finished')
+
+    def __init__(self, engine: 'ConversationEngine', flow: Flow, step: str, chat_id: int, data: Dict[str, Any]):
+        self.engine = engine
+        self.flow = flow
+        self.step = step
+        self.chat_id = chat_id
+        self.data = data
+        self.finished = False
+
+    def finish(self):
+        """Handler dan keyin suhbatni tugatish (step.next e'tiborga olinmaydi)"""
+        self.finished = True
+
+
+def text_value(error: str) -> Callable:
+    """Bo'sh bo'lmagan matnni qabul qiluvchi validator"""
+    def validate(message) -> str:
+        text = (message.text or '').strip() if message.content_type == 'text' else ''
+        if not text:
+            raise Invalid(error)
+        return text
+    return validate
+
+
+class ConversationEngine:
+    def __init__(self, store: StateStore, observer: Optional[Callable] = None, namespace: str = NAMESPACE):
+        self.store = store
+        # observer(handler, *args) - qadam handler ini o'rab bajaradi (metrics.observe_handler)
+        self.observer = observer
+        self.namespace = namespace
+        self._flows: Dict[str, Flow] = {}
+        self._lock = threading.Lock()
+        self._stats = {'started': 0, 'finished': 0, 'cancelled': 0, 'invalid': 0, 'invalidated': 0}
+
+    def flow(self, name: str, **kwargs) -> Flow:
+        flow = Flow(name, **kwargs)
+        self._flows[name] = flow
+        return flow
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    # ---------- holat ----------
+
+    def _load(self, chat_id: int) -> Optional[Context]:
+        state = self.store.get(self.namespace, chat_id)
+        if not state:
+            return None
+        flow = self._flows.get(state.get('flow'))
+        if flow is None or state.get('step') not in flow.steps:
+            # Kod o'zgargan (qadam olib tashlangan) - eski holat bekor
+            self.store.delete(self.namespace, chat_id)
+            self._count('invalidated')
+            return None
+        return Context(self, flow, state['step'], chat_id, dict(state.get('data') or {}))
+
+    def _save(self, ctx: Context):
+        self.store.set(self.namespace, ctx.chat_id, {'flow': ctx.flow.name, 'step': ctx.step, 'data': ctx.data})
+
+    def _enter(self, ctx: Context, step_name: str):
+        step = ctx.flow.steps[step_name]
+        ctx.step = step_name
+        self._save(ctx)
+        if step.prompt is not None:
+            step.prompt(ctx)
+
+    def get(self, chat_id: int) -> Optional[Context]:
+        return self._load(chat_id)
+
+    def active(self, chat_id: int) -> bool:
+        return self.store.get(self.namespace, chat_id) is not None
+
+    # ---------- boshqaruv ----------
+
+    def start(self, chat_id: int, flow_name: str, data: Optional[Dict[str, Any]] = None,
+              step: Optional[str] = None) -> Context:
+        """Suhbatni boshlash (avvalgisi bo'lsa almashtiriladi) va birinchi savolni yuborish"""
+        flow = self._flows[flow_name]
+        ctx = Context(self, flow, step or flow.first, chat_id, dict(data or {}))
+        self._count('started')
+        self._enter(ctx, ctx.step)
+        return ctx
+
+    def goto(self, chat_id: int, step: str, flow_name: Optional[str] = None, **fields) -> Optional[Context]:
+        """Tashqi handler dan o'tish. Suhbat yo'q yoki boshqa flow bo'lsa None"""
+        ctx = self._load(chat_id)
+        if ctx is None or (flow_name is not None and ctx.flow.name != flow_name):
+            return None
+        ctx.data.update(fields)
+        self._enter(ctx, step)
+        return ctx
+
+    def cancel(self, chat_id: int):
+        self.store.delete(self.namespace, chat_id)
+
+    def _call(self, handler: Callable, *args):
+        if self.observer is None:
+            return handler(*args)
+        return self.observer(handler, *args)
+
+    def dispatch(self, message) -> bool:
+        """Xabar suhbat qadamiga tegishli bo'lsa ishlash. False - odatdagi routing"""
+        ctx = self._load(message.chat.id)
+        if ctx is None:
+            return False
+        flow = ctx.flow
+        step = flow.steps[ctx.step]
+        text = message.text if message.content_type == 'text' else None
+
+        if text and util.is_command(text):
+            # Buyruq (/start va h.k.) suhbatni to'xtatadi va odatdagidek ishlanadi
+            self.cancel(ctx.chat_id)
+            self._count('cancelled')
+            return False
+
+        if text in flow.cancel_texts:
+            if step.back is not None:
+                self._enter(ctx, step.back)
+                return True
+            self.cancel(ctx.chat_id)
+            self._count('cancelled')
+            if flow.on_cancel is not None:
+                self._call(flow.on_cancel, message, ctx)
+            return True
+
+        if step.handler is None:
+            return False
+
+        args = (message, ctx)
+        if step.validate is not None:
+            try:
+                args += (step.validate(message),)
+            except Invalid as e:
+                self._count('invalid')
+                if flow.on_invalid is not None:
+                    flow.on_invalid(ctx, str(e))
+                if step.prompt is not None:
+                    step.prompt(ctx)
+                return True
+
+        try:
+            next_step = self._call(step.handler, *args)
+        except Exception:
+            # next-step handler kabi: xatodan keyin suhbat davom etmaydi
+            self.cancel(ctx.chat_id)
+            raise
+        next_step = next_step or step.next
+        if ctx.finished or next_step is None:
+            self.cancel(ctx.chat_id)
+            self._count('finished')
+        else:
+            self._enter(ctx, next_step)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+        data['flows'] = {name: list(flow.steps) for name, flow in self._flows.items()}
+        return data
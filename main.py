@@ -9,7 +9,10 @@ import time
 
 from telebot import types
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
-from dotenv import load_dotenv
+from config import env_int
+from dispatcher import DispatchingTeleBot, BOT_WORKERS
+from router import Router
+from metrics import observe_handler
 
 def _ensure_utf8_stdio():
     for stream_name in ("stdout", "stderr"):
@@ -23,26 +26,24 @@ def _ensure_utf8_stdio():
 _ensure_utf8_stdio()
 
 # Environment o'qish
-load_dotenv()
-
 # Bot tokenini environmentdan olish
 BOT_TOKEN = os.getenv('BOT_TOKEN', '8545746982:AAFNOX6afGJ9ECRP5neHzinrM4DcT2seqeI')
 CHANNEL_USERNAME = os.getenv('CHANNEL_USERNAME', '@GarajHub_uz')
 
-def _env_int(name: str, default: int) -> int:
-    raw = os.getenv(name, str(default))
-    try:
-        return int(str(raw).strip().strip("'").strip('"'))
-    except Exception:
-        return default
-
-ADMIN_ID = _env_int('ADMIN_ID', 6274852941)
-ADMIN_ID_2 = _env_int('ADMIN_ID_2', 7903688837)
+ADMIN_ID = env_int('ADMIN_ID', 6274852941)
+ADMIN_ID_2 = env_int('ADMIN_ID_2', 7903688837)
 ADMIN_IDS = {ADMIN_ID}
 if ADMIN_ID_2:
     ADMIN_IDS.add(ADMIN_ID_2)
 
-bot = telebot.TeleBot(BOT_TOKEN, parse_mode='HTML')
+# Telegram API manzilini almashtirish (masalan, testlarda soxta server uchun)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '').strip().rstrip('/')
+if TELEGRAM_API_URL:
+    apihelper.API_URL = TELEGRAM_API_URL + '/bot{0}/{1}'
+    apihelper.FILE_URL = TELEGRAM_API_URL + '/file/bot{0}/{1}'
+
+# Update lar BOT_WORKERS ta worker da, bitta chat doirasida tartib bilan bajariladi
+bot = DispatchingTeleBot(BOT_TOKEN, parse_mode='HTML')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 def is_admin_user(user_id: int) -> bool:
@@ -51,6 +52,19 @@ def is_admin_user(user_id: int) -> bool:
     except Exception:
         return False
 
+# Handlerlar router orqali: matn/callback kaliti bo'yicha bitta qidiruv
+router = Router(observer=observe_handler)
+router.attach(bot)
+
+def admin_guard(message) -> bool:
+    return is_admin_user(message.chat.id)
+
+def state_guard(state: str):
+    def guard(message) -> bool:
+        return get_user_state(message.from_user.id) == state
+    guard.__name__ = f"state_guard({state})"
+    return guard
+
 # HTML belgilarni tozalash funksiyasi
 def escape_html(text):
     """HTML belgilarini tozalash - Telegram HTML formatida ishlash uchun"""
@@ -72,21 +86,32 @@ def escape_html(text):
     return text
 
 # Database import
+from state_store import create_state_store
+from update_journal import UpdateJournal
+from update_recorder import create_update_recorder
+from fsm import ConversationEngine, Invalid, text_value, FSM_STORE_BACKEND, FSM_TTL_SECONDS
+from broadcast import BroadcastEngine, BROADCAST_WORKERS
+from telegram_transport import install as install_transport
+from outbox import Outbox
+from fanout import FanOut, FANOUT_WORKERS
+from channel_updater import ChannelPostUpdater
+from telegram_client import TelegramClient
+from cards import render_startup_card, ROLE_PUBLIC, ROLE_MEMBER, ROLE_OWNER, ROLE_ADMIN, ROLE_CHANNEL
+from recommendations import RecommendationIndex
+from renderer import MessageRenderer
 from db import (
     init_db,
     get_user, save_user, update_user_field,
-    create_startup, get_startup, get_startups_by_owner,
-    get_pending_startups, get_active_startups, update_startup_status, update_startup_results,
+    create_startup, get_startup, get_startups_by_owner_page, get_startup_by_owner_index,
+    get_pending_startups, update_startup_status, update_startup_results,
     add_startup_member, get_join_request_id, update_join_request, get_join_request,
-    get_startup_members, get_statistics, get_all_users,
+    get_startup_members, get_statistics,
     get_recent_users, get_recent_startups, get_completed_startups,
     get_rejected_startups, get_all_startup_members,
-    get_startups_by_category, get_all_categories,
+    get_startups_by_category_page, get_all_categories,
     get_user_joined_startups, get_startups_by_ids,
     update_user_specialization, update_user_experience,
-    update_startup_member_count, get_startup_member_count,
     update_startup_post_id, get_startup_by_post_id,
-    update_startup_current_members,
     get_pro_settings, set_pro_enabled, set_pro_price, set_pro_card,
     is_user_pro, add_pro_subscription,
     create_pro_payment, get_payment, get_pending_payments, update_payment_status,
@@ -98,38 +123,64 @@ from db import (
 # Database initialization
 init_db()
 
-# User state management
-user_states = {}
-category_data = {}  # Global dictionary for category data
-pro_payment_data = {}
-BOT_USERNAME_CACHE = None
+# Qabul qilingan update lar jurnali: offset restart dan keyin davom etadi, takrorlar ishlanmaydi
+bot.journal = UpdateJournal()
+# UPDATE_RECORD_PATH berilsa update lar tozalanib replay benchmark uchun yoziladi
+bot.recorder = create_update_recorder(keep_text=router.has_text)
+
+# User state management (STATE_STORE_BACKEND: memory yoki mongo)
+state_store = create_state_store()
+
+# Ko'p qadamli suhbatlar: holat StateStore da FSM_TTL_SECONDS bilan, restart dan keyin ham davom etadi
+conversations = ConversationEngine(create_state_store(FSM_STORE_BACKEND, FSM_TTL_SECONDS), observer=observe_handler)
+router.conversations = conversations
+
+# Telegram so'rovlari bitta keep-alive pul orqali: handler, broadcast va fon thread lari uchun.
+# Yuborishlar umumiy limitdan ustuvorlik bo'yicha o'tadi (javob > admin > kanal > broadcast)
+transport = install_transport(BOT_WORKERS + BROADCAST_WORKERS + FANOUT_WORKERS + 4, outbox=Outbox())
+
+# Admin va a'zolarga bildirishnomalar parallel yuboriladi, handler kutmaydi
+fanout = FanOut()
+
+# get_me va kanal a'zoligi keshlanadi (MEMBER_CACHE_TTL / NON_MEMBER_CACHE_TTL)
+tg = TelegramClient(bot, CHANNEL_USERNAME)
+
+# Ommaviy xabarlar fon thread larida, Telegram limitlariga mos yuboriladi
+broadcaster = BroadcastEngine(bot)
+
+# Tavsiyalar har bir foydalanuvchi uchun oldindan tartiblanadi va db hodisalarida yangilanadi
+recommender = RecommendationIndex()
+recommender.attach()
+
+# Sahifa/karta xabarlari turiga qarab bitta chaqiruv bilan yangilanadi
+renderer = MessageRenderer(bot)
+router.before_callback(renderer.remember_callback)
 
 def set_user_state(user_id: int, state: str):
-    user_states[user_id] = state
+    state_store.set('state', user_id, state)
 
 def get_user_state(user_id: int) -> str:
-    return user_states.get(user_id, '')
+    return state_store.get('state', user_id, '')
 
 def clear_user_state(user_id: int):
-    if user_id in user_states:
-        del user_states[user_id]
+    state_store.delete('state', user_id)
+
+def get_pro_payment_data(user_id: int) -> Dict:
+    return state_store.get('pro_payment', user_id, {})
+
+def set_pro_payment_data(user_id: int, data: Dict):
+    state_store.set('pro_payment', user_id, data)
+
+def clear_pro_payment_data(user_id: int):
+    state_store.delete('pro_payment', user_id)
 
 def clear_user_data(user_id: int):
     """Foydalanuvchi ma'lumotlarini tozalash"""
-    global category_data
-    if user_id in category_data:
-        del category_data[user_id]
+    conversations.cancel(user_id)
     clear_user_state(user_id)
 
 def get_bot_username():
-    global BOT_USERNAME_CACHE
-    if BOT_USERNAME_CACHE:
-        return BOT_USERNAME_CACHE
-    try:
-        BOT_USERNAME_CACHE = bot.get_me().username
-    except Exception:
-        BOT_USERNAME_CACHE = None
-    return BOT_USERNAME_CACHE
+    return tg.username()
 
 def is_pro_feature_enabled() -> bool:
     try:
@@ -164,6 +215,15 @@ def create_back_button(include_menu=False):
         markup.add(KeyboardButton('🏠 Asosiy menyu'))
     return markup
 
+def ask_text(text: str):
+    """Suhbat qadami savoli: matn va orqaga tugmasi"""
+    def prompt(ctx):
+        bot.send_message(ctx.chat_id, text, reply_markup=create_back_button())
+    return prompt
+
+def send_invalid(ctx, error: str):
+    bot.send_message(ctx.chat_id, error, reply_markup=create_back_button())
+
 # Asosiy menyu tugmalari
 def create_main_menu(user_id: int):
     markup = ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
@@ -184,6 +244,39 @@ def create_main_menu(user_id: int):
     
     return markup
 
+# Kategoriyalar klaviaturasi keshi
+CATEGORY_EMOJIS = {
+    'Biznes': '💼',
+    'Sog\'liq': '🏥',
+    'Texnologiya': '📱',
+    'Ekologiya': '🌿',
+    'Ta\'lim': '🎓',
+    'Dizayn': '🎨',
+    'Dasturlash': '💻',
+    'Savdo': '🛒',
+    'Media': '🎬',
+    'Karyera': '💼'
+}
+_category_keyboard_cache = None  # (kategoriyalar, markup)
+
+def get_category_keyboard() -> InlineKeyboardMarkup:
+    """Kategoriyalar klaviaturasi (ro'yxat o'zgarganda qayta quriladi)"""
+    global _category_keyboard_cache
+    categories = tuple(get_all_categories())
+    cached = _category_keyboard_cache
+    if cached is not None and cached[0] == categories:
+        return cached[1]
+    
+    markup = InlineKeyboardMarkup(row_width=2)
+    # Faol startap bo'lmasa standart kategoriyalar ko'rsatiladi
+    for category in categories or tuple(CATEGORY_EMOJIS):
+        emoji = CATEGORY_EMOJIS.get(category, '🏷️')
+        markup.add(InlineKeyboardButton(f'{emoji} {category}', callback_data=f'category_{category}'))
+    markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_startups_menu'))
+    
+    _category_keyboard_cache = (categories, markup)
+    return markup
+
 # Qiymatni formatlash funksiyasi
 def format_value(value):
     """None yoki bo'sh qiymatlarni "—" bilan almashtirish"""
@@ -192,7 +285,7 @@ def format_value(value):
     return str(value)
 
 # START - BOSHLASH
-@bot.message_handler(commands=['start', 'help', 'boshlash'])
+@router.command('start', 'help', 'boshlash')
 def start_command(message):
     user_id = message.from_user.id
     username = message.from_user.username or ""
@@ -210,8 +303,7 @@ def start_command(message):
     
     # Kanalga obuna tekshirish
     try:
-        chat_member = bot.get_chat_member(CHANNEL_USERNAME, user_id)
-        if chat_member.status in ['member', 'administrator', 'creator']:
+        if tg.is_channel_member(user_id):
             # Agar yangi foydalanuvchi
             if not user:
                 save_user(user_id, username, first_name)
@@ -241,12 +333,12 @@ def ask_for_subscription(message):
         reply_markup=markup
     )
 
-@bot.callback_query_handler(func=lambda call: call.data == 'check_subscription')
+@router.callback('check_subscription')
 def check_subscription_callback(call):
     user_id = call.from_user.id
     try:
-        chat_member = bot.get_chat_member(CHANNEL_USERNAME, user_id)
-        if chat_member.status in ['member', 'administrator', 'creator']:
+        # Hozirgina obuna bo'lgan bo'lishi mumkin - manfiy kesh ishlatilmaydi
+        if tg.is_channel_member(user_id, trust_negative=False):
             # Foydalanuvchi tekshirish
             user = get_user(user_id)
             
@@ -301,7 +393,7 @@ def request_phone_number(message):
         reply_markup=markup
     )
 
-@bot.message_handler(content_types=['contact'])
+@router.content('contact')
 def handle_contact(message):
     """Telefon raqamni qabul qilish"""
     user_id = message.from_user.id
@@ -372,7 +464,7 @@ def handle_contact(message):
             # Profilga qaytish
             show_profile(message)
 
-@bot.message_handler(content_types=['photo'])
+@router.content('photo')
 def handle_photo_messages(message):
     user_id = message.from_user.id
     state = get_user_state(user_id)
@@ -380,8 +472,9 @@ def handle_photo_messages(message):
         return
 
     settings = get_pro_settings()
-    amount = pro_payment_data.get(user_id, {}).get('amount', settings.get('pro_price', 0))
-    card = pro_payment_data.get(user_id, {}).get('card', settings.get('card_number', ''))
+    payment_data = get_pro_payment_data(user_id)
+    amount = payment_data.get('amount', settings.get('pro_price', 0))
+    card = payment_data.get('card', settings.get('card_number', ''))
     receipt_file_id = message.photo[-1].file_id
 
     try:
@@ -410,18 +503,18 @@ def handle_photo_messages(message):
         InlineKeyboardButton('❌ Rad etish', callback_data=f'pro_pay_reject_{payment_id}')
     )
 
-    for admin_chat_id in ADMIN_IDS:
-        try:
-            bot.send_photo(admin_chat_id, receipt_file_id, caption=text, reply_markup=markup)
-        except Exception as e:
-            logging.error(f"Admin payment notify xatosi ({admin_chat_id}): {e}")
+    fanout.send(
+        ADMIN_IDS,
+        lambda admin_chat_id: bot.send_photo(admin_chat_id, receipt_file_id, caption=text, reply_markup=markup),
+        label="Admin payment notify",
+    )
 
     bot.send_message(
         message.chat.id,
         "✅ <b>Chek qabul qilindi!</b>\n\n"
         "Administrator tasdiqlashini kuting."
     )
-    pro_payment_data.pop(user_id, None)
+    clear_pro_payment_data(user_id)
     clear_user_state(user_id)
 
 def send_welcome_back_message(message_or_call, first_name):
@@ -500,7 +593,7 @@ def send_subscription_info(chat_id: int, user_id: int):
     )
     bot.send_message(chat_id, text, reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '💳 Obuna')
+@router.text('💳 Obuna')
 def handle_subscription_menu(message):
     send_subscription_info(message.chat.id, message.from_user.id)
 
@@ -529,11 +622,11 @@ def send_referral_info(chat_id: int, user_id: int):
     )
     bot.send_message(chat_id, text)
 
-@bot.message_handler(func=lambda message: message.text == '🤝 Referal')
+@router.text('🤝 Referal')
 def handle_referral_menu(message):
     send_referral_info(message.chat.id, message.from_user.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'open_referral')
+@router.callback('open_referral')
 def handle_open_referral(call):
     try:
         send_referral_info(call.message.chat.id, call.from_user.id)
@@ -541,7 +634,7 @@ def handle_open_referral(call):
     except Exception:
         bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'pro_pay')
+@router.callback('pro_pay')
 def handle_pro_pay(call):
     user_id = call.from_user.id
     if not is_pro_feature_enabled():
@@ -554,7 +647,7 @@ def handle_pro_pay(call):
     settings = get_pro_settings()
     price = settings.get('pro_price', 0)
     card = settings.get('card_number', '')
-    pro_payment_data[user_id] = {'amount': price, 'card': card}
+    set_pro_payment_data(user_id, {'amount': price, 'card': card})
     set_user_state(user_id, 'waiting_pro_receipt')
 
     text = (
@@ -567,7 +660,7 @@ def handle_pro_pay(call):
     bot.answer_callback_query(call.id)
 
 # 👤 PROFIL BO'LIMI
-@bot.message_handler(func=lambda message: message.text == '👤 Profil')
+@router.text('👤 Profil')
 def show_profile(message):
     try:
         user_id = message.from_user.id
@@ -611,22 +704,22 @@ def show_profile(message):
         bot.send_message(message.chat.id, "⚠️ <b>Xatolik yuz berdi!</b>",
                         reply_markup=create_back_button(True))
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('edit_'))
+PROFILE_EDIT_STEPS = {
+    'edit_first_name': 'first_name',
+    'edit_last_name': 'last_name',
+    'edit_birth_date': 'birth_date',
+    'edit_specialization': 'specialization',
+    'edit_experience': 'experience',
+    'edit_bio': 'bio',
+}
+
+@router.callback_prefix('edit_')
 def handle_edit_profile(call):
     user_id = call.from_user.id
     
     try:
-        if call.data == 'edit_first_name':
-            set_user_state(user_id, 'editing_first_name')
-            msg = bot.send_message(call.message.chat.id, "📝 <b>Ismingizni kiriting:</b>", 
-                                  reply_markup=create_back_button())
-            bot.register_next_step_handler(msg, process_first_name)
-        
-        elif call.data == 'edit_last_name':
-            set_user_state(user_id, 'editing_last_name')
-            msg = bot.send_message(call.message.chat.id, "📝 <b>Familiyangizni kiriting:</b>", 
-                                  reply_markup=create_back_button())
-            bot.register_next_step_handler(msg, process_last_name)
+        if call.data in PROFILE_EDIT_STEPS:
+            conversations.start(call.message.chat.id, 'profile', step=PROFILE_EDIT_STEPS[call.data])
         
         elif call.data == 'edit_phone':
             set_user_state(user_id, 'waiting_phone_edit')
@@ -648,51 +741,8 @@ def handle_edit_profile(call):
                 InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_profile')
             )
             
-            try:
-                bot.edit_message_text(
-                    "⚧️ <b>Jinsingizni tanlang:</b>",
-                    call.message.chat.id,
-                    call.message.message_id,
-                    reply_markup=markup
-                )
-            except:
-                bot.send_message(call.message.chat.id, "⚧️ <b>Jinsingizni tanlang:</b>", reply_markup=markup)
-        
-        elif call.data == 'edit_birth_date':
-            set_user_state(user_id, 'editing_birth_date')
-            msg = bot.send_message(
-                call.message.chat.id, 
-                "🎂 <b>Tug'ilgan sanangizni kiriting (kun-oy-yil)</b>\n"
-                "Masalan: 30-04-2000", 
-                reply_markup=create_back_button()
-            )
-            bot.register_next_step_handler(msg, process_birth_date)
-        
-        elif call.data == 'edit_specialization':
-            set_user_state(user_id, 'editing_specialization')
-            msg = bot.send_message(
-                call.message.chat.id, 
-                "🔧 <b>Mutaxassisligingizni kiriting:</b>\n\n"
-                "Masalan: Python, AI, ML", 
-                reply_markup=create_back_button()
-            )
-            bot.register_next_step_handler(msg, process_specialization)
-        
-        elif call.data == 'edit_experience':
-            set_user_state(user_id, 'editing_experience')
-            msg = bot.send_message(
-                call.message.chat.id, 
-                "📈 <b>Tajribangizni kiriting:</b>\n\n"
-                "Masalan: 5 yil", 
-                reply_markup=create_back_button()
-            )
-            bot.register_next_step_handler(msg, process_experience)
-        
-        elif call.data == 'edit_bio':
-            set_user_state(user_id, 'editing_bio')
-            msg = bot.send_message(call.message.chat.id, "📝 <b>Bio kiriting:</b>", 
-                                  reply_markup=create_back_button())
-            bot.register_next_step_handler(msg, process_bio)
+            renderer.show(call.message.chat.id, "⚧️ <b>Jinsingizni tanlang:</b>", markup,
+                          message_id=call.message.message_id)
         
         bot.answer_callback_query(call.id)
     except Exception as e:
@@ -700,51 +750,31 @@ def handle_edit_profile(call):
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
         show_profile(call.message)
 
-def process_first_name(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        show_profile(message)
-        return
-    
-    if not message.text or message.text.strip() == '':
-        bot.send_message(message.chat.id, "❌ <b>Ism kiritilmadi!</b>", 
-                        reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "📝 <b>Ismingizni kiriting:</b>", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_first_name)
-        return
-    
-    first_name = message.text.strip()
-    update_user_field(user_id, 'first_name', first_name)
-    bot.send_message(message.chat.id, "✅ <b>Ismingiz muvaffaqiyatli saqlandi</b>")
-    clear_user_state(user_id)
+def cancel_profile_edit(message, ctx):
+    clear_user_state(message.from_user.id)
     show_profile(message)
 
-def process_last_name(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        show_profile(message)
-        return
-    
-    if not message.text or message.text.strip() == '':
-        bot.send_message(message.chat.id, "❌ <b>Familiya kiritilmadi!</b>", 
-                        reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "📝 <b>Familiyangizni kiriting:</b>", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_last_name)
-        return
-    
-    last_name = message.text.strip()
-    update_user_field(user_id, 'last_name', last_name)
-    bot.send_message(message.chat.id, "✅ <b>Familiyangiz muvaffaqiyatli saqlandi</b>")
-    clear_user_state(user_id)
+def finish_profile_edit(message, text):
+    bot.send_message(message.chat.id, text)
+    clear_user_state(message.from_user.id)
     show_profile(message)
 
-@bot.callback_query_handler(func=lambda call: call.data in ['gender_male', 'gender_female'])
+# Har bir maydon alohida qadam: bitta javobdan keyin suhbat tugaydi
+profile_flow = conversations.flow('profile', on_cancel=cancel_profile_edit, on_invalid=send_invalid)
+
+@profile_flow.step('first_name', prompt=ask_text("📝 <b>Ismingizni kiriting:</b>"),
+                   validate=text_value("❌ <b>Ism kiritilmadi!</b>"))
+def process_first_name(message, ctx, first_name):
+    update_user_field(message.from_user.id, 'first_name', first_name)
+    finish_profile_edit(message, "✅ <b>Ismingiz muvaffaqiyatli saqlandi</b>")
+
+@profile_flow.step('last_name', prompt=ask_text("📝 <b>Familiyangizni kiriting:</b>"),
+                   validate=text_value("❌ <b>Familiya kiritilmadi!</b>"))
+def process_last_name(message, ctx, last_name):
+    update_user_field(message.from_user.id, 'last_name', last_name)
+    finish_profile_edit(message, "✅ <b>Familiyangiz muvaffaqiyatli saqlandi</b>")
+
+@router.callback('gender_male', 'gender_female')
 def process_gender(call):
     try:
         user_id = call.from_user.id
@@ -758,7 +788,7 @@ def process_gender(call):
         logging.error(f"Jinsni saqlashda xatolik: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_profile')
+@router.callback('back_to_profile')
 def back_to_profile(call):
     try:
         show_profile(call.message)
@@ -767,96 +797,35 @@ def back_to_profile(call):
         logging.error(f"Profilga qaytishda xatolik: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-def process_birth_date(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        show_profile(message)
-        return
-    
-    if not message.text or message.text.strip() == '':
-        bot.send_message(message.chat.id, "❌ <b>Sana kiritilmadi!</b>", 
-                        reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "🎂 <b>Tug'ilgan sanangizni kiriting:</b>", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_birth_date)
-        return
-    
-    birth_date = message.text.strip()
-    update_user_field(user_id, 'birth_date', birth_date)
-    bot.send_message(message.chat.id, "✅ <b>Tug'ilgan sana muvaffaqiyatli saqlandi</b>")
-    clear_user_state(user_id)
-    show_profile(message)
-
-def process_specialization(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        show_profile(message)
-        return
-    
-    if not message.text or message.text.strip() == '':
-        bot.send_message(message.chat.id, "❌ <b>Mutaxassislik kiritilmadi!</b>", 
-                        reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "🔧 <b>Mutaxassisligingizni kiriting:</b>", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_specialization)
-        return
-    
-    specialization = message.text.strip()
-    update_user_specialization(user_id, specialization)
-    bot.send_message(message.chat.id, "✅ <b>Mutaxassislik muvaffaqiyatli saqlandi</b>")
-    clear_user_state(user_id)
-    show_profile(message)
-
-def process_experience(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        show_profile(message)
-        return
-    
-    if not message.text or message.text.strip() == '':
-        bot.send_message(message.chat.id, "❌ <b>Tajriba kiritilmadi!</b>", 
-                        reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "📈 <b>Tajribangizni kiriting:</b>", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_experience)
-        return
-    
-    experience = message.text.strip()
-    update_user_experience(user_id, experience)
-    bot.send_message(message.chat.id, "✅ <b>Tajriba muvaffaqiyatli saqlandi</b>")
-    clear_user_state(user_id)
-    show_profile(message)
-
-def process_bio(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        show_profile(message)
-        return
-    
-    if not message.text or message.text.strip() == '':
-        bot.send_message(message.chat.id, "❌ <b>Bio kiritilmadi!</b>", 
-                        reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "📝 <b>Bio kiriting:</b>", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_bio)
-        return
-    
-    bio = message.text.strip()
-    update_user_field(user_id, 'bio', bio)
-    bot.send_message(message.chat.id, "✅ <b>Bio saqlandi</b>")
-    clear_user_state(user_id)
-    show_profile(message)
+@profile_flow.step('birth_date', prompt=ask_text("🎂 <b>Tug'ilgan sanangizni kiriting (kun-oy-yil)</b>\n"
+                                                 "Masalan: 30-04-2000"),
+                   validate=text_value("❌ <b>Sana kiritilmadi!</b>"))
+def process_birth_date(message, ctx, birth_date):
+    update_user_field(message.from_user.id, 'birth_date', birth_date)
+    finish_profile_edit(message, "✅ <b>Tug'ilgan sana muvaffaqiyatli saqlandi</b>")
+
+@profile_flow.step('specialization', prompt=ask_text("🔧 <b>Mutaxassisligingizni kiriting:</b>\n\n"
+                                                     "Masalan: Python, AI, ML"),
+                   validate=text_value("❌ <b>Mutaxassislik kiritilmadi!</b>"))
+def process_specialization(message, ctx, specialization):
+    update_user_specialization(message.from_user.id, specialization)
+    finish_profile_edit(message, "✅ <b>Mutaxassislik muvaffaqiyatli saqlandi</b>")
+
+@profile_flow.step('experience', prompt=ask_text("📈 <b>Tajribangizni kiriting:</b>\n\n"
+                                                 "Masalan: 5 yil"),
+                   validate=text_value("❌ <b>Tajriba kiritilmadi!</b>"))
+def process_experience(message, ctx, experience):
+    update_user_experience(message.from_user.id, experience)
+    finish_profile_edit(message, "✅ <b>Tajriba muvaffaqiyatli saqlandi</b>")
+
+@profile_flow.step('bio', prompt=ask_text("📝 <b>Bio kiriting:</b>"),
+                   validate=text_value("❌ <b>Bio kiritilmadi!</b>"))
+def process_bio(message, ctx, bio):
+    update_user_field(message.from_user.id, 'bio', bio)
+    finish_profile_edit(message, "✅ <b>Bio saqlandi</b>")
 
 # 🌐 STARTAPLAR BO'LIMI
-@bot.message_handler(func=lambda message: message.text == '🌐 Startaplar')
+@router.text('🌐 Startaplar')
 def show_startups_menu(message):
     user_id = message.from_user.id
     set_user_state(user_id, 'in_startups_menu')
@@ -870,7 +839,7 @@ def show_startups_menu(message):
     
     bot.send_message(message.chat.id, "🌐 <b>Startaplar bo'limi:</b>\n\nKerakli bo'limni tanlang:", reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '🎯 Tavsiyalar' and get_user_state(message.from_user.id) == 'in_startups_menu')
+@router.text('🎯 Tavsiyalar', guard=state_guard('in_startups_menu'))
 def show_recommended_startups(message):
     user_id = message.from_user.id
     set_user_state(user_id, 'viewing_recommended')
@@ -878,67 +847,26 @@ def show_recommended_startups(message):
 
 def show_recommended_page(chat_id, page, message_id=None):
     per_page = 1
-    startups, total = get_active_startups(page, per_page=per_page)
-    
-    if not startups:
-        if message_id:
-            try:
-                bot.edit_message_text(
-                    "📭 <b>Hozircha startup mavjud emas.</b>",
-                    chat_id=chat_id,
-                    message_id=message_id,
-                    reply_markup=create_back_button(True)
-                )
-            except:
-                bot.send_message(chat_id, 
-                                "📭 <b>Hozircha startup mavjud emas.</b>", 
-                                reply_markup=create_back_button(True))
-        else:
-            bot.send_message(chat_id, 
-                            "📭 <b>Hozircha startup mavjud emas.</b>", 
-                            reply_markup=create_back_button(True))
+    card = None
+    while card is None:
+        ranked = recommender.ranked(chat_id)
+        total = len(ranked)
+        if not total:
+            break
+        page = min(max(1, page), total)
+        card = render_startup_card(ranked[page - 1], ROLE_PUBLIC)
+        if card is None:
+            # Startap o'chirilgan - indeksdan olib tashlab qayta urinish
+            recommender.remove_startup(ranked[page - 1])
+    
+    if card is None:
+        bot.send_message(chat_id, 
+                        "📭 <b>Hozircha startup mavjud emas.</b>", 
+                        reply_markup=create_back_button(True))
         return
     
-    startup = startups[0]
-    
-    # A'zolar sonini olish
-    current_members = get_startup_member_count(startup['_id'])
-    max_members = startup.get('max_members', 10)
-    
-    user = get_user(startup['owner_id'])
-    owner_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
-    
     total_pages = max(1, (total + per_page - 1) // per_page)
-    
-    # Sanani formatlash
-    start_date = startup.get('started_at', '—')
-    if start_date and start_date != '—':
-        if isinstance(start_date, datetime):
-            start_date = start_date.strftime('%d-%m-%Y')
-        else:
-            try:
-                start_date = datetime.fromisoformat(str(start_date)).strftime('%d-%m-%Y')
-            except:
-                pass
-    
-    text = (
-        f"💡 <b>Tavsiya {page}/{total_pages}</b>\n\n"
-        f"🎯 <b>Nomi:</b> {startup['name']}\n"
-        f"📅 <b>Boshlangan sana:</b> {start_date}\n"
-        f"👤 <b>Muallif:</b> {owner_name}\n"
-        f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
-        f"🔧 <b>Kerakli mutaxassislar:</b> {startup.get('required_skills', '—')}\n"
-        f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n"
-        f"📌 <b>Tavsif:</b> {startup['description']}"
-    )
-    
-    markup = InlineKeyboardMarkup()
-    
-    # Agar a'zolar to'liq bo'lsa
-    if current_members >= max_members:
-        markup.add(InlineKeyboardButton('❌ A\'zolar to\'ldi', callback_data='full_members'))
-    else:
-        markup.add(InlineKeyboardButton('🤝 Qo\'shilish', callback_data=f'join_startup_{startup["_id"]}'))
+    text = f"💡 <b>Tavsiya {page}/{total_pages}</b>\n\n" + card.text
     
     # Navigatsiya tugmalari
     nav_buttons = []
@@ -948,62 +876,13 @@ def show_recommended_page(chat_id, page, message_id=None):
     if page < total_pages:
         nav_buttons.append(InlineKeyboardButton('Keyingi ▶️', callback_data=f'rec_page_{page+1}'))
     
-    if nav_buttons:
-        markup.row(*nav_buttons)
-    
-    markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_startups_menu'))
+    extra_rows = [nav_buttons] if nav_buttons else []
+    extra_rows.append([InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_startups_menu')])
+    markup = card.markup(extra_rows)
     
-    try:
-        if message_id:
-            if startup.get('logo'):
-                try:
-                    bot.edit_message_media(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        media=types.InputMediaPhoto(startup['logo'], caption=text),
-                        reply_markup=markup
-                    )
-                except:
-                    try:
-                        bot.edit_message_caption(
-                            chat_id=chat_id,
-                            message_id=message_id,
-                            caption=text,
-                            reply_markup=markup
-                        )
-                    except:
-                        try:
-                            bot.delete_message(chat_id, message_id)
-                        except:
-                            pass
-                        msg = bot.send_photo(chat_id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                try:
-                    bot.edit_message_text(
-                        text=text,
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        reply_markup=markup
-                    )
-                except:
-                    try:
-                        bot.delete_message(chat_id, message_id)
-                    except:
-                        pass
-                    bot.send_message(chat_id, text, reply_markup=markup)
-        else:
-            if startup.get('logo'):
-                bot.send_photo(chat_id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                bot.send_message(chat_id, text, reply_markup=markup)
-    except Exception as e:
-        logging.error(f"Xabar yuborish/yangilashda xatolik: {e}")
-        if startup.get('logo'):
-            bot.send_photo(chat_id, startup['logo'], caption=text, reply_markup=markup)
-        else:
-            bot.send_message(chat_id, text, reply_markup=markup)
+    renderer.show(chat_id, text, markup, photo=card.logo, message_id=message_id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('rec_page_'))
+@router.callback_prefix('rec_page_')
 def handle_recommended_page(call):
     try:
         page = int(call.data.split('_')[2])
@@ -1013,48 +892,16 @@ def handle_recommended_page(call):
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
 # 🔎 KATEGORIYA BO'YICHA
-@bot.message_handler(func=lambda message: message.text == '🔎 Kategoriya bo\'yicha' and get_user_state(message.from_user.id) == 'in_startups_menu')
+@router.text('🔎 Kategoriya bo\'yicha', guard=state_guard('in_startups_menu'))
 def show_categories(message):
     user_id = message.from_user.id
     set_user_state(user_id, 'choosing_category')
     
-    categories = get_all_categories()
-    
-    markup = InlineKeyboardMarkup(row_width=2)
-    
-    if categories:
-        for category in categories:
-            category_emojis = {
-                'Biznes': '💼',
-                'Sog\'liq': '🏥',
-                'Texnologiya': '📱',
-                'Ekologiya': '🌿',
-                'Ta\'lim': '🎓',
-                'Dizayn': '🎨',
-                'Dasturlash': '💻',
-                'Savdo': '🛒',
-                'Media': '🎬',
-                'Karyera': '💼'
-            }
-            emoji = category_emojis.get(category, '🏷️')
-            markup.add(InlineKeyboardButton(f'{emoji} {category}', callback_data=f'category_{category}'))
-    else:
-        markup.add(InlineKeyboardButton('💼 Biznes', callback_data='category_Biznes'))
-        markup.add(InlineKeyboardButton('🏥 Sog\'liq', callback_data='category_Sog\'liq'))
-        markup.add(InlineKeyboardButton('📱 Texnologiya', callback_data='category_Texnologiya'))
-        markup.add(InlineKeyboardButton('🌿 Ekologiya', callback_data='category_Ekologiya'))
-        markup.add(InlineKeyboardButton('🎓 Ta\'lim', callback_data='category_Ta\'lim'))
-        markup.add(InlineKeyboardButton('🎨 Dizayn', callback_data='category_Dizayn'))
-        markup.add(InlineKeyboardButton('💻 Dasturlash', callback_data='category_Dasturlash'))
-        markup.add(InlineKeyboardButton('🛒 Savdo', callback_data='category_Savdo'))
-        markup.add(InlineKeyboardButton('🎬 Media', callback_data='category_Media'))
-        markup.add(InlineKeyboardButton('💼 Karyera', callback_data='category_Karyera'))
-    
-    markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_startups_menu'))
+    markup = get_category_keyboard()
     
     bot.send_message(message.chat.id, "🏷️ <b>Kategoriya tanlang:</b>", reply_markup=markup)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('category_'))
+@router.callback_prefix('category_')
 def handle_category_selection(call):
     try:
         category_name = call.data.split('_')[1]
@@ -1066,52 +913,22 @@ def handle_category_selection(call):
 
 def show_category_startups(chat_id, category_name, page, message_id=None):
     try:
-        startups = get_startups_by_category(category_name)
+        per_page = 5
+        page_startups, total = get_startups_by_category_page(category_name, page, per_page)
         
-        if not startups:
+        if not page_startups:
             markup = InlineKeyboardMarkup()
             markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_categories'))
             
-            if message_id:
-                try:
-                    bot.edit_message_text(
-                        f"🏷️ <b>{category_name}</b> kategoriyasida hozircha startup mavjud emas.",
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        reply_markup=markup
-                    )
-                except:
-                    bot.send_message(chat_id, 
-                                    f"🏷️ <b>{category_name}</b> kategoriyasida hozircha startup mavjud emas.",
-                                    reply_markup=markup)
-            else:
-                bot.send_message(chat_id, 
-                                f"🏷️ <b>{category_name}</b> kategoriyasida hozircha startup mavjud emas.",
-                                reply_markup=markup)
+            renderer.show(chat_id, f"🏷️ <b>{category_name}</b> kategoriyasida hozircha startup mavjud emas.",
+                          markup, message_id=message_id)
             return
         
-        per_page = 5
-        total = len(startups)
         total_pages = max(1, (total + per_page - 1) // per_page)
         page = min(max(1, page), total_pages)
-        
         start_idx = (page - 1) * per_page
-        end_idx = min(start_idx + per_page, total)
-        page_startups = startups[start_idx:end_idx]
-        
-        category_emojis = {
-            'Biznes': '💼',
-            'Sog\'liq': '🏥',
-            'Texnologiya': '📱',
-            'Ekologiya': '🌿',
-            'Ta\'lim': '🎓',
-            'Dizayn': '🎨',
-            'Dasturlash': '💻',
-            'Savdo': '🛒',
-            'Media': '🎬',
-            'Karyera': '💼'
-        }
-        emoji = category_emojis.get(category_name, '🏷️')
+        
+        emoji = CATEGORY_EMOJIS.get(category_name, '🏷️')
         
         text = f"{emoji} <b>{category_name} startaplari</b>\n\n"
         
@@ -1119,8 +936,7 @@ def show_category_startups(chat_id, category_name, page, message_id=None):
             user = get_user(startup['owner_id'])
             owner_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
             
-            # A'zolar sonini olish
-            current_members = get_startup_member_count(startup['_id'])
+            current_members = startup.get('current_members', 0)
             max_members = startup.get('max_members', 10)
             
             status_emoji = '✅' if current_members < max_members else '❌'
@@ -1130,10 +946,8 @@ def show_category_startups(chat_id, category_name, page, message_id=None):
         
         # Raqamli tugmalar
         numbers = []
-        for i in range(start_idx+1, start_idx+len(page_startups)+1):
-            startup_idx = i - 1
-            if startup_idx < len(startups):
-                numbers.append(InlineKeyboardButton(f'{i}️⃣', callback_data=f'cat_startup_{startups[startup_idx]["_id"]}'))
+        for i, startup in enumerate(page_startups, start=start_idx+1):
+            numbers.append(InlineKeyboardButton(f'{i}️⃣', callback_data=f'cat_startup_{startup["_id"]}'))
         
         if numbers:
             markup.row(*numbers)
@@ -1150,27 +964,12 @@ def show_category_startups(chat_id, category_name, page, message_id=None):
         
         markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_categories'))
         
-        if message_id:
-            try:
-                bot.edit_message_text(
-                    text=text,
-                    chat_id=chat_id,
-                    message_id=message_id,
-                    reply_markup=markup
-                )
-            except:
-                try:
-                    bot.delete_message(chat_id, message_id)
-                except:
-                    pass
-                bot.send_message(chat_id, text, reply_markup=markup)
-        else:
-            bot.send_message(chat_id, text, reply_markup=markup)
+        renderer.show(chat_id, text, markup, message_id=message_id)
     except Exception as e:
         logging.error(f"Show category startups error: {e}")
         bot.send_message(chat_id, f"⚠️ Xatolik yuz berdi!", reply_markup=create_back_button(True))
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('cat_page_'))
+@router.callback_prefix('cat_page_')
 def handle_category_page(call):
     try:
         parts = call.data.split('_')
@@ -1182,88 +981,20 @@ def handle_category_page(call):
         logging.error(f"Category page error: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('cat_startup_'))
+@router.callback_prefix('cat_startup_')
 def handle_category_startup_view(call):
     try:
         startup_id = call.data.split('_')[2]
-        startup = get_startup(startup_id)
+        card = render_startup_card(startup_id, ROLE_PUBLIC)
         
-        if not startup:
+        if not card:
             bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
             return
         
-        # A'zolar sonini olish
-        current_members = get_startup_member_count(startup_id)
-        max_members = startup.get('max_members', 10)
-        
-        user = get_user(startup['owner_id'])
-        owner_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
-        
-        # Sanani formatlash
-        start_date = startup.get('started_at', '—')
-        if start_date and start_date != '—':
-            if isinstance(start_date, datetime):
-                start_date = start_date.strftime('%d-%m-%Y')
-            else:
-                try:
-                    start_date = datetime.fromisoformat(str(start_date)).strftime('%d-%m-%Y')
-                except:
-                    pass
-        
-        text = (
-            f"🎯 <b>Nomi:</b> {startup['name']}\n"
-            f"📅 <b>Boshlangan sana:</b> {start_date}\n"
-            f"👤 <b>Muallif:</b> {owner_name}\n"
-            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
-            f"🔧 <b>Kerakli mutaxassislar:</b> {startup.get('required_skills', '—')}\n"
-            f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n"
-            f"📌 <b>Tavsif:</b> {startup['description']}"
-        )
-        
-        markup = InlineKeyboardMarkup()
+        text = card.text
+        markup = card.markup([[InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_categories')]])
         
-        # Agar a'zolar to'liq bo'lsa
-        if current_members >= max_members:
-            markup.add(InlineKeyboardButton('❌ A\'zolar to\'ldi', callback_data='full_members'))
-        else:
-            markup.add(InlineKeyboardButton('🤝 Startupga Qo\'shilish', callback_data=f'join_startup_{startup_id}'))
-        
-        markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_categories'))
-        
-        try:
-            if startup.get('logo'):
-                try:
-                    bot.edit_message_media(
-                        chat_id=call.message.chat.id,
-                        message_id=call.message.message_id,
-                        media=types.InputMediaPhoto(startup['logo'], caption=text),
-                        reply_markup=markup
-                    )
-                except:
-                    try:
-                        bot.edit_message_caption(
-                            chat_id=call.message.chat.id,
-                            message_id=call.message.message_id,
-                            caption=text,
-                            reply_markup=markup
-                        )
-                    except:
-                        bot.send_photo(call.message.chat.id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                try:
-                    bot.edit_message_text(
-                        text=text,
-                        chat_id=call.message.chat.id,
-                        message_id=call.message.message_id,
-                        reply_markup=markup
-                    )
-                except:
-                    bot.send_message(call.message.chat.id, text, reply_markup=markup)
-        except:
-            if startup.get('logo'):
-                bot.send_photo(call.message.chat.id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                bot.send_message(call.message.chat.id, text, reply_markup=markup)
+        renderer.show(call.message.chat.id, text, markup, photo=card.logo, message_id=call.message.message_id)
         
         bot.answer_callback_query(call.id)
     except Exception as e:
@@ -1271,7 +1002,7 @@ def handle_category_startup_view(call):
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
 # 🤝 QO'SHILISH JARAYONI
-@bot.callback_query_handler(func=lambda call: call.data.startswith('join_startup_'))
+@router.callback_prefix('join_startup_')
 def handle_join_startup(call):
     try:
         startup_id = call.data.replace('join_startup_', '', 1)
@@ -1284,7 +1015,7 @@ def handle_join_startup(call):
             return
 
         # A'zolar sonini tekshirish
-        current_members = get_startup_member_count(startup_id)
+        current_members = startup.get('current_members', 0)
         max_members = startup.get('max_members', 10)
         if current_members >= max_members:
             bot.answer_callback_query(call.id, "❌ A'zolar to'ldi!", show_alert=True)
@@ -1360,7 +1091,7 @@ def handle_join_startup(call):
         logging.error(f"Join startup xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('approve_join_'))
+@router.callback_prefix('approve_join_')
 def approve_join_request(call):
     try:
         request_id = call.data.split('_')[2]
@@ -1381,7 +1112,7 @@ def approve_join_request(call):
             bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
             return
         
-        current_members = get_startup_member_count(startup_id)
+        current_members = startup.get('current_members', 0)
         max_members = startup.get('max_members', 10)
         
         if current_members >= max_members:
@@ -1410,12 +1141,9 @@ def approve_join_request(call):
                 pass
             return
         
-        # So'rov holatini yangilash
+        # So'rov holatini yangilash (current_members shu yerda oshiriladi)
         update_join_request(request_id, 'accepted')
         
-        # A'zolar sonini yangilash
-        update_startup_member_count(startup_id)
-        
         if startup:
             # Foydalanuvchiga xabar
             try:
@@ -1450,7 +1178,7 @@ def approve_join_request(call):
         logging.error(f"Approve join xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('reject_join_'))
+@router.callback_prefix('reject_join_')
 def reject_join_request(call):
     try:
         request_id = call.data.split('_')[2]
@@ -1488,7 +1216,7 @@ def reject_join_request(call):
         logging.error(f"Reject join xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'full_members')
+@router.callback('full_members')
 def handle_full_members(call):
     bot.answer_callback_query(call.id, "❌ A'zolar to'ldi!", show_alert=True)
 
@@ -1497,7 +1225,7 @@ def handle_full_members(call):
 # bot_part2.py - Bu qismni bot_part1.py ga qo'shish kerak
 
 # 🚀 STARTUP YARATISH
-@bot.message_handler(func=lambda message: message.text == '🚀 Startup yaratish')
+@router.text('🚀 Startup yaratish')
 def start_creation(message):
     user_id = message.from_user.id
     
@@ -1536,65 +1264,13 @@ def start_creation(message):
             bot.send_message(message.chat.id, text, reply_markup=markup)
             return
     
-    set_user_state(user_id, 'creating_startup')
-    
-    msg = bot.send_message(message.chat.id, 
-                          "📝 <b>Startup nomini kiriting:</b>", 
-                          reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_startup_name)
+    conversations.start(message.chat.id, 'create_startup')
 
-def process_startup_name(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_data(user_id)
-        show_main_menu(message)
-        return
-    
-    if not hasattr(message, 'text') or not message.text:
-        bot.send_message(message.chat.id, "❌ <b>Iltimos, startup nomini kiriting!</b>", reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "📝 <b>Startup nomini kiriting:</b>", reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_startup_name)
-        return
-    
-    startup_name = message.text.strip()
-    
-    # Global category_data ga saqlaymiz
-    global category_data
-    category_data[user_id] = {
-        'owner_id': user_id,
-        'name': startup_name
-    }
-    
-    msg = bot.send_message(message.chat.id, "📝 <b>Startup tavsifini kiriting:</b>", reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_startup_description)
+def cancel_startup_creation(message, ctx):
+    clear_user_data(message.from_user.id)
+    show_main_menu(message)
 
-def process_startup_description(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_data(user_id)
-        show_main_menu(message)
-        return
-    
-    if not hasattr(message, 'text') or not message.text:
-        bot.send_message(message.chat.id, "❌ <b>Iltimos, startup tavsifini kiriting!</b>", reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "📝 <b>Startup tavsifini kiriting:</b>", reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_startup_description)
-        return
-    
-    description = message.text.strip()
-    
-    global category_data
-    if user_id in category_data:
-        category_data[user_id]['description'] = description
-    else:
-        category_data[user_id] = {
-            'owner_id': user_id,
-            'description': description
-        }
-    
-    # Kategoriya tanlash
+def ask_startup_category(ctx):
     markup = InlineKeyboardMarkup(row_width=2)
     markup.add(
         InlineKeyboardButton('💼 Biznes', callback_data='create_cat_Biznes'),
@@ -1610,10 +1286,53 @@ def process_startup_description(message):
     )
     markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_main_menu_create'))
     
-    bot.send_message(message.chat.id, "🏷️ <b>Kategoriya tanlang:</b>", reply_markup=markup)
+    bot.send_message(ctx.chat_id, "🏷️ <b>Kategoriya tanlang:</b>", reply_markup=markup)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_main_menu_create')
-def handle_back_to_main_menu_from_create(call):
+def ask_startup_logo(ctx):
+    markup = ReplyKeyboardMarkup(resize_keyboard=True)
+    markup.add(KeyboardButton('Skip'))
+    markup.add(KeyboardButton('🔙 Orqaga'))
+    
+    bot.send_message(ctx.chat_id,
+                     "🖼 <b>Logo (rasm) yuboring yoki \"Skip\" tugmasini bosing:</b>",
+                     reply_markup=markup)
+
+def validate_group_link(message) -> str:
+    link = (message.text or '').strip()
+    if not (link.startswith('https://t.me/') or link.startswith('@')):
+        raise Invalid("⚠️ <b>Noto'g'ri havola format!</b>\n\n"
+                      "Iltimos, Telegram guruh yoki kanal havolasini kiriting:\n"
+                      "• https://t.me/GarajHub_uz\n"
+                      "• @Garajhub_uz")
+    return link
+
+def validate_max_members(message) -> int:
+    try:
+        max_members = int(message.text or '')
+        if max_members <= 0:
+            raise ValueError
+    except ValueError:
+        raise Invalid("⚠️ <b>Iltimos, musbat raqam kiriting!</b>")
+    return max_members
+
+# Nomi -> tavsif -> kategoriya (inline tugma) -> logo -> havola -> mutaxassislar -> a'zolar soni
+create_flow = conversations.flow('create_startup', on_cancel=cancel_startup_creation, on_invalid=send_invalid)
+
+@create_flow.step('name', prompt=ask_text("📝 <b>Startup nomini kiriting:</b>"),
+                  validate=text_value("❌ <b>Iltimos, startup nomini kiriting!</b>"), next='description')
+def process_startup_name(message, ctx, startup_name):
+    ctx.data['name'] = startup_name
+
+@create_flow.step('description', prompt=ask_text("📝 <b>Startup tavsifini kiriting:</b>"),
+                  validate=text_value("❌ <b>Iltimos, startup tavsifini kiriting!</b>"), next='category')
+def process_startup_description(message, ctx, description):
+    ctx.data['description'] = description
+
+# Kategoriya callback orqali tanlanadi (handle_create_category)
+create_flow.wait('category', prompt=ask_startup_category)
+
+@router.callback('back_to_main_menu_create')
+def handle_back_to_main_menu_from_create(call):
     """Startup yaratishdan asosiy menyuga qaytish"""
     try:
         user_id = call.from_user.id
@@ -1624,7 +1343,7 @@ def handle_back_to_main_menu_from_create(call):
         logging.error(f"back_to_main_menu_create xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('create_cat_'))
+@router.callback_prefix('create_cat_')
 def handle_create_category(call):
     try:
         category_map = {
@@ -1645,148 +1364,45 @@ def handle_create_category(call):
             return
         
         category_name = category_map[call.data]
-        user_id = call.from_user.id
-        
-        # Global category_data ni yangilash
-        global category_data
-        if user_id not in category_data:
-            category_data[user_id] = {}
-        
-        category_data[user_id]['category'] = category_name
-        
-        # State ni saqlash
-        set_user_state(user_id, 'creating_startup_logo')
         
         try:
             bot.delete_message(call.message.chat.id, call.message.message_id)
         except:
             pass
         
-        markup = ReplyKeyboardMarkup(resize_keyboard=True)
-        markup.add(KeyboardButton('Skip'))
-        markup.add(KeyboardButton('🔙 Orqaga'))
-        
-        msg = bot.send_message(call.message.chat.id,
-                              "🖼 <b>Logo (rasm) yuboring yoki \"Skip\" tugmasini bosing:</b>",
-                              reply_markup=markup)
-        bot.register_next_step_handler(msg, process_startup_logo)
+        ctx = conversations.goto(call.message.chat.id, 'logo', flow_name='create_startup', category=category_name)
+        if ctx is None:
+            bot.answer_callback_query(call.id, "❌ Ma'lumotlar saqlanmagan. Iltimos, qaytadan boshlang.", show_alert=True)
+            return
         
         bot.answer_callback_query(call.id)
     except Exception as e:
         logging.error(f"Kategoriya tanlash xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-def process_startup_logo(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_data(user_id)
-        show_main_menu(message)
-        return
-    
-    global category_data
-    if user_id not in category_data:
-        category_data[user_id] = {}
-    
-    if message.text == 'Skip':
-        category_data[user_id]['logo'] = None
-    elif message.photo:
-        category_data[user_id]['logo'] = message.photo[-1].file_id
-    else:
-        # Agar rasm emas matn kiritilsa
-        category_data[user_id]['logo'] = None
-    
-    msg = bot.send_message(message.chat.id,
-                          "🔗 <b>Guruh yoki kanal havolasini kiriting:</b>\n\n"
-                          "Masalan: https://t.me/GarajHub_uz yoki @GarajHub_uz",
-                          reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_startup_group_link)
-
-def process_startup_group_link(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_data(user_id)
-        show_main_menu(message)
-        return
-    
-    # Havola formatini tekshirish
-    link = message.text.strip()
-    if not (link.startswith('https://t.me/') or link.startswith('@')):
-        msg = bot.send_message(message.chat.id,
-                              "⚠️ <b>Noto'g'ri havola format!</b>\n\n"
-                              "Iltimos, Telegram guruh yoki kanal havolasini kiriting:\n"
-                              "• https://t.me/GarajHub_uz\n"
-                              "• @Garajhub_uz\n\n"
-                              "Yoki '🔙 Orqaga' tugmasini bosing:",
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_startup_group_link)
-        return
-    
-    global category_data
-    if user_id not in category_data:
-        category_data[user_id] = {}
-    
-    category_data[user_id]['group_link'] = link
-    
-    msg = bot.send_message(message.chat.id,
-                          "🔧 <b>Kerakli mutaxassislarni kiriting:</b>\n\n"
-                          "Masalan: Python, Designer, Manager",
-                          reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_startup_skills)
-
-def process_startup_skills(message):
-    user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_data(user_id)
-        show_main_menu(message)
-        return
-    
-    global category_data
-    if user_id not in category_data:
-        category_data[user_id] = {}
-    
-    skills = message.text.strip()
-    category_data[user_id]['required_skills'] = skills
-    
-    msg = bot.send_message(message.chat.id,
-                          "👥 <b>Maksimal a'zolar sonini kiriting (sizga qancha a'zo kerak):</b>\n\n"
-                          "Masalan: 10",
-                          reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_startup_max_members)
-
-def process_startup_max_members(message):
+@create_flow.step('logo', prompt=ask_startup_logo, next='group_link')
+def process_startup_logo(message, ctx):
+    # "Skip" yoki rasm emas matn - logosiz
+    ctx.data['logo'] = message.photo[-1].file_id if message.photo else None
+
+@create_flow.step('group_link', prompt=ask_text("🔗 <b>Guruh yoki kanal havolasini kiriting:</b>\n\n"
+                                                "Masalan: https://t.me/GarajHub_uz yoki @GarajHub_uz"),
+                  validate=validate_group_link, next='skills')
+def process_startup_group_link(message, ctx, link):
+    ctx.data['group_link'] = link
+
+@create_flow.step('skills', prompt=ask_text("🔧 <b>Kerakli mutaxassislarni kiriting:</b>\n\n"
+                                            "Masalan: Python, Designer, Manager"),
+                  validate=text_value("❌ <b>Iltimos, kerakli mutaxassislarni kiriting!</b>"), next='max_members')
+def process_startup_skills(message, ctx, skills):
+    ctx.data['required_skills'] = skills
+
+@create_flow.step('max_members', prompt=ask_text("👥 <b>Maksimal a'zolar sonini kiriting (sizga qancha a'zo kerak):</b>\n\n"
+                                                 "Masalan: 10"),
+                  validate=validate_max_members)
+def process_startup_max_members(message, ctx, max_members):
     user_id = message.from_user.id
-    
-    if message.text == '🔙 Orqaga':
-        clear_user_data(user_id)
-        show_main_menu(message)
-        return
-    
-    try:
-        max_members = int(message.text)
-        if max_members <= 0:
-            raise ValueError
-    except ValueError:
-        msg = bot.send_message(message.chat.id,
-                              "⚠️ <b>Iltimos, musbat raqam kiriting!</b>\n\n"
-                              "Masalan: 10",
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_startup_max_members)
-        return
-    
-    global category_data
-    if user_id not in category_data:
-        bot.send_message(message.chat.id,
-                        "❌ <b>Ma'lumotlar saqlanmagan. Iltimos, qaytadan boshlang.</b>",
-                        reply_markup=create_back_button())
-        clear_user_data(user_id)
-        show_main_menu(message)
-        return
-    
-    data = category_data[user_id]
-    data['max_members'] = max_members
+    data = dict(ctx.data, owner_id=user_id, max_members=max_members)
     
     # Barcha kerakli ma'lumotlarni tekshirish
     required_fields = ['owner_id', 'name', 'description', 'category', 'group_link']
@@ -1871,20 +1487,19 @@ def process_startup_max_members(message):
         InlineKeyboardButton('❌ Rad etish', callback_data=f'admin_reject_{startup_id}')
     )
     
-    for admin_chat_id in ADMIN_IDS:
-        try:
-            if startup.get('logo'):
-                bot.send_photo(admin_chat_id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                bot.send_message(admin_chat_id, text, reply_markup=markup)
-        except Exception as e:
-            logging.error(f"Adminga xabar yuborishda xatolik ({admin_chat_id}): {e}")
+    def notify_admin(admin_chat_id):
+        if startup.get('logo'):
+            bot.send_photo(admin_chat_id, startup['logo'], caption=text, reply_markup=markup)
+        else:
+            bot.send_message(admin_chat_id, text, reply_markup=markup)
+    
+    fanout.send(ADMIN_IDS, notify_admin, label="Yangi startup admin xabari")
     
     # Ma'lumotlarni tozalash
     clear_user_data(user_id)
 
 # 📌 STARTAPLARIM BO'LIMI
-@bot.message_handler(func=lambda message: message.text == '📌 Startaplarim')
+@router.text('📌 Startaplarim')
 def show_my_startups_main(message):
     user_id = message.from_user.id
     set_user_state(user_id, 'in_my_startups')
@@ -1898,12 +1513,11 @@ def show_my_startups_main(message):
     
     bot.send_message(message.chat.id, "📌 <b>Startaplarim bo'limi:</b>\n\nKerakli bo'limni tanlang:", reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '📋 Mening startaplarim' and get_user_state(message.from_user.id) == 'in_my_startups')
+@router.text('📋 Mening startaplarim', guard=state_guard('in_my_startups'))
 def show_my_startups_list(message):
     user_id = message.from_user.id
-    startups = get_startups_by_owner(user_id)
     
-    if not startups:
+    if not get_user_startup_count(user_id):
         bot.send_message(message.chat.id,
                         "📭 <b>Sizda hali startup mavjud emas.</b>",
                         reply_markup=create_back_button(True))
@@ -1912,16 +1526,11 @@ def show_my_startups_list(message):
     show_my_startups_page(message.chat.id, user_id, 1)
 
 def show_my_startups_page(chat_id, user_id, page, message_id=None):
-    startups = get_startups_by_owner(user_id)
-    
     per_page = 5
-    total = len(startups)
+    page_startups, total = get_startups_by_owner_page(user_id, page, per_page)
     total_pages = max(1, (total + per_page - 1) // per_page)
     page = min(max(1, page), total_pages)
-    
     start_idx = (page - 1) * per_page
-    end_idx = min(start_idx + per_page, total)
-    page_startups = startups[start_idx:end_idx]
     
     text = f"📋 <b>Mening startaplarim</b>\n\n"
     
@@ -1940,9 +1549,7 @@ def show_my_startups_page(chat_id, user_id, page, message_id=None):
     # Raqamli tugmalar
     buttons = []
     for i in range(start_idx + 1, start_idx + len(page_startups) + 1):
-        startup_idx = i - 1
-        if startup_idx < len(startups):
-            buttons.append(InlineKeyboardButton(f'{i}️⃣', callback_data=f'my_startup_num_{startup_idx}'))
+        buttons.append(InlineKeyboardButton(f'{i}️⃣', callback_data=f'my_startup_num_{i - 1}'))
     
     if buttons:
         markup.row(*buttons)
@@ -1959,24 +1566,9 @@ def show_my_startups_page(chat_id, user_id, page, message_id=None):
     
     markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_my_startups'))
     
-    if message_id:
-        try:
-            bot.edit_message_text(
-                text=text,
-                chat_id=chat_id,
-                message_id=message_id,
-                reply_markup=markup
-            )
-        except:
-            try:
-                bot.delete_message(chat_id, message_id)
-            except:
-                pass
-            bot.send_message(chat_id, text, reply_markup=markup)
-    else:
-        bot.send_message(chat_id, text, reply_markup=markup)
+    renderer.show(chat_id, text, markup, message_id=message_id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('my_startup_page_'))
+@router.callback_prefix('my_startup_page_')
 def handle_my_startup_page(call):
     try:
         page = int(call.data.split('_')[3])
@@ -1987,119 +1579,37 @@ def handle_my_startup_page(call):
         logging.error(f"My startup page error: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('my_startup_num_'))
+@router.callback_prefix('my_startup_num_')
 def handle_my_startup_number(call):
     try:
         idx = int(call.data.split('_')[3])
         user_id = call.from_user.id
-        startups = get_startups_by_owner(user_id)
+        startup = get_startup_by_owner_index(user_id, idx)
         
-        if idx < 0 or idx >= len(startups):
+        if not startup:
             bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
             return
         
-        startup = startups[idx]
         view_my_startup_details(call.message.chat.id, user_id, startup, call.message.message_id)
         bot.answer_callback_query(call.id)
     except Exception as e:
         logging.error(f"My startup number error: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
+def get_owned_startup(user_id, startup_id):
+    startup = get_startup(startup_id)
+    if startup and startup['owner_id'] == user_id:
+        return startup
+    return None
+
 def view_my_startup_details(chat_id, user_id, startup, message_id=None):
-    user = get_user(startup['owner_id'])
-    owner_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
+    card = render_startup_card(startup['_id'], ROLE_OWNER, startup=startup)
+    text = card.text
+    markup = card.markup([[InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_my_startups_list')]])
     
-    # A'zolar soni
-    current_members = get_startup_member_count(startup['_id'])
-    max_members = startup.get('max_members', 10)
-    
-    status_texts = {
-        'pending': '⏳ Kutilmoqda',
-        'active': '▶️ Faol',
-        'completed': '✅ Yakunlangan',
-        'rejected': '❌ Rad etilgan'
-    }
-    status_text = status_texts.get(startup['status'], startup['status'])
-    
-    # Sanani formatlash
-    start_date = startup.get('started_at', '—')
-    if start_date and start_date != '—':
-        if isinstance(start_date, datetime):
-            start_date = start_date.strftime('%d-%m-%Y')
-        else:
-            try:
-                start_date = datetime.fromisoformat(str(start_date)).strftime('%d-%m-%Y')
-            except:
-                pass
-    
-    text = (
-        f"🎯 <b>Nomi:</b> {startup['name']}\n"
-        f"📊 <b>Holati:</b> {status_text}\n"
-        f"📅 <b>Boshlanish sanasi:</b> {start_date}\n"
-        f"👤 <b>Muallif:</b> {owner_name}\n"
-        f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
-        f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n"
-        f"📌 <b>Tavsif:</b> {startup['description']}"
-    )
-    
-    markup = InlineKeyboardMarkup()
-    
-    if startup['status'] == 'pending':
-        markup.add(InlineKeyboardButton('⏳ Admin tasdig\'ini kutyapti', callback_data='waiting_approval'))
-    elif startup['status'] == 'active':
-        markup.add(InlineKeyboardButton('👥 A\'zolar', callback_data=f'view_members_{startup["_id"]}_1'))
-        markup.add(InlineKeyboardButton('⏹️ Yakunlash', callback_data=f'complete_startup_{startup["_id"]}'))
-    elif startup['status'] == 'completed':
-        markup.add(InlineKeyboardButton('👥 A\'zolar', callback_data=f'view_members_{startup["_id"]}_1'))
-        if startup.get('results'):
-            markup.add(InlineKeyboardButton('📊 Natijalar', callback_data=f'view_results_{startup["_id"]}'))
-    elif startup['status'] == 'rejected':
-        markup.add(InlineKeyboardButton('❌ Rad etilgan', callback_data='rejected_info'))
-    
-    markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_my_startups_list'))
-    
-    if message_id:
-        try:
-            if startup.get('logo'):
-                try:
-                    bot.edit_message_media(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        media=types.InputMediaPhoto(startup['logo'], caption=text),
-                        reply_markup=markup
-                    )
-                except:
-                    try:
-                        bot.edit_message_caption(
-                            chat_id=chat_id,
-                            message_id=message_id,
-                            caption=text,
-                            reply_markup=markup
-                        )
-                    except:
-                        bot.send_photo(chat_id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                try:
-                    bot.edit_message_text(
-                        text=text,
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        reply_markup=markup
-                    )
-                except:
-                    bot.send_message(chat_id, text, reply_markup=markup)
-        except:
-            if startup.get('logo'):
-                bot.send_photo(chat_id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                bot.send_message(chat_id, text, reply_markup=markup)
-    else:
-        if startup.get('logo'):
-            bot.send_photo(chat_id, startup['logo'], caption=text, reply_markup=markup)
-        else:
-            bot.send_message(chat_id, text, reply_markup=markup)
+    renderer.show(chat_id, text, markup, photo=startup.get('logo'), message_id=message_id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('view_members_'))
+@router.callback_prefix('view_members_')
 def view_startup_members(call):
     try:
         parts = call.data.split('_')
@@ -2144,121 +1654,93 @@ def view_startup_members(call):
         
         markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data=f'back_to_my_startup_{startup_id}'))
         
-        try:
-            bot.edit_message_text(
-                text=text,
-                chat_id=call.message.chat.id,
-                message_id=call.message.message_id,
-                reply_markup=markup
-            )
-        except:
-            bot.send_message(call.message.chat.id, text, reply_markup=markup)
+        renderer.show(call.message.chat.id, text, markup, message_id=call.message.message_id)
         
         bot.answer_callback_query(call.id)
     except Exception as e:
         logging.error(f"View members xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('complete_startup_'))
+@router.callback_prefix('complete_startup_')
 def complete_startup(call):
     try:
         startup_id = call.data.split('_')[2]
-        user_id = call.from_user.id
-        set_user_state(user_id, f'completing_startup_{startup_id}')
-        
-        msg = bot.send_message(call.message.chat.id, 
-                              "📝 <b>Nimalarga erishdingiz?</b>\nNatijalarni yozing:", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_startup_results, startup_id)
+        conversations.start(call.message.chat.id, 'complete_startup', {'startup_id': startup_id})
         
         bot.answer_callback_query(call.id)
     except:
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-def process_startup_results(message, startup_id):
+def cancel_startup_completion(message, ctx):
+    user_id = message.from_user.id
+    clear_user_state(user_id)
+    # Startup ko'rinishiga qaytish
+    startup = get_owned_startup(user_id, ctx.data['startup_id'])
+    if startup:
+        view_my_startup_details(message.chat.id, user_id, startup)
+
+def validate_results_photo(message) -> str:
+    if not message.photo:
+        raise Invalid("⚠️ <b>Iltimos, rasm yuboring!</b>")
+    return message.photo[-1].file_id
+
+complete_flow = conversations.flow('complete_startup', on_cancel=cancel_startup_completion, on_invalid=send_invalid)
+
+@complete_flow.step('results', prompt=ask_text("📝 <b>Nimalarga erishdingiz?</b>\nNatijalarni yozing:"),
+                    validate=text_value("❌ <b>Natijalar kiritilmadi!</b>"), next='photo')
+def process_startup_results(message, ctx, results):
+    ctx.data['results_text'] = escape_html(results)
+
+@complete_flow.step('photo', prompt=ask_text("🖼 <b>Natijalar rasmini yuboring:</b>"),
+                    validate=validate_results_photo, back='results')
+def process_startup_photo(message, ctx, photo_id):
     user_id = message.from_user.id
+    startup_id = ctx.data['startup_id']
+    results_text = ctx.data['results_text']
     
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        # Startup ko'rinishiga qaytish
-        startups = get_startups_by_owner(user_id)
-        for startup in startups:
-            if startup['_id'] == startup_id:
-                view_my_startup_details(message.chat.id, user_id, startup)
-                break
-        return
+    # Startup holati va natijalarini yangilash
+    update_startup_status(startup_id, 'completed')
+    update_startup_results(startup_id, results_text, datetime.now())
     
-    results_text = escape_html(message.text)
+    # Barcha a'zolarni olish
+    members = get_all_startup_members(startup_id)
     
-    msg = bot.send_message(message.chat.id, 
-                          "🖼 <b>Natijalar rasmini yuboring:</b>", 
-                          reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_startup_photo, startup_id, results_text)
-
-def process_startup_photo(message, startup_id, results_text):
-    user_id = message.from_user.id
+    # Barcha a'zolarga xabar fonda yuboriladi, egaga natija keyin keladi
+    startup = get_startup(startup_id)
+    end_date = datetime.now().strftime('%d-%m-%Y')
+    caption = (
+        f"🏁 <b>Startup yakunlandi</b>\n\n"
+        f"🎯 <b>{startup['name']}</b>\n"
+        f"📅 <b>Yakunlangan sana:</b> {end_date}\n"
+        f"📝 <b>Natijalar:</b> {results_text}"
+    )
+    chat_id = message.chat.id
+    
+    def report(result):
+        bot.send_message(chat_id, f"📤 Xabar yuborildi: {result.sent} ta a'zoga")
+    
+    bot.send_message(chat_id, 
+                    f"✅ <b>Startup muvaffaqiyatli yakunlandi!</b>\n\n"
+                    f"📤 {len(members)} ta a'zoga xabar yuborilmoqda...")
+    fanout.send(
+        members,
+        lambda member_id: bot.send_photo(member_id, photo_id, caption=caption),
+        label=f"Startup #{startup_id} yakuni",
+        on_done=report if members else None,
+    )
     
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        msg = bot.send_message(message.chat.id, 
-                              "📝 <b>Nimalarga erishdingiz?</b>", 
-                              reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_startup_results, startup_id)
-        return
+    clear_user_state(user_id)
     
-    if message.photo:
-        photo_id = message.photo[-1].file_id
-        
-        # Startup holati va natijalarini yangilash
-        update_startup_status(startup_id, 'completed')
-        update_startup_results(startup_id, results_text, datetime.now())
-        
-        # Barcha a'zolarni olish
-        members = get_all_startup_members(startup_id)
-        
-        # Barcha a'zolarga xabar yuborish
-        startup = get_startup(startup_id)
-        end_date = datetime.now().strftime('%d-%m-%Y')
-        success_count = 0
-        
-        for member_id in members:
-            try:
-                bot.send_photo(
-                    member_id,
-                    photo_id,
-                    caption=(
-                        f"🏁 <b>Startup yakunlandi</b>\n\n"
-                        f"🎯 <b>{startup['name']}</b>\n"
-                        f"📅 <b>Yakunlangan sana:</b> {end_date}\n"
-                        f"📝 <b>Natijalar:</b> {results_text}"
-                    )
-                )
-                success_count += 1
-            except:
-                pass
-        
-        bot.send_message(message.chat.id, 
-                        f"✅ <b>Startup muvaffaqiyatli yakunlandi!</b>\n\n"
-                        f"📤 Xabar yuborildi: {success_count} ta a'zoga")
-        
-        clear_user_state(user_id)
-        
-        # Yangilangan startup ma'lumotlarini ko'rsatish
-        startups = get_startups_by_owner(user_id)
-        for startup in startups:
-            if startup['_id'] == startup_id:
-                view_my_startup_details(message.chat.id, user_id, startup)
-                break
-    else:
-        bot.send_message(message.chat.id, "⚠️ <b>Iltimos, rasm yuboring!</b>", reply_markup=create_back_button())
-        msg = bot.send_message(message.chat.id, "🖼 <b>Natijalar rasmini yuboring:</b>", reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_startup_photo, startup_id, results_text)
+    # Yangilangan startup ma'lumotlarini ko'rsatish
+    startup = get_owned_startup(user_id, startup_id)
+    if startup:
+        view_my_startup_details(message.chat.id, user_id, startup)
 
 # Davom etadi (3-qismda admin panel)...
 # bot_part3.py - Bu qismni bot_part2.py ga qo'shish kerak
 
 # 🤝 QO'SHILGAN STARTAPLAR
-@bot.message_handler(func=lambda message: message.text == '🤝 Qo\'shilgan startaplar' and get_user_state(message.from_user.id) == 'in_my_startups')
+@router.text('🤝 Qo\'shilgan startaplar', guard=state_guard('in_my_startups'))
 def show_joined_startups(message):
     user_id = message.from_user.id
     joined_startup_ids = get_user_joined_startups(user_id)
@@ -2296,8 +1778,7 @@ def show_joined_startups_page(chat_id, user_id, startups, page, message_id=None)
             'rejected': '❌'
         }.get(startup['status'], '❓')
         
-        # A'zolar sonini olish
-        current_members = get_startup_member_count(startup['_id'])
+        current_members = startup.get('current_members', 0)
         max_members = startup.get('max_members', 10)
         
         text += f"{i}. <b>{startup['name']}</b> {status_emoji}\n"
@@ -2327,24 +1808,9 @@ def show_joined_startups_page(chat_id, user_id, startups, page, message_id=None)
     
     markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_my_startups'))
     
-    if message_id:
-        try:
-            bot.edit_message_text(
-                text=text,
-                chat_id=chat_id,
-                message_id=message_id,
-                reply_markup=markup
-            )
-        except:
-            try:
-                bot.delete_message(chat_id, message_id)
-            except:
-                pass
-            bot.send_message(chat_id, text, reply_markup=markup)
-    else:
-        bot.send_message(chat_id, text, reply_markup=markup)
+    renderer.show(chat_id, text, markup, message_id=message_id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('joined_page_'))
+@router.callback_prefix('joined_page_')
 def handle_joined_page(call):
     """Qo'shilgan startaplar sahifasini o'zgartirish"""
     try:
@@ -2363,85 +1829,29 @@ def handle_joined_page(call):
         logging.error(f"Joined page error: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('joined_startup_'))
+@router.callback_prefix('joined_startup_')
 def handle_joined_startup_view(call):
     """Qo'shilgan startup tafsilotlarini ko'rsatish"""
     try:
         startup_id = call.data.split('_')[2]
-        startup = get_startup(startup_id)
+        card = render_startup_card(startup_id, ROLE_MEMBER)
         
-        if not startup:
+        if not card:
             bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
             return
         
-        user_id = call.from_user.id
-        
-        # Startup muallifini olish
-        user = get_user(startup['owner_id'])
-        owner_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
-        
-        # A'zolar sonini olish
-        current_members = get_startup_member_count(startup_id)
-        max_members = startup.get('max_members', 10)
-        
-        # Sanani formatlash
-        start_date = startup.get('started_at', '—')
-        if start_date and start_date != '—':
-            if isinstance(start_date, datetime):
-                start_date = start_date.strftime('%d-%m-%Y')
-            else:
-                try:
-                    start_date = datetime.fromisoformat(str(start_date)).strftime('%d-%m-%Y')
-                except:
-                    pass
+        text = "🤝 <b>Qo'shilgan startup:</b>\n\n" + card.text
+        markup = card.markup([[InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_joined_list')]])
         
-        text = (
-            f"🤝 <b>Qo'shilgan startup:</b>\n\n"
-            f"🎯 <b>Nomi:</b> {startup['name']}\n"
-            f"📅 <b>Boshlangan sana:</b> {start_date}\n"
-            f"👤 <b>Muallif:</b> {owner_name}\n"
-            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
-            f"🔧 <b>Kerakli mutaxassislar:</b> {startup.get('required_skills', '—')}\n"
-            f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n"
-            f"📌 <b>Tavsif:</b> {startup['description']}\n"
-            f"🔗 <b>Guruh havolasi:</b> {startup.get('group_link', '—')}"
-        )
-        
-        markup = InlineKeyboardMarkup()
-        
-        # Guruhga kirish tugmasi
-        if startup.get('group_link'):
-            markup.add(InlineKeyboardButton('📲 Guruhga kirish', url=startup['group_link']))
-        
-        markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_joined_list'))
-        
-        try:
-            if startup.get('logo'):
-                bot.edit_message_media(
-                    chat_id=call.message.chat.id,
-                    message_id=call.message.message_id,
-                    media=types.InputMediaPhoto(startup['logo'], caption=text),
-                    reply_markup=markup
-                )
-            else:
-                bot.edit_message_text(
-                    text=text,
-                    chat_id=call.message.chat.id,
-                    message_id=call.message.message_id,
-                    reply_markup=markup
-                )
-        except:
-            if startup.get('logo'):
-                bot.send_photo(call.message.chat.id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                bot.send_message(call.message.chat.id, text, reply_markup=markup)
+        renderer.show(call.message.chat.id, text, markup, photo=card.logo or None,
+                      message_id=call.message.message_id)
         
         bot.answer_callback_query(call.id)
     except Exception as e:
         logging.error(f"Joined startup view error: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_joined_list')
+@router.callback('back_to_joined_list')
 def handle_back_to_joined_list(call):
     """Qo'shilgan startaplar ro'yxatiga qaytish"""
     try:
@@ -2460,7 +1870,7 @@ def handle_back_to_joined_list(call):
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
 # ⚙️ ADMIN PANEL
-@bot.message_handler(func=lambda message: message.text == '⚙️ Admin panel' and is_admin_user(message.chat.id))
+@router.text('⚙️ Admin panel', guard=admin_guard)
 def admin_panel(message):
     user_id = message.from_user.id
     set_user_state(user_id, 'in_admin_panel')
@@ -2490,7 +1900,7 @@ def admin_panel(message):
     
     bot.send_message(message.chat.id, welcome_text, reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '📊 Dashboard' and is_admin_user(message.chat.id))
+@router.text('📊 Dashboard', guard=admin_guard)
 def admin_dashboard(message):
     stats = get_statistics()
     recent_users = get_recent_users(5)
@@ -2537,7 +1947,7 @@ def admin_dashboard(message):
     
     bot.send_message(message.chat.id, dashboard_text, reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '⭐ Pro sozlamalar' and is_admin_user(message.chat.id))
+@router.text('⭐ Pro sozlamalar', guard=admin_guard)
 def admin_pro_settings(message):
     settings = get_pro_settings()
     status = "✅ Yoqilgan" if settings.get('pro_enabled', 0) else "❌ O'chirilgan"
@@ -2560,7 +1970,7 @@ def admin_pro_settings(message):
     )
     bot.send_message(message.chat.id, text, reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '🧾 Pro to\'lovlar' and is_admin_user(message.chat.id))
+@router.text('🧾 Pro to\'lovlar', guard=admin_guard)
 def admin_pro_payments(message):
     pending = get_pending_payments(10)
     if not pending:
@@ -2588,7 +1998,7 @@ def admin_pro_payments(message):
         )
         bot.send_message(message.chat.id, text, reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '🚀 Startaplar' and is_admin_user(message.chat.id))
+@router.text('🚀 Startaplar', guard=admin_guard)
 def admin_startups_menu(message):
     stats = get_statistics()
     
@@ -2612,7 +2022,7 @@ def admin_startups_menu(message):
     
     bot.send_message(message.chat.id, text, reply_markup=markup)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('pending_startups_'))
+@router.callback_prefix('pending_startups_')
 def show_pending_startups(call):
     if not is_admin_user(call.from_user.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -2655,14 +2065,11 @@ def show_pending_startups(call):
         
         markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_admin_startups'))
     
-    try:
-        bot.edit_message_text(text, call.message.chat.id, call.message.message_id, reply_markup=markup)
-    except:
-        bot.send_message(call.message.chat.id, text, reply_markup=markup)
+    renderer.show(call.message.chat.id, text, markup, message_id=call.message.message_id)
     
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('admin_view_startup_'))
+@router.callback_prefix('admin_view_startup_')
 def admin_view_startup_details(call):
     if not is_admin_user(call.from_user.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -2670,73 +2077,24 @@ def admin_view_startup_details(call):
     
     try:
         startup_id = call.data.split('_')[3]
-        startup = get_startup(startup_id)
+        card = render_startup_card(startup_id, ROLE_ADMIN)
         
-        if not startup:
+        if not card:
             bot.answer_callback_query(call.id, "❌ Startup topilmadi!", show_alert=True)
             return
         
-        user = get_user(startup['owner_id'])
-        owner_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
-        owner_contact = f"@{user.get('username', '')}" if user and user.get('username') else f"ID: {startup['owner_id']}"
-        
-        text = (
-            f"🖼 <b>Startup ma'lumotlari</b>\n\n"
-            f"🎯 <b>Nomi:</b> {startup['name']}\n"
-            f"📌 <b>Tavsif:</b> {startup['description']}\n\n"
-            f"👤 <b>Muallif:</b> {owner_name}\n"
-            f"📱 <b>Aloqa:</b> {owner_contact}\n"
-            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
-            f"🔧 <b>Kerak:</b> {startup.get('required_skills', '—')}\n"
-            f"👥 <b>Maksimal a'zolar:</b> {startup.get('max_members', '—')}\n"
-            f"🔗 <b>Guruh havolasi:</b> {startup['group_link']}\n"
-            f"📅 <b>Yaratilgan sana:</b> {startup.get('created_at', '—')[:10]}\n"
-            f"📊 <b>Holati:</b> {startup['status']}"
-        )
-        
-        markup = InlineKeyboardMarkup()
+        text = "🖼 <b>Startup ma'lumotlari</b>\n\n" + card.text
+        markup = card.markup([[InlineKeyboardButton('🔙 Orqaga', callback_data='pending_startups_1')]])
         
-        if startup['status'] == 'pending':
-            markup.add(
-                InlineKeyboardButton('✅ Tasdiqlash', callback_data=f'admin_approve_{startup_id}'),
-                InlineKeyboardButton('❌ Rad etish', callback_data=f'admin_reject_{startup_id}')
-            )
-        elif startup['status'] == 'active':
-            markup.add(InlineKeyboardButton('✅ Faol', callback_data='already_active'))
-        elif startup['status'] == 'completed':
-            markup.add(InlineKeyboardButton('✅ Yakunlangan', callback_data='already_completed'))
-        elif startup['status'] == 'rejected':
-            markup.add(InlineKeyboardButton('❌ Rad etilgan', callback_data='already_rejected'))
-        
-        markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='pending_startups_1'))
-        
-        try:
-            if startup.get('logo'):
-                bot.edit_message_media(
-                    chat_id=call.message.chat.id,
-                    message_id=call.message.message_id,
-                    media=types.InputMediaPhoto(startup['logo'], caption=text),
-                    reply_markup=markup
-                )
-            else:
-                bot.edit_message_text(
-                    text=text,
-                    chat_id=call.message.chat.id,
-                    message_id=call.message.message_id,
-                    reply_markup=markup
-                )
-        except:
-            if startup.get('logo'):
-                bot.send_photo(call.message.chat.id, startup['logo'], caption=text, reply_markup=markup)
-            else:
-                bot.send_message(call.message.chat.id, text, reply_markup=markup)
+        renderer.show(call.message.chat.id, text, markup, photo=card.logo or None,
+                      message_id=call.message.message_id)
         
         bot.answer_callback_query(call.id)
     except Exception as e:
         logging.error(f"Admin view startup xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('admin_approve_'))
+@router.callback_prefix('admin_approve_')
 def admin_approve_startup(call):
     if not is_admin_user(call.from_user.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -2774,7 +2132,7 @@ def admin_approve_startup(call):
             f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
             f"🔧 <b>Kerakli mutaxassislar:</b>\n{startup.get('required_skills', '—')}\n\n"
             f"👥 <b>A'zolar:</b> 0 / {startup.get('max_members', '—')}\n\n"
-            f"➕ <b>O'z startupingizni yaratish uchun:</b> @{bot.get_me().username}"
+            f"➕ <b>O'z startupingizni yaratish uchun:</b> @{get_bot_username()}"
         )
         
         markup = InlineKeyboardMarkup()
@@ -2801,7 +2159,7 @@ def admin_approve_startup(call):
         logging.error(f"Admin approve xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('admin_reject_'))
+@router.callback_prefix('admin_reject_')
 def admin_reject_startup(call):
     if not is_admin_user(call.from_user.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -2832,7 +2190,7 @@ def admin_reject_startup(call):
         logging.error(f"Admin reject xatosi: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.message_handler(func=lambda message: message.text == '👥 Foydalanuvchilar' and is_admin_user(message.chat.id))
+@router.text('👥 Foydalanuvchilar', guard=admin_guard)
 def admin_users(message):
     stats = get_statistics()
     recent_users = get_recent_users(10)
@@ -2868,78 +2226,60 @@ def admin_users(message):
     
     bot.send_message(message.chat.id, text, reply_markup=markup)
 
-@bot.message_handler(func=lambda message: message.text == '📢 Xabar yuborish' and is_admin_user(message.chat.id))
+@router.text('📢 Xabar yuborish', guard=admin_guard)
 def broadcast_message_start(message):
-    user_id = message.from_user.id
-    set_user_state(user_id, 'broadcasting_message')
-    
-    msg = bot.send_message(message.chat.id, 
-                          "📢 <b>Xabaringizni yozing:</b>\n\n"
-                          "<i>Barcha foydalanuvchilarga yuboriladi.</i>",
-                          reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_broadcast_message)
+    conversations.start(message.chat.id, 'broadcast')
+
+def cancel_broadcast(message, ctx):
+    clear_user_state(message.from_user.id)
+    admin_panel(message)
 
-def process_broadcast_message(message):
+broadcast_flow = conversations.flow('broadcast', on_cancel=cancel_broadcast)
+
+@broadcast_flow.step('message', prompt=ask_text("📢 <b>Xabaringizni yozing:</b>\n\n"
+                                                "<i>Barcha foydalanuvchilarga yuboriladi.</i>"))
+def process_broadcast_message(message, ctx):
     user_id = message.from_user.id
     
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        admin_panel(message)
-        return
-    
-    text = escape_html(message.text)
-    users = get_all_users()
-    
-    bot.send_message(message.chat.id, f"📤 <b>Xabar yuborilmoqda...</b>\n\nFoydalanuvchilar: {len(users)} ta")
-    
-    success = 0
-    fail = 0
+    text = escape_html(message.caption if message.content_type != 'text' else message.text)
     
-    for user in users:
-        try:
-            # Xabar turini tekshirish
-            if message.photo:
-                bot.send_photo(user, message.photo[-1].file_id, caption=text if text else None)
-            elif message.video:
-                bot.send_video(user, message.video.file_id, caption=text if text else None)
-            elif message.document:
-                bot.send_document(user, message.document.file_id, caption=text if text else None)
-            else:
-                bot.send_message(user, f"📢 <b>Yangilik!</b>\n\n{text}")
-            
-            success += 1
-            time.sleep(0.05)  # Flood limitdan qochish uchun
-        except Exception as e:
-            fail += 1
+    # Xabar turini aniqlash
+    if message.photo:
+        payload = {'kind': 'photo', 'file_id': message.photo[-1].file_id, 'text': text}
+    elif message.video:
+        payload = {'kind': 'video', 'file_id': message.video.file_id, 'text': text}
+    elif message.document:
+        payload = {'kind': 'document', 'file_id': message.document.file_id, 'text': text}
+    else:
+        payload = {'kind': 'text', 'text': text}
     
-    bot.send_message(
-        message.chat.id,
-        f"✅ <b>Xabar yuborish yakunlandi!</b>\n\n"
-        f"✅ Yuborildi: {success} ta\n"
-        f"❌ Yuborilmadi: {fail} ta\n\n"
-        f"📊 Umumiy foiz: {success/(success+fail)*100:.1f}%"
-    )
+    try:
+        # Jarayon shu chatdagi xabarda yangilanib boradi
+        broadcaster.start(payload, created_by=f"tg:{user_id}", admin_chat_id=message.chat.id)
+    except Exception as e:
+        logging.error(f"Broadcast boshlashda xatolik: {e}")
+        bot.send_message(message.chat.id, "❌ Xabar yuborishni boshlab bo'lmadi")
     
     clear_user_state(message.from_user.id)
     admin_panel(message)
 
 # 📍 CALLBACK HANDLERLAR
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_admin_panel')
+@router.callback('back_to_admin_panel')
 def handle_back_to_admin_panel(call):
     admin_panel(call.message)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_admin_startups')
+@router.callback('back_to_admin_startups')
 def handle_back_to_admin_startups(call):
     admin_startups_menu(call.message)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'refresh_dashboard')
+@router.callback('refresh_dashboard')
 def handle_refresh_dashboard(call):
     admin_dashboard(call.message)
     bot.answer_callback_query(call.id, "🔄 Dashboard yangilandi!")
 
-@bot.callback_query_handler(func=lambda call: call.data == 'full_stats')
+@router.callback('full_stats')
 def handle_full_stats(call):
     stats = get_statistics()
     bot.answer_callback_query(call.id, 
@@ -2951,11 +2291,11 @@ def handle_full_stats(call):
                              f"❌ Rad etilgan: {stats['rejected_startups']}", 
                              show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'users_list_1')
+@router.callback('users_list_1')
 def handle_users_list(call):
     bot.answer_callback_query(call.id, "⏳ Foydalanuvchilar ro'yxati tuzilmoqda...")
 
-@bot.callback_query_handler(func=lambda call: call.data == 'users_stats')
+@router.callback('users_stats')
 def handle_users_stats(call):
     stats = get_statistics()
     bot.answer_callback_query(call.id, 
@@ -2963,7 +2303,7 @@ def handle_users_stats(call):
                              f"🚀 Startaplar: {stats['total_startups']}", 
                              show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'pro_toggle')
+@router.callback('pro_toggle')
 def handle_pro_toggle(call):
     if not is_admin_user(call.message.chat.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -2974,62 +2314,54 @@ def handle_pro_toggle(call):
     bot.answer_callback_query(call.id, "✅ Yangilandi")
     admin_pro_settings(call.message)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'pro_edit_price')
+@router.callback('pro_edit_price')
 def handle_pro_edit_price(call):
     if not is_admin_user(call.message.chat.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
         return
-    set_user_state(call.from_user.id, 'admin_edit_pro_price')
-    msg = bot.send_message(call.message.chat.id, "💳 <b>Yangi narxni kiriting (faqat raqam):</b>", reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_admin_pro_price)
+    conversations.start(call.message.chat.id, 'pro_settings', step='price')
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'pro_edit_card')
+@router.callback('pro_edit_card')
 def handle_pro_edit_card(call):
     if not is_admin_user(call.message.chat.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
         return
-    set_user_state(call.from_user.id, 'admin_edit_pro_card')
-    msg = bot.send_message(call.message.chat.id, "💳 <b>Yangi karta raqamini kiriting:</b>", reply_markup=create_back_button())
-    bot.register_next_step_handler(msg, process_admin_pro_card)
+    conversations.start(call.message.chat.id, 'pro_settings', step='card')
     bot.answer_callback_query(call.id)
 
-def process_admin_pro_price(message):
-    user_id = message.from_user.id
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        admin_pro_settings(message)
-        return
+def cancel_pro_settings_edit(message, ctx):
+    clear_user_state(message.from_user.id)
+    admin_pro_settings(message)
+
+def validate_pro_price(message) -> int:
     try:
-        price = int(''.join(ch for ch in message.text if ch.isdigit()))
+        price = int(''.join(ch for ch in (message.text or '') if ch.isdigit()))
         if price <= 0:
             raise ValueError
     except Exception:
-        msg = bot.send_message(message.chat.id, "❌ <b>Noto'g'ri qiymat.</b>\n\nQayta kiriting:", reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_admin_pro_price)
-        return
+        raise Invalid("❌ <b>Noto'g'ri qiymat.</b>")
+    return price
+
+pro_settings_flow = conversations.flow('pro_settings', on_cancel=cancel_pro_settings_edit, on_invalid=send_invalid)
+
+@pro_settings_flow.step('price', prompt=ask_text("💳 <b>Yangi narxni kiriting (faqat raqam):</b>"),
+                        validate=validate_pro_price)
+def process_admin_pro_price(message, ctx, price):
     set_pro_price(price)
-    clear_user_state(user_id)
+    clear_user_state(message.from_user.id)
     bot.send_message(message.chat.id, "✅ <b>Narx yangilandi.</b>")
     admin_pro_settings(message)
 
-def process_admin_pro_card(message):
-    user_id = message.from_user.id
-    if message.text == '🔙 Orqaga':
-        clear_user_state(user_id)
-        admin_pro_settings(message)
-        return
-    card = (message.text or '').strip()
-    if not card:
-        msg = bot.send_message(message.chat.id, "❌ <b>Karta raqami bo'sh.</b>\n\nQayta kiriting:", reply_markup=create_back_button())
-        bot.register_next_step_handler(msg, process_admin_pro_card)
-        return
+@pro_settings_flow.step('card', prompt=ask_text("💳 <b>Yangi karta raqamini kiriting:</b>"),
+                        validate=text_value("❌ <b>Karta raqami bo'sh.</b>"))
+def process_admin_pro_card(message, ctx, card):
     set_pro_card(card)
-    clear_user_state(user_id)
+    clear_user_state(message.from_user.id)
     bot.send_message(message.chat.id, "✅ <b>Karta raqami yangilandi.</b>")
     admin_pro_settings(message)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('pro_pay_view_'))
+@router.callback_prefix('pro_pay_view_')
 def handle_pro_pay_view(call):
     if not is_admin_user(call.message.chat.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -3066,7 +2398,7 @@ def handle_pro_pay_view(call):
         logging.error(f"pro_pay_view xatosi: {e}")
         bot.answer_callback_query(call.id, "Xatolik", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('pro_pay_approve_'))
+@router.callback_prefix('pro_pay_approve_')
 def handle_pro_pay_approve(call):
     if not is_admin_user(call.message.chat.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -3093,7 +2425,7 @@ def handle_pro_pay_approve(call):
         logging.error(f"pro_pay_approve xatosi: {e}")
         bot.answer_callback_query(call.id, "Xatolik", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('pro_pay_reject_'))
+@router.callback_prefix('pro_pay_reject_')
 def handle_pro_pay_reject(call):
     if not is_admin_user(call.message.chat.id):
         bot.answer_callback_query(call.id, "❌ Ruxsat yo'q!", show_alert=True)
@@ -3118,12 +2450,12 @@ def handle_pro_pay_reject(call):
         logging.error(f"pro_pay_reject xatosi: {e}")
         bot.answer_callback_query(call.id, "Xatolik", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_main_menu')
+@router.callback('back_to_main_menu')
 def handle_back_to_main_menu(call):
     show_main_menu(call)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_startups_menu')
+@router.callback('back_to_startups_menu')
 def handle_back_to_startups_menu(call):
     user_id = call.from_user.id
     set_user_state(user_id, 'in_startups_menu')
@@ -3135,70 +2467,22 @@ def handle_back_to_startups_menu(call):
         KeyboardButton('🏠 Asosiy menyu')
     )
     
-    try:
-        bot.edit_message_text(
-            "🌐 <b>Startaplar bo'limi:</b>\n\nKerakli bo'limni tanlang:",
-            call.message.chat.id,
-            call.message.message_id,
-            reply_markup=markup
-        )
-    except:
-        bot.send_message(call.message.chat.id, "🌐 <b>Startaplar bo'limi:</b>\n\nKerakli bo'limni tanlang:", reply_markup=markup)
+    renderer.show(call.message.chat.id, "🌐 <b>Startaplar bo'limi:</b>\n\nKerakli bo'limni tanlang:", markup, message_id=call.message.message_id)
     
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_categories')
+@router.callback('back_to_categories')
 def handle_back_to_categories(call):
     user_id = call.from_user.id
     set_user_state(user_id, 'choosing_category')
     
-    categories = get_all_categories()
+    markup = get_category_keyboard()
     
-    markup = InlineKeyboardMarkup(row_width=2)
-    
-    if categories:
-        for category in categories:
-            category_emojis = {
-                'Biznes': '💼',
-                'Sog\'liq': '🏥',
-                'Texnologiya': '📱',
-                'Ekologiya': '🌿',
-                'Ta\'lim': '🎓',
-                'Dizayn': '🎨',
-                'Dasturlash': '💻',
-                'Savdo': '🛒',
-                'Media': '🎬',
-                'Karyera': '💼'
-            }
-            emoji = category_emojis.get(category, '🏷️')
-            markup.add(InlineKeyboardButton(f'{emoji} {category}', callback_data=f'category_{category}'))
-    else:
-        markup.add(InlineKeyboardButton('💼 Biznes', callback_data='category_Biznes'))
-        markup.add(InlineKeyboardButton('🏥 Sog\'liq', callback_data='category_Sog\'liq'))
-        markup.add(InlineKeyboardButton('📱 Texnologiya', callback_data='category_Texnologiya'))
-        markup.add(InlineKeyboardButton('🌿 Ekologiya', callback_data='category_Ekologiya'))
-        markup.add(InlineKeyboardButton('🎓 Ta\'lim', callback_data='category_Ta\'lim'))
-        markup.add(InlineKeyboardButton('🎨 Dizayn', callback_data='category_Dizayn'))
-        markup.add(InlineKeyboardButton('💻 Dasturlash', callback_data='category_Dasturlash'))
-        markup.add(InlineKeyboardButton('🛒 Savdo', callback_data='category_Savdo'))
-        markup.add(InlineKeyboardButton('🎬 Media', callback_data='category_Media'))
-        markup.add(InlineKeyboardButton('💼 Karyera', callback_data='category_Karyera'))
-    
-    markup.add(InlineKeyboardButton('🔙 Orqaga', callback_data='back_to_startups_menu'))
-    
-    try:
-        bot.edit_message_text(
-            "🏷️ <b>Kategoriya tanlang:</b>",
-            call.message.chat.id,
-            call.message.message_id,
-            reply_markup=markup
-        )
-    except:
-        bot.send_message(call.message.chat.id, "🏷️ <b>Kategoriya tanlang:</b>", reply_markup=markup)
+    renderer.show(call.message.chat.id, "🏷️ <b>Kategoriya tanlang:</b>", markup, message_id=call.message.message_id)
     
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_my_startups')
+@router.callback('back_to_my_startups')
 def handle_back_to_my_startups(call):
     user_id = call.from_user.id
     set_user_state(user_id, 'in_my_startups')
@@ -3210,55 +2494,42 @@ def handle_back_to_my_startups(call):
         KeyboardButton('🏠 Asosiy menyu')
     )
     
-    try:
-        bot.edit_message_text(
-            "📌 <b>Startaplarim bo'limi:</b>\n\nKerakli bo'limni tanlang:",
-            call.message.chat.id,
-            call.message.message_id,
-            reply_markup=markup
-        )
-    except:
-        bot.send_message(call.message.chat.id, "📌 <b>Startaplarim bo'limi:</b>\n\nKerakli bo'limni tanlang:", reply_markup=markup)
+    renderer.show(call.message.chat.id, "📌 <b>Startaplarim bo'limi:</b>\n\nKerakli bo'limni tanlang:", markup, message_id=call.message.message_id)
     
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'back_to_my_startups_list')
+@router.callback('back_to_my_startups_list')
 def handle_back_to_my_startups_list(call):
     user_id = call.from_user.id
     show_my_startups_page(call.message.chat.id, user_id, 1, call.message.message_id)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('back_to_my_startup_'))
+@router.callback_prefix('back_to_my_startup_')
 def handle_back_to_my_startup(call):
     try:
         startup_id = call.data.split('_')[4]
         user_id = call.from_user.id
-        startups = get_startups_by_owner(user_id)
-        
-        # Startupni topish
-        for idx, startup in enumerate(startups):
-            if startup['_id'] == startup_id:
-                view_my_startup_details(call.message.chat.id, user_id, startup, call.message.message_id)
-                break
+        startup = get_owned_startup(user_id, startup_id)
+        if startup:
+            view_my_startup_details(call.message.chat.id, user_id, startup, call.message.message_id)
         
         bot.answer_callback_query(call.id)
     except Exception as e:
         logging.error(f"Back to my startup error: {e}")
         bot.answer_callback_query(call.id, "⚠️ Xatolik yuz berdi!", show_alert=True)
 
-@bot.callback_query_handler(func=lambda call: call.data in ['already_active', 'already_completed', 'already_rejected', 
-                                                          'rejected_info', 'waiting_approval', 'current_page',
-                                                          'view_results_'])
+@router.callback('already_active', 'already_completed', 'already_rejected',
+                 'rejected_info', 'waiting_approval', 'current_page', 'view_results_')
 def handle_info_callbacks(call):
     bot.answer_callback_query(call.id)
 
 # 🔙 ORQAGA TUGMASI UCHUN HANDLER
-@bot.message_handler(func=lambda message: message.text == '🔙 Orqaga')
+@router.text('🔙 Orqaga')
 def handle_back_button(message):
     user_id = message.from_user.id
     user_state = get_user_state(user_id)
     
-    if user_state.startswith('editing_') or user_state == 'waiting_phone_edit':
+    if user_state == 'waiting_phone_edit':
         # Profil tahrirlashdan orqaga
         clear_user_state(user_id)
         show_profile(message)
@@ -3276,39 +2547,19 @@ def handle_back_button(message):
     elif user_state == 'waiting_pro_receipt':
         # Pro to'lovdan orqaga
         clear_user_state(user_id)
-        pro_payment_data.pop(user_id, None)
+        clear_pro_payment_data(user_id)
         show_main_menu(message)
     
-    elif user_state == 'creating_startup' or user_state == 'creating_startup_logo':
-        # Startup yaratishdan orqaga
-        clear_user_data(user_id)
-        show_main_menu(message)
-    
-    elif user_state.startswith('completing_startup_'):
-        # Startup yakunlashdan orqaga
-        clear_user_state(user_id)
-        # Startup ko'rinishiga qaytish
-        startup_id = user_state.split('_')[2]
-        startups = get_startups_by_owner(user_id)
-        for startup in startups:
-            if startup['_id'] == startup_id:
-                view_my_startup_details(message.chat.id, user_id, startup)
-                break
-    
     elif user_state == 'in_my_startups':
         # Startaplarim bo'limidan orqaga
         clear_user_state(user_id)
         show_main_menu(message)
     
-    elif user_state == 'in_admin_panel' or user_state == 'broadcasting_message':
+    elif user_state == 'in_admin_panel':
         # Admin panelidan orqaga
         clear_user_state(user_id)
         show_main_menu(message)
 
-    elif user_state in ['admin_edit_pro_price', 'admin_edit_pro_card']:
-        clear_user_state(user_id)
-        admin_pro_settings(message)
-    
     elif user_state == 'in_profile':
         # Profildan orqaga
         clear_user_state(user_id)
@@ -3319,15 +2570,15 @@ def handle_back_button(message):
         clear_user_state(user_id)
         show_main_menu(message)
 
-@bot.message_handler(func=lambda message: message.text == '🏠 Asosiy menyu')
+@router.text('🏠 Asosiy menyu')
 def handle_main_menu_button(message):
     user_id = message.from_user.id
     clear_user_data(user_id)
-    pro_payment_data.pop(user_id, None)
+    clear_pro_payment_data(user_id)
     show_main_menu(message)
 
 # BARCHA XABARLARNI QAYTA ISHLASH
-@bot.message_handler(func=lambda message: True)
+@router.default_message()
 def handle_all_messages(message):
     try:
         user_id = message.from_user.id
@@ -3357,73 +2608,52 @@ def handle_all_messages(message):
         bot.send_message(message.chat.id, "⚠️ <b>Xatolik yuz berdi!</b>\n\nIltimos, /start buyrug'ini yuboring.", reply_markup=create_back_button())
 
 # 📍 KANAL POSTLARINI YANGILASH FUNKSIYASI
+def _edit_channel_post(startup_id: str):
+    """Kanal postini eng oxirgi holat bilan tahrirlash (channel_updater thread ida).
+
+    Tahrir xatolari tashqariga chiqadi - updater ularni backoff bilan qayta urinadi.
+    """
+    startup = get_startup(startup_id)
+    if not startup:
+        return False
+    
+    post_id = startup.get('channel_post_id')
+    if not post_id:
+        return False
+    
+    bot_username = get_bot_username()
+    if not bot_username:
+        raise RuntimeError("Bot username olinmadi")
+    card = render_startup_card(startup_id, ROLE_CHANNEL, startup=startup, bot_username=bot_username)
+    markup = card.markup()
+    
+    # Postni tahrirlash
+    if card.logo:
+        bot.edit_message_caption(
+            chat_id=CHANNEL_USERNAME,
+            message_id=post_id,
+            caption=card.text,
+            reply_markup=markup,
+            parse_mode='HTML'
+        )
+    else:
+        bot.edit_message_text(
+            text=card.text,
+            chat_id=CHANNEL_USERNAME,
+            message_id=post_id,
+            reply_markup=markup,
+            parse_mode='HTML'
+        )
+    return True
+
+# Ketma-ket tasdiqlashlar bitta tahrirga birlashtiriladi
+channel_updater = ChannelPostUpdater(_edit_channel_post)
+
 def update_channel_post(startup_id: str):
+    """Kanal postini yangilashni navbatga qo'yish (darhol qaytadi)"""
     try:
-        startup = get_startup(startup_id)
-        if not startup:
-            return False
-        
-        post_id = startup.get('channel_post_id')
-        if not post_id:
-            return False
-        
-        # A'zolar sonini olish
-        current_members = get_startup_member_count(startup_id)
-        max_members = startup.get('max_members', 10)
-        
-        user = get_user(startup['owner_id'])
-        owner_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip() if user else "Noma'lum"
-        
-        # POST MATNI - HTML formatida
-        channel_text = (
-            f"🚀 <b>{startup['name']}</b>\n\n"
-            f"📝 {startup['description']}\n\n"
-            f"👤 <b>Muallif:</b> {owner_name}\n"
-            f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
-            f"🔧 <b>Kerakli mutaxassislar:</b>\n{startup.get('required_skills', '—')}\n\n"
-            f"👥 <b>A'zolar:</b> {current_members} / {max_members}\n\n"
-        )
-        
-        # Agar a'zolar to'liq bo'lsa
-        if current_members >= max_members:
-            channel_text += f"❌ <b>Startup to'ldi, yangi a'zolar qabul qilinmaydi.</b>\n\n"
-        else:
-            channel_text += (
-                f"➕ <b>O'z startupingizni yaratish uchun:</b> @{bot.get_me().username}"
-            )
-        
-        markup = InlineKeyboardMarkup()
-        if current_members < max_members:
-            markup.add(InlineKeyboardButton('🤝 Startupga qo\'shilish', callback_data=f'join_startup_{startup_id}'))
-        else:
-            markup.add(InlineKeyboardButton('❌ A\'zolar to\'ldi', callback_data='full_members'))
-        
-        try:
-            # Postni tahrirlash
-            if startup.get('logo'):
-                bot.edit_message_caption(
-                    chat_id=CHANNEL_USERNAME,
-                    message_id=post_id,
-                    caption=channel_text,
-                    reply_markup=markup,
-                    parse_mode='HTML'
-                )
-            else:
-                bot.edit_message_text(
-                    text=channel_text,
-                    chat_id=CHANNEL_USERNAME,
-                    message_id=post_id,
-                    reply_markup=markup,
-                    parse_mode='HTML'
-                )
-            
-            # A'zolar sonini yangilash
-            update_startup_current_members(startup_id, current_members)
-            
-            return True
-        except Exception as e:
-            logging.error(f"Postni yangilashda xatolik: {e}")
-            return False
+        channel_updater.schedule(str(startup_id))
+        return True
     except Exception as e:
         logging.error(f"Update channel post xatosi: {e}")
         return False
@@ -3431,12 +2661,14 @@ def update_channel_post(startup_id: str):
 # BOTNI ISHGA TUSHIRISH
 if __name__ == '__main__':
     init_db()
+    broadcaster.resume()
+    bot.resume_updates()
     print("=" * 60)
     print("🚀 GarajHub Bot ishga tushdi...")
     print(f"👨‍💼 Admin IDs: {', '.join(str(x) for x in sorted(ADMIN_IDS))}")
     print(f"📢 Kanal: {CHANNEL_USERNAME}")
     try:
-        bot_info = bot.get_me()
+        bot_info = tg.get_me()
         print(f"🤖 Bot: @{bot_info.username}")
     except:
         print("🤖 Bot: (get_me() failed)")
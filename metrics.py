@@ -0,0 +1,223 @@
+# metrics.py - Handler va route lar uchun vaqt, natija va chaqiruvlar hisoblagichlari
+#
+# Har bir chaqiruv (bot handler yoki Flask route) thread ga bog'langan
+# Invocation ochadi. Shu vaqtda bajarilgan MongoDB buyruqlari (pymongo
+# CommandListener) va Telegram so'rovlari (transport) unga yoziladi.
+# /metrics endpointi Prometheus text formatida beradi.
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from config import env_int
+
+
+# Kvantillar oxirgi METRICS_WINDOW ta o'lchovdan hisoblanadi
+METRICS_WINDOW = env_int("METRICS_WINDOW", 2048)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.9, 0.99)
+CALL_TARGETS = ('db', 'telegram')
+
+PREFIX = 'garajhub'
+
+
+class Invocation:
+    __slots__ = ('kind', 'name', 'started', 'calls')
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.started = time.perf_counter()
+        self.calls = dict.fromkeys(CALL_TARGETS, 0)
+
+
+class _Series:
+    __slots__ = ('count', 'sum', 'buckets', 'window', 'outcomes', 'exceptions', 'calls')
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.window: Deque[float] = deque(maxlen=max(1, METRICS_WINDOW))
+        self.outcomes: Dict[str, int] = {}
+        self.exceptions: Dict[str, int] = {}
+        self.calls = dict.fromkeys(CALL_TARGETS, 0)
+
+    def quantiles(self) -> Dict[float, float]:
+        values = sorted(self.window)
+        if not values:
+            return {}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in QUANTILES}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._calls = dict.fromkeys(CALL_TARGETS, 0)
+
+    def observe(self, invocation: Invocation, seconds: float, outcome: str, exception: Optional[str] = None):
+        key = (invocation.kind, invocation.name)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.count += 1
+            series.sum += seconds
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series.buckets[index] += 1
+            series.window.append(seconds)
+            series.outcomes[outcome] = series.outcomes.get(outcome, 0) + 1
+            if exception:
+                series.exceptions[exception] = series.exceptions.get(exception, 0) + 1
+            for target, count in invocation.calls.items():
+                series.calls[target] += count
+
+    def count_call(self, target: str):
+        with self._lock:
+            self._calls[target] = self._calls.get(target, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON uchun qisqa ko'rinish: har bir handler bo'yicha soni va kvantillar (ms)"""
+        with self._lock:
+            items = list(self._series.items())
+            data = {}
+            for (kind, name), series in items:
+                data[f"{kind}:{name}"] = {
+                    'count': series.count,
+                    'outcomes': dict(series.outcomes),
+                    **{f"p{int(q * 100)}_ms": round(v * 1000, 1) for q, v in series.quantiles().items()},
+                    **{f"{target}_calls_avg": round(n / series.count, 2) for target, n in series.calls.items()},
+                }
+            return {'handlers': data, 'calls': dict(self._calls)}
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        with self._lock:
+            items = sorted(self._series.items())
+
+            family('handler_duration_seconds', 'histogram', 'Handler/route bajarilish vaqti')
+            for (kind, name), series in items:
+                labels = _labels(kind=kind, handler=name)
+                for bound, count in zip(LATENCY_BUCKETS, series.buckets):
+                    lines.append(f"{PREFIX}_handler_duration_seconds_bucket{_labels(kind=kind, handler=name, le=bound)} {count}")
+                lines.append(f"{PREFIX}_handler_duration_seconds_bucket{_labels(kind=kind, handler=name, le='+Inf')} {series.count}")
+                lines.append(f"{PREFIX}_handler_duration_seconds_sum{labels} {series.sum:.6f}")
+                lines.append(f"{PREFIX}_handler_duration_seconds_count{labels} {series.count}")
+
+            family('handler_duration_quantile_seconds', 'gauge',
+                   f'Oxirgi {METRICS_WINDOW} ta chaqiruv bo\'yicha kvantillar')
+            for (kind, name), series in items:
+                for q, value in series.quantiles().items():
+                    lines.append(f"{PREFIX}_handler_duration_quantile_seconds{_labels(kind=kind, handler=name, quantile=q)} {value:.6f}")
+
+            family('handler_invocations_total', 'counter', 'Chaqiruvlar soni natija bo\'yicha')
+            for (kind, name), series in items:
+                for outcome, count in sorted(series.outcomes.items()):
+                    lines.append(f"{PREFIX}_handler_invocations_total{_labels(kind=kind, handler=name, outcome=outcome)} {count}")
+
+            family('handler_exceptions_total', 'counter', 'Ushlanmagan istisnolar soni')
+            for (kind, name), series in items:
+                for exception, count in sorted(series.exceptions.items()):
+                    lines.append(f"{PREFIX}_handler_exceptions_total{_labels(kind=kind, handler=name, exception=exception)} {count}")
+
+            family('handler_calls_total', 'counter', 'Handler ichidagi DB va Telegram chaqiruvlari')
+            for (kind, name), series in items:
+                for target, count in series.calls.items():
+                    lines.append(f"{PREFIX}_handler_calls_total{_labels(kind=kind, handler=name, target=target)} {count}")
+
+            family('calls_total', 'counter', 'Barcha DB va Telegram chaqiruvlari (fon thread lari bilan)')
+            for target, count in sorted(self._calls.items()):
+                lines.append(f"{PREFIX}_calls_total{_labels(target=target)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: Any) -> str:
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+registry = Registry()
+_local = threading.local()
+
+
+def begin(kind: str, name: str) -> Invocation:
+    invocation = Invocation(kind, name)
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(invocation)
+    return invocation
+
+
+def end(invocation: Invocation, outcome: str, exception: Optional[BaseException] = None):
+    stack = getattr(_local, 'stack', None)
+    if stack and stack[-1] is invocation:
+        stack.pop()
+    elif stack and invocation in stack:
+        stack.remove(invocation)
+    registry.observe(
+        invocation,
+        time.perf_counter() - invocation.started,
+        outcome,
+        type(exception).__name__ if exception is not None else None,
+    )
+
+
+def count_call(target: str):
+    """DB yoki Telegram chaqiruvini joriy handler ga (bo'lsa) va umumiy hisobga yozish"""
+    registry.count_call(target)
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        calls = stack[-1].calls
+        calls[target] = calls.get(target, 0) + 1
+
+
+def observe(kind: str, name: str, func: Callable, *args, **kwargs):
+    """func ni o'lchab bajarish (router va next-step handler lar uchun)"""
+    invocation = begin(kind, name)
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        end(invocation, 'error', e)
+        raise
+    end(invocation, 'ok')
+    return result
+
+
+def observe_handler(handler: Callable, *args, **kwargs):
+    return observe('bot', handler.__name__, handler, *args, **kwargs)
+
+
+class MongoCallCounter(monitoring.CommandListener):
+    """Har bir MongoDB buyrug'ini chaqirgan thread dagi handler ga yozadi"""
+
+    def started(self, event):
+        count_call('db')
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def render() -> str:
+    return registry.render()
+
+
+def snapshot() -> Dict[str, Any]:
+    return registry.snapshot()
@@ -0,0 +1,154 @@
+# outbox.py - Chiquvchi xabarlar uchun ustuvorlikli navbat va tezlik chegarasi
+#
+# Har bir yuborish/tahrir so'rovi Telegram ga ketishidan oldin shu yerdan ruxsat
+# oladi: avval chat bo'yicha oraliq (guruh/kanal uchun), keyin umumiy tezlik
+# chegarasi. Token bo'shaganda eng yuqori ustuvorlikdagi kutuvchi birinchi
+# o'tadi, shuning uchun ommaviy yuborish paytida ham foydalanuvchiga javob
+# kechikmaydi. Chaqiruvchi bloklanadi - natija (message_id) odatdagidek qaytadi.
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from config import env_int
+
+
+# Telegram umumiy limiti ~30 xabar/soniya
+OUTBOX_RATE = env_int("OUTBOX_RATE", 30)
+OUTBOX_BURST = env_int("OUTBOX_BURST", 10)
+# Shaxsiy chatlarda Telegram qisqa portlashlarga ruxsat beradi, guruh/kanalda ~20 xabar/daqiqa
+OUTBOX_PRIVATE_INTERVAL = env_int("OUTBOX_PRIVATE_INTERVAL_MS", 0) / 1000
+OUTBOX_GROUP_INTERVAL = env_int("OUTBOX_GROUP_INTERVAL_MS", 3000) / 1000
+OUTBOX_MAX_CHATS = env_int("OUTBOX_MAX_CHATS", 100000)
+
+# Kichik raqam - yuqori ustuvorlik
+PRIORITY_INTERACTIVE = 0
+PRIORITY_ADMIN = 1
+PRIORITY_CHANNEL = 2
+PRIORITY_BROADCAST = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_ADMIN: 'admin',
+    PRIORITY_CHANNEL: 'channel',
+    PRIORITY_BROADCAST: 'broadcast',
+}
+
+# Limitga kiradigan API metodlari
+GATED_PREFIXES = ('send', 'edit', 'copy', 'forward')
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def send_priority(priority: int):
+    """Shu thread dagi yuborishlar berilgan ustuvorlik bilan navbatga turadi"""
+    previous = getattr(_local, 'priority', PRIORITY_INTERACTIVE)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority() -> int:
+    return getattr(_local, 'priority', PRIORITY_INTERACTIVE)
+
+
+def is_gated(method_name: str) -> bool:
+    return method_name.startswith(GATED_PREFIXES)
+
+
+def _is_private(chat_id: Any) -> bool:
+    try:
+        return int(chat_id) > 0
+    except (TypeError, ValueError):
+        # "@kanal" ko'rinishidagi manzil
+        return False
+
+
+class Outbox:
+    def __init__(self, rate: float = OUTBOX_RATE, burst: int = OUTBOX_BURST,
+                 private_interval: float = OUTBOX_PRIVATE_INTERVAL,
+                 group_interval: float = OUTBOX_GROUP_INTERVAL,
+                 max_chats: int = OUTBOX_MAX_CHATS):
+        self.rate = max(0.1, float(rate))
+        self.burst = max(1.0, float(burst))
+        self.private_interval = private_interval
+        self.group_interval = group_interval
+        self.max_chats = max(1, max_chats)
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._chat_lock = threading.Lock()
+        self._next_chat_at: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._stats = {
+            name: {'sent': 0, 'wait_ms': 0.0, 'max_wait_ms': 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait_chat(self, chat_id: Any):
+        """Chat uchun oraliqni band qilib, navbati kelguncha kutish"""
+        interval = self.private_interval if _is_private(chat_id) else self.group_interval
+        if interval <= 0 or chat_id is None:
+            return
+        key = str(chat_id)
+        with self._chat_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_chat_at.get(key, 0.0))
+            self._next_chat_at[key] = slot + interval
+            self._next_chat_at.move_to_end(key)
+            while len(self._next_chat_at) > self.max_chats:
+                self._next_chat_at.popitem(last=False)
+        if slot > now:
+            time.sleep(slot - now)
+
+    def acquire(self, chat_id: Any = None, priority: Optional[int] = None):
+        if priority is None:
+            priority = current_priority()
+        started = time.monotonic()
+        self._wait_chat(chat_id)
+
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._waiting[0] == ticket and self._tokens >= 1:
+                    heapq.heappop(self._waiting)
+                    self._tokens -= 1
+                    # Keyingi kutuvchi ham token olishi mumkin
+                    self._cond.notify_all()
+                    break
+                if self._waiting[0] == ticket:
+                    self._cond.wait((1 - self._tokens) / self.rate)
+                else:
+                    self._cond.wait()
+
+            waited = (time.monotonic() - started) * 1000
+            stats = self._stats[PRIORITY_NAMES.get(priority, 'interactive')]
+            stats['sent'] += 1
+            stats['wait_ms'] += waited
+            stats['max_wait_ms'] = max(stats['max_wait_ms'], waited)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            classes = {
+                name: {
+                    'sent': item['sent'],
+                    'avg_wait_ms': round(item['wait_ms'] / item['sent'], 1) if item['sent'] else 0.0,
+                    'max_wait_ms': round(item['max_wait_ms'], 1),
+                }
+                for name, item in self._stats.items()
+            }
+            return {'rate': self.rate, 'waiting': len(self._waiting), 'classes': classes}
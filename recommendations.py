@@ -0,0 +1,242 @@
+# recommendations.py - "🎯 Tavsiyalar" uchun oldindan hisoblangan tavsiyalar indeksi
+#
+# Startaplar (required_skills, category) va foydalanuvchilar (specialization,
+# experience) tokenlarga ajratiladi, L2-normallangan vektorlar sifatida
+# saqlanadi va moslik NumPy da kosinus o'xshashlik bilan hisoblanadi.
+# Har bir foydalanuvchi uchun tartiblangan ro'yxat keshlanadi va startap
+# tasdiqlanganda/yopilganda hamda profil o'zgarganda qisman yangilanadi.
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import env_int
+import db
+
+
+REC_MAX_USERS = env_int("REC_MAX_USERS", 10000)
+
+_TOKEN_RE = re.compile(r"[\w+#]+", re.UNICODE)
+_STOPWORDS = {
+    'va', 'bilan', 'uchun', 'ham', 'yoki', 'kerak', 'bor', 'yo', 'the', 'and', 'or', 'of',
+    'и', 'в', 'на', 'для',
+}
+
+
+def tokenize(*texts: Optional[str]) -> List[str]:
+    tokens = []
+    for text in texts:
+        if not text:
+            continue
+        for token in _TOKEN_RE.findall(str(text).lower()):
+            token = token.strip('_')
+            if len(token) >= 2 and token not in _STOPWORDS:
+                tokens.append(token)
+    return tokens
+
+
+def startup_tokens(startup: Dict) -> List[str]:
+    # Kategoriya alohida belgi sifatida ham qo'shiladi: "IT" - mutaxassislik matnida ham uchraydi
+    category = startup.get('category') or ''
+    return tokenize(startup.get('required_skills'), category)
+
+
+def user_tokens(user: Optional[Dict]) -> List[str]:
+    if not user:
+        return []
+    return tokenize(user.get('specialization'), user.get('experience'))
+
+
+class RecommendationIndex:
+    """Faol startaplar matritsasi va foydalanuvchilar uchun tartiblangan ro'yxatlar"""
+
+    def __init__(self, max_users: int = REC_MAX_USERS):
+        self.max_users = max(1, max_users)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._vocab: Dict[str, int] = {}
+        self._ids: List[int] = []
+        self._row_of: Dict[int, int] = {}
+        self._tokens: List[List[str]] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._matrix_dirty = False
+        # user_id -> (token lar, norma, startap id lari, ballar) - ballar kamayish tartibida
+        self._ranked: "OrderedDict[int, Tuple[frozenset, float, np.ndarray, np.ndarray]]" = OrderedDict()
+
+    # ---------- vektorlar ----------
+
+    def _column(self, token: str) -> int:
+        column = self._vocab.get(token)
+        if column is None:
+            column = len(self._vocab)
+            self._vocab[token] = column
+            self._matrix_dirty = True
+        return column
+
+    @staticmethod
+    def _norm(tokens: Iterable[str]) -> float:
+        # Norma lug'atga bog'liq emas: lug'at o'sganda ham keshlangan ballar mos qoladi
+        return float(np.sqrt(len(set(tokens)))) or 1.0
+
+    def _user_vector(self, tokens: Iterable[str]) -> np.ndarray:
+        tokens = set(tokens)
+        vector = np.zeros(len(self._vocab), dtype=np.float32)
+        columns = [self._vocab[token] for token in tokens if token in self._vocab]
+        if columns:
+            vector[columns] = 1.0 / self._norm(tokens)
+        return vector
+
+    def _ensure_matrix(self):
+        if not self._matrix_dirty and self._matrix.shape == (len(self._ids), len(self._vocab)):
+            return
+        matrix = np.zeros((len(self._ids), len(self._vocab)), dtype=np.float32)
+        for row, tokens in enumerate(self._tokens):
+            columns = list({self._vocab[token] for token in tokens})
+            if columns:
+                matrix[row, columns] = 1.0 / self._norm(tokens)
+        self._matrix = matrix
+        self._matrix_dirty = False
+
+    # ---------- indeks ----------
+
+    def load(self):
+        """Faol startaplardan indeksni qurish (birinchi murojaatda)"""
+        startups = list(db.iter_startups(
+            projection={'id': 1, 'required_skills': 1, 'category': 1},
+            query={'status': 'active'},
+        ))
+        with self._lock:
+            self._vocab.clear()
+            self._ids, self._tokens, self._row_of = [], [], {}
+            for startup in startups:
+                tokens = startup_tokens(startup)
+                for token in tokens:
+                    self._column(token)
+                self._row_of[int(startup['id'])] = len(self._ids)
+                self._ids.append(int(startup['id']))
+                self._tokens.append(tokens)
+            self._matrix_dirty = True
+            self._ensure_matrix()
+            self._ranked.clear()
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def add_startup(self, startup: Dict):
+        """Tasdiqlangan startapni qo'shish: keshlangan ro'yxatlarga faqat shu startap joylanadi"""
+        with self._lock:
+            if not self._loaded:
+                return
+            sid = int(startup['id'])
+            if sid in self._row_of:
+                self.remove_startup(sid)
+            tokens = startup_tokens(startup)
+            for token in tokens:
+                self._column(token)
+            self._row_of[sid] = len(self._ids)
+            self._ids.append(sid)
+            self._tokens.append(tokens)
+            self._matrix_dirty = True
+            if not self._ranked:
+                return
+
+            # Faqat yangi startapning ballari hisoblanadi: kesishmalar soni / normalar
+            token_set = frozenset(tokens)
+            entries = list(self._ranked.items())
+            overlap = np.fromiter((len(token_set & entry[0]) for _, entry in entries),
+                                  dtype=np.float32, count=len(entries))
+            norms = np.fromiter((entry[1] for _, entry in entries), dtype=np.float32, count=len(entries))
+            scores = overlap / (norms * self._norm(token_set))
+            for (uid, (user_set, norm, ids, ranked_scores)), score in zip(entries, scores.tolist()):
+                position = self._insert_position(ids, ranked_scores, sid, score)
+                self._ranked[uid] = (
+                    user_set,
+                    norm,
+                    np.insert(ids, position, sid),
+                    np.insert(ranked_scores, position, np.float32(score)),
+                )
+
+    @staticmethod
+    def _insert_position(ids: np.ndarray, scores: np.ndarray, sid: int, score: float) -> int:
+        # Tartib: ball kamayishi, teng ballda yangi (katta id) oldin
+        better = (scores > score) | ((scores == score) & (ids > sid))
+        return int(np.count_nonzero(better))
+
+    def remove_startup(self, startup_id):
+        with self._lock:
+            sid = int(startup_id)
+            row = self._row_of.pop(sid, None)
+            if row is None:
+                return
+            del self._ids[row]
+            del self._tokens[row]
+            self._row_of = {value: index for index, value in enumerate(self._ids)}
+            self._matrix_dirty = True
+            for uid, (user_set, norm, ids, scores) in list(self._ranked.items()):
+                keep = ids != sid
+                self._ranked[uid] = (user_set, norm, ids[keep], scores[keep])
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._ranked.pop(int(user_id), None)
+
+    # ---------- tavsiyalar ----------
+
+    def _rank(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        self._ensure_matrix()
+        ids = np.array(self._ids, dtype=np.int64)
+        if not len(ids):
+            return ids, np.zeros(0, dtype=np.float32)
+        scores = self._matrix @ self._user_vector(tokens)
+        order = np.lexsort((-ids, -scores))
+        return ids[order], scores[order]
+
+    def ranked(self, user_id: int, user: Optional[Dict] = None) -> List[int]:
+        """Foydalanuvchi uchun startap id lari (eng mosi birinchi)"""
+        uid = int(user_id)
+        self._ensure_loaded()
+        with self._lock:
+            cached = self._ranked.get(uid)
+            if cached is not None:
+                self._ranked.move_to_end(uid)
+                return cached[2].tolist()
+
+        if user is None:
+            user = db.get_user(uid)
+        tokens = user_tokens(user)
+        with self._lock:
+            ids, scores = self._rank(tokens)
+            self._ranked[uid] = (frozenset(tokens), self._norm(tokens), ids, scores)
+            while len(self._ranked) > self.max_users:
+                self._ranked.popitem(last=False)
+            return ids.tolist()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'startups': len(self._ids),
+                'vocabulary': len(self._vocab),
+                'cached_users': len(self._ranked),
+            }
+
+    # ---------- db hooklari ----------
+
+    def on_startup_status(self, startup_id: str, previous: Optional[str], status: str):
+        if status == 'active':
+            startup = db.get_startup(startup_id)
+            if startup:
+                self.add_startup(startup)
+        elif previous == 'active':
+            self.remove_startup(startup_id)
+
+    def on_user_profile(self, user_id: int, field: str):
+        if field in ('specialization', 'experience'):
+            self.invalidate_user(user_id)
+
+    def attach(self):
+        db.subscribe('startup_status', self.on_startup_status)
+        db.subscribe('user_profile', self.on_user_profile)
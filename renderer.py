@@ -0,0 +1,151 @@
+# renderer.py - Xabarni o'rnida yangilash: turiga qarab bitta to'g'ri chaqiruv
+#
+# Sahifalash va karta ko'rinishlari avval edit_message_media -> edit_message_caption
+# -> delete_message -> send_photo zinapoyasi bilan ishlardi: har bir muvaffaqiyatsiz
+# urinish bitta Telegram so'rovi va limitdan joy. Bu yerda har bir (chat, xabar)
+# qaysi turda (matn yoki media) ekanligi eslab qolinadi - callback kelganda
+# call.message dan, yuborilganda javobdan - va kerakli tahrir birinchi marta tanlanadi.
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from telebot import types
+
+from config import env_int
+
+logger = logging.getLogger(__name__)
+
+
+RENDERER_MAX_MESSAGES = env_int("RENDERER_MAX_MESSAGES", 50000)
+
+KIND_TEXT = 'text'
+KIND_MEDIA = 'media'
+
+MEDIA_CONTENT_TYPES = ('photo', 'video', 'animation', 'document', 'audio')
+
+
+def message_kind(message) -> Optional[str]:
+    content_type = getattr(message, 'content_type', None)
+    if content_type == 'text':
+        return KIND_TEXT
+    if content_type in MEDIA_CONTENT_TYPES:
+        return KIND_MEDIA
+    return None
+
+
+def _not_modified(error: Exception) -> bool:
+    return 'message is not modified' in str(error)
+
+
+class MessageRenderer:
+    def __init__(self, bot, max_messages: int = RENDERER_MAX_MESSAGES):
+        self.bot = bot
+        self.max_messages = max(1, max_messages)
+        # (chat_id, message_id) -> (tur, rasm file_id)
+        self._messages: "OrderedDict[Tuple[int, int], Tuple[str, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'edits': 0, 'sends': 0, 'deletes': 0, 'failed_edits': 0, 'not_modified': 0, 'unknown_kind': 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _put(self, chat_id: int, message_id: int, kind: str, photo: Optional[str]):
+        key = (int(chat_id), int(message_id))
+        with self._lock:
+            self._messages[key] = (kind, photo)
+            self._messages.move_to_end(key)
+            while len(self._messages) > self.max_messages:
+                self._messages.popitem(last=False)
+
+    def remember(self, message):
+        """Telegram dan kelgan xabar turini eslab qolish (masalan, call.message)"""
+        if message is None:
+            return
+        kind = message_kind(message)
+        if kind is None:
+            return
+        photo = message.photo[-1].file_id if kind == KIND_MEDIA and message.photo else None
+        self._put(message.chat.id, message.message_id, kind, photo)
+
+    def remember_callback(self, call):
+        self.remember(call.message)
+
+    def forget(self, chat_id: int, message_id: int):
+        with self._lock:
+            self._messages.pop((int(chat_id), int(message_id)), None)
+
+    def _known(self, chat_id: int, message_id: int) -> Optional[Tuple[str, Optional[str]]]:
+        with self._lock:
+            return self._messages.get((int(chat_id), int(message_id)))
+
+    def _edit(self, chat_id: int, message_id: int, text: str, reply_markup, photo: Optional[str],
+              current_photo: Optional[str]) -> bool:
+        try:
+            if photo is None:
+                self.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
+            elif photo == current_photo:
+                # Rasm o'zgarmagan - faqat izoh
+                self.bot.edit_message_caption(caption=text, chat_id=chat_id, message_id=message_id,
+                                              reply_markup=reply_markup)
+            else:
+                self.bot.edit_message_media(
+                    media=types.InputMediaPhoto(photo, caption=text, parse_mode=self.bot.parse_mode),
+                    chat_id=chat_id, message_id=message_id, reply_markup=reply_markup)
+        except Exception as e:
+            if _not_modified(e):
+                self._count('not_modified')
+                return True
+            logger.info(f"Xabar {chat_id}/{message_id} tahrirlanmadi: {e}")
+            self._count('failed_edits')
+            return False
+        self._count('edits')
+        self._put(chat_id, message_id, KIND_MEDIA if photo else KIND_TEXT, photo)
+        return True
+
+    def _delete(self, chat_id: int, message_id: int):
+        self.forget(chat_id, message_id)
+        try:
+            self.bot.delete_message(chat_id, message_id)
+            self._count('deletes')
+        except Exception:
+            pass
+
+    def send(self, chat_id: int, text: str, reply_markup=None, photo: Optional[str] = None):
+        if photo:
+            message = self.bot.send_photo(chat_id, photo, caption=text, reply_markup=reply_markup)
+        else:
+            message = self.bot.send_message(chat_id, text, reply_markup=reply_markup)
+        self._count('sends')
+        if message is not None:
+            self._put(chat_id, message.message_id, KIND_MEDIA if photo else KIND_TEXT, photo)
+        return message
+
+    def show(self, chat_id: int, text: str, reply_markup=None, photo: Optional[str] = None,
+             message_id: Optional[int] = None):
+        """message_id bo'lsa o'rnida yangilash, aks holda (yoki iloji bo'lmasa) yangi yuborish.
+
+        Rasmli xabarni matnga (yoki aksincha) tahrirlab bo'lmaydi - eski xabar o'chiriladi.
+        """
+        if message_id and (reply_markup is None or isinstance(reply_markup, types.InlineKeyboardMarkup)):
+            target = KIND_MEDIA if photo else KIND_TEXT
+            known = self._known(chat_id, message_id)
+            if known is None:
+                self._count('unknown_kind')
+            if known is None or known[0] == target:
+                if self._edit(chat_id, message_id, text, reply_markup, photo, known[1] if known else None):
+                    return message_id
+                if known is None:
+                    # Tur noma'lum edi - xato tur farqidan bo'lishi mumkin
+                    self._delete(chat_id, message_id)
+            else:
+                self._delete(chat_id, message_id)
+        message = self.send(chat_id, text, reply_markup, photo)
+        return message.message_id if message is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data['tracked_messages'] = len(self._messages)
+        return data
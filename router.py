@@ -0,0 +1,221 @@
+# router.py - Handlerlarni kalit bo'yicha indekslaydigan router
+#
+# Aniq matnlar va callback qiymatlari dict da, callback prefikslari trie da
+# saqlanadi. Holat (state) va admin tekshiruvlari kalit topilgandan keyin
+# faqat shu kalitdagi handlerlar uchun bajariladi.
+from typing import Any, Callable, Dict, List, Optional
+
+from telebot import util
+
+
+class Route:
+    __slots__ = ('handler', 'guard')
+
+    def __init__(self, handler: Callable, guard: Optional[Callable] = None):
+        self.handler = handler
+        self.guard = guard
+
+    def accepts(self, event) -> bool:
+        return self.guard is None or bool(self.guard(event))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'handler': self.handler.__name__,
+            'guard': getattr(self.guard, '__name__', None) if self.guard else None,
+        }
+
+
+class _TrieNode:
+    __slots__ = ('children', 'routes')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.routes: List[Route] = []
+
+
+class PrefixTrie:
+    """Prefiks -> handlerlar; eng uzun mos prefiks birinchi tekshiriladi"""
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._prefixes: Dict[str, List[Route]] = {}
+
+    def add(self, prefix: str, route: Route):
+        node = self._root
+        for ch in prefix:
+            node = node.children.setdefault(ch, _TrieNode())
+        node.routes.append(route)
+        self._prefixes[prefix] = node.routes
+
+    def matches(self, text: str) -> List[List[Route]]:
+        found = []
+        node = self._root
+        for ch in text:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if node.routes:
+                found.append(node.routes)
+        found.reverse()
+        return found
+
+    def items(self):
+        return self._prefixes.items()
+
+
+def _first_accepting(routes, event) -> Optional[Route]:
+    for route in routes:
+        if route.accepts(event):
+            return route
+    return None
+
+
+class Router:
+    def __init__(self, observer: Optional[Callable] = None):
+        # observer(handler, event) - handler ni o'rab bajaradi (masalan, metrics.observe_handler)
+        self.observer = observer
+        # conversations.dispatch(message) -> bool - faol suhbat qadami routing dan oldin ishlanadi
+        self.conversations = None
+        # hook(call) - har bir callback da routing dan oldin (masalan, xabar turini eslab qolish)
+        self._callback_hooks: List[Callable] = []
+        self._commands: Dict[str, List[Route]] = {}
+        self._texts: Dict[str, List[Route]] = {}
+        self._content_types: Dict[str, List[Route]] = {}
+        self._callbacks: Dict[str, List[Route]] = {}
+        self._callback_prefixes = PrefixTrie()
+        self._message_fallback: Optional[Route] = None
+        self._callback_fallback: Optional[Route] = None
+
+    # ---------- ro'yxatga olish ----------
+
+    @staticmethod
+    def _register(table: Dict[str, List[Route]], keys, guard):
+        def decorator(handler):
+            for key in keys:
+                table.setdefault(key, []).append(Route(handler, guard))
+            return handler
+        return decorator
+
+    def command(self, *commands: str, guard: Optional[Callable] = None):
+        return self._register(self._commands, commands, guard)
+
+    def text(self, *texts: str, guard: Optional[Callable] = None):
+        return self._register(self._texts, texts, guard)
+
+    def content(self, *content_types: str, guard: Optional[Callable] = None):
+        return self._register(self._content_types, content_types, guard)
+
+    def callback(self, *values: str, guard: Optional[Callable] = None):
+        return self._register(self._callbacks, values, guard)
+
+    def callback_prefix(self, prefix: str, guard: Optional[Callable] = None):
+        def decorator(handler):
+            self._callback_prefixes.add(prefix, Route(handler, guard))
+            return handler
+        return decorator
+
+    def default_message(self, guard: Optional[Callable] = None):
+        def decorator(handler):
+            self._message_fallback = Route(handler, guard)
+            return handler
+        return decorator
+
+    def before_callback(self, hook: Callable):
+        self._callback_hooks.append(hook)
+        return hook
+
+    def has_text(self, text: str) -> bool:
+        """Matn tugma/menyu sifatida ro'yxatdan o'tganmi"""
+        return text in self._texts
+
+    def default_callback(self, guard: Optional[Callable] = None):
+        def decorator(handler):
+            self._callback_fallback = Route(handler, guard)
+            return handler
+        return decorator
+
+    # ---------- qidirish ----------
+
+    def resolve_message(self, message) -> Optional[Route]:
+        content_type = message.content_type
+        if content_type == 'text':
+            text = message.text or ''
+            command = util.extract_command(text)
+            if command is not None:
+                route = _first_accepting(self._commands.get(command, ()), message)
+                if route:
+                    return route
+            route = _first_accepting(self._texts.get(text, ()), message)
+            if route:
+                return route
+        else:
+            route = _first_accepting(self._content_types.get(content_type, ()), message)
+            if route:
+                return route
+
+        # Umumiy handler faqat matnli xabarlar uchun
+        fallback = self._message_fallback
+        if content_type == 'text' and fallback and fallback.accepts(message):
+            return fallback
+        return None
+
+    def resolve_callback(self, call) -> Optional[Route]:
+        data = call.data or ''
+        route = _first_accepting(self._callbacks.get(data, ()), call)
+        if route:
+            return route
+        for routes in self._callback_prefixes.matches(data):
+            route = _first_accepting(routes, call)
+            if route:
+                return route
+        fallback = self._callback_fallback
+        if fallback and fallback.accepts(call):
+            return fallback
+        return None
+
+    def dispatch_message(self, message) -> bool:
+        if self.conversations is not None and self.conversations.dispatch(message):
+            return True
+        route = self.resolve_message(message)
+        if route is None:
+            return False
+        self._invoke(route, message)
+        return True
+
+    def dispatch_callback(self, call) -> bool:
+        for hook in self._callback_hooks:
+            hook(call)
+        route = self.resolve_callback(call)
+        if route is None:
+            return False
+        self._invoke(route, call)
+        return True
+
+    def _invoke(self, route: Route, event):
+        if self.observer is None:
+            route.handler(event)
+        else:
+            self.observer(route.handler, event)
+
+    def attach(self, bot):
+        """Botga bitta message va bitta callback handler sifatida ulash"""
+        content_types = util.content_type_media + util.content_type_service
+        bot.register_message_handler(self.dispatch_message, content_types=content_types, func=lambda message: True)
+        bot.register_callback_query_handler(self.dispatch_callback, func=lambda call: True)
+
+    # ---------- debug ----------
+
+    def describe(self) -> Dict[str, Any]:
+        """Routing jadvali (debug uchun)"""
+        def dump(table):
+            return {key: [route.describe() for route in routes] for key, routes in table.items()}
+
+        return {
+            'commands': dump(self._commands),
+            'texts': dump(self._texts),
+            'content_types': dump(self._content_types),
+            'callbacks': dump(self._callbacks),
+            'callback_prefixes': dump(dict(self._callback_prefixes.items())),
+            'default_message': self._message_fallback.describe() if self._message_fallback else None,
+            'default_callback': self._callback_fallback.describe() if self._callback_fallback else None,
+        }
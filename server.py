@@ -1,8 +1,12 @@
 import os
+import io
+import csv
+import hmac
 import json
+import hashlib
 import logging
 from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request, session, send_from_directory
+from flask import Flask, Response, g, render_template, jsonify, request, session, send_from_directory, stream_with_context
 from flask_cors import CORS
 from functools import wraps
 import threading
@@ -11,6 +15,8 @@ import traceback
 import sys
 from werkzeug.security import generate_password_hash, check_password_hash
 
+import metrics
+
 def _ensure_utf8_stdio():
     for stream_name in ("stdout", "stderr"):
         stream = getattr(sys, stream_name, None)
@@ -39,10 +45,12 @@ try:
         update_startup_results, update_join_request, get_join_request,
         get_user_joined_startups,
         update_startup_post_id,
-        get_startup_member_count,
         get_admin_by_username, get_admin_by_id, get_all_admins,
         add_admin, delete_admin, update_admin_last_login,
-        get_app_settings, update_app_settings
+        get_app_settings, update_app_settings,
+        get_app_now, get_daily_user_counts, get_monthly_user_counts,
+        iter_users, iter_startups, get_startup_counts_by_owner, EXPORT_BATCH_SIZE,
+        get_broadcast_job, get_recent_broadcast_jobs
     )
     DB_AVAILABLE = True
     print("✅ Database moduli muvaffaqiyatli yuklandi")
@@ -75,22 +83,55 @@ except ImportError as e:
     def update_admin_last_login(*args): return None
     def get_app_settings(): return {'site_name': 'GarajHub', 'admin_email': 'admin@garajhub.uz', 'timezone': 'Asia/Tashkent'}
     def update_app_settings(*args): return None
+    def get_broadcast_job(*args): return None
+    def get_recent_broadcast_jobs(*args): return []
 
 # Bot import va ishga tushirish
 try:
-    from main import bot, BOT_TOKEN, ADMIN_ID, CHANNEL_USERNAME
+    from main import bot, broadcaster, channel_updater, tg, recommender, transport, fanout, conversations, renderer, BOT_TOKEN, ADMIN_ID, CHANNEL_USERNAME
     from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+    from dispatcher import parse_update
     import telebot.apihelper as apihelper
+    from cards import cache_stats as card_cache_stats
     BOT_AVAILABLE = True
     print("✅ Bot moduli muvaffaqiyatli yuklandi")
     
     # Bot threadini global o'zgaruvchi sifatida saqlash
     bot_thread = None
+    BOT_RUNTIME = os.getenv('BOT_RUNTIME', 'sync').strip().lower()
+    
+    def setup_webhook():
+        """Webhook ni Telegram da ro'yxatdan o'tkazish (BOT_MODE=webhook)"""
+        if not WEBHOOK_URL:
+            print("⚠️ WEBHOOK_URL berilmagan, webhook o'rnatilmadi")
+            return False
+        try:
+            bot.set_webhook(
+                url=WEBHOOK_URL + WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                max_connections=WEBHOOK_MAX_CONNECTIONS
+            )
+            print("✅ Webhook o'rnatildi")
+            return True
+        except Exception as e:
+            logging.error(f"Webhook o'rnatishda xatolik: {e}")
+            return False
     
     def start_bot():
         """Botni alohida threadda ishga tushirish"""
         global bot_thread
         
+        # Oldingi jarayonda tugallanmay qolgan broadcast ishlari va update lar
+        broadcaster.resume()
+        bot.resume_updates()
+        
+        # Webhook rejimida update lar /telegram/webhook/<secret> orqali keladi, polling kerak emas
+        if BOT_MODE == 'webhook':
+            if BOT_RUNTIME == 'async':
+                print("⚠️ Webhook rejimida update lar sinxron dispatcher orqali bajariladi")
+            setup_webhook()
+            return
+        
         def run_bot():
             print("🤖 Bot ishga tushmoqda...")
             while True:
@@ -117,8 +158,15 @@ try:
                     logging.error(f"Botda xatolik: {e}")
                     time.sleep(5)
         
+        # BOT_RUNTIME=async bo'lsa update lar AsyncTeleBot orqali qabul qilinadi
+        if BOT_RUNTIME == 'async':
+            import async_bot
+            target = async_bot.run
+        else:
+            target = run_bot
+        
         # Botni alohida threadda ishga tushirish
-        bot_thread = threading.Thread(target=run_bot, daemon=True)
+        bot_thread = threading.Thread(target=target, daemon=True)
         bot_thread.start()
         print("✅ Bot alohida threadda ishga tushirildi")
     
@@ -132,6 +180,24 @@ except ImportError as e:
     def start_bot():
         print("⚠️ Bot mavjud emas, ishga tushirib bo'lmadi")
 
+# Webhook sozlamalari
+BOT_MODE = os.getenv('BOT_MODE', 'polling').strip().lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '').strip().rstrip('/')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '').strip() or hashlib.sha256(BOT_TOKEN.encode()).hexdigest()[:32]
+WEBHOOK_PATH = f'/telegram/webhook/{WEBHOOK_SECRET}'
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 40))
+# Bitta chat update larining tartibi jarayon ichidagi ChatOrderedDispatcher da saqlanadi.
+# Bir nechta web worker da bitta chat update lari parallel bajarilib ketadi -
+# webhook rejimi faqat bitta worker bilan ishga tushadi
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+if BOT_MODE == 'webhook' and WEB_CONCURRENCY > 1:
+    raise RuntimeError(
+        f"BOT_MODE=webhook faqat bitta web worker bilan ishlaydi (WEB_CONCURRENCY={WEB_CONCURRENCY})"
+    )
+
+# /metrics uchun token (Prometheus). Berilmasa admin sessiyasi talab qilinadi
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '').strip()
+
 app = Flask(__name__, template_folder='templates', static_folder='static')
 app.secret_key = os.environ.get('SECRET_KEY', 'garajhub-admin-secret-key-2024')
 app.config['SESSION_TYPE'] = 'filesystem'
@@ -187,6 +253,39 @@ def role_required(roles):
         return decorated_function
     return decorator
 
+# ==================== METRICS ====================
+
+@app.before_request
+def _metrics_begin():
+    rule = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_invocation = metrics.begin('http', f"{request.method} {rule}")
+
+@app.after_request
+def _metrics_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def _metrics_end(error):
+    invocation = g.pop('metrics_invocation', None)
+    if invocation is None:
+        return
+    if error is not None:
+        metrics.end(invocation, 'error', error)
+    else:
+        metrics.end(invocation, f"{g.pop('metrics_status', 500) // 100}xx")
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Handler va route metrikalari (Prometheus text format)"""
+    if METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').replace('Bearer ', '', 1).strip() or request.args.get('token', '')
+        if not hmac.compare_digest(supplied, METRICS_TOKEN):
+            return Response('unauthorized\n', status=401, mimetype='text/plain')
+    elif 'admin_logged_in' not in session:
+        return jsonify({'success': False, 'error': 'Kirish talab qilinadi'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # ==================== UTILITY FUNCTIONS ====================
 
 def format_datetime(dt_str):
@@ -257,51 +356,21 @@ def format_date_for_display(date_str):
 # ==================== ANALYTICS HELPERS ====================
 
 def _query_user_counts_by_day(start_date):
-    conn = get_connection()
-    if not conn:
-        return {}
     try:
         start_dt = datetime.fromisoformat(str(start_date))
     except Exception:
         return {}
-
-    result = {}
-    rows = conn["users"].find({}, {"joined_at": 1})
-    for row in rows:
-        joined_at = row.get("joined_at")
-        dt = parse_datetime_flexible(joined_at)
-        if not dt:
-            continue
-        if dt.date() < start_dt.date():
-            continue
-        key = dt.date().isoformat()
-        result[key] = result.get(key, 0) + 1
-    return dict(sorted(result.items(), key=lambda item: item[0]))
+    return get_daily_user_counts(start_dt.date().isoformat())
 
 def _query_user_counts_by_month(start_month_date):
-    conn = get_connection()
-    if not conn:
-        return {}
     try:
         start_dt = datetime.fromisoformat(str(start_month_date))
     except Exception:
         return {}
-
-    result = {}
-    rows = conn["users"].find({}, {"joined_at": 1})
-    for row in rows:
-        joined_at = row.get("joined_at")
-        dt = parse_datetime_flexible(joined_at)
-        if not dt:
-            continue
-        if dt.date() < start_dt.date():
-            continue
-        key = dt.strftime("%Y-%m")
-        result[key] = result.get(key, 0) + 1
-    return dict(sorted(result.items(), key=lambda item: item[0]))
+    return get_monthly_user_counts(start_dt.date().isoformat())
 
 def _build_user_growth_chart(period: str):
-    now = datetime.now()
+    now = get_app_now()
     period = (period or 'month').lower()
     day_periods = {'week': 7, 'month': 30, 'quarter': 90}
     if period not in day_periods and period != 'year':
@@ -722,6 +791,130 @@ def get_user_detail(user_id):
         logger.error(f"User detail error: {traceback.format_exc()}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ==================== TELEGRAM WEBHOOK ====================
+
+@app.route('/telegram/webhook/<secret>', methods=['POST'])
+def telegram_webhook(secret):
+    """Telegram update larini qabul qilib dispatcher navbatiga qo'yish"""
+    if not BOT_AVAILABLE or BOT_MODE != 'webhook':
+        return jsonify({'success': False, 'error': 'Webhook rejimi yoqilmagan'}), 404
+    
+    header_secret = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+    if not (hmac.compare_digest(secret, WEBHOOK_SECRET) and hmac.compare_digest(header_secret, WEBHOOK_SECRET)):
+        return jsonify({'success': False, 'error': 'Ruxsat yo\'q'}), 403
+    
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or 'update_id' not in payload:
+        return jsonify({'success': False, 'error': 'Noto\'g\'ri update'}), 400
+    
+    try:
+        update = parse_update(json.dumps(payload))
+    except Exception as e:
+        logger.error(f"Webhook update parse xatosi: {e}")
+        return jsonify({'success': False, 'error': 'Noto\'g\'ri update'}), 400
+    
+    # Navbat to'la bo'lsa 503 - Telegram update ni keyinroq qayta yuboradi
+    if not bot.enqueue_update(update, block=False):
+        return jsonify({'success': False, 'error': 'Navbat to\'la'}), 503
+    
+    return jsonify({'success': True})
+
+# ==================== EXPORT ====================
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+def _csv_response(rows, filename):
+    response = Response(stream_with_context(rows), mimetype='text/csv; charset=utf-8')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+def _startup_export_rows(startups):
+    """Bitta batch startaplar uchun egalarni bitta so'rovda olib CSV qatorlarini qaytarish"""
+    owner_ids = list({s.get('owner_id') for s in startups if s.get('owner_id')})
+    owners = {}
+    if owner_ids:
+        for owner in iter_users(
+            query={'user_id': {'$in': owner_ids}},
+            projection={'user_id': 1, 'first_name': 1, 'last_name': 1}
+        ):
+            owners[owner.get('user_id')] = f"{owner.get('first_name', '')} {owner.get('last_name', '')}".strip()
+    
+    for startup in startups:
+        owner_id = startup.get('owner_id')
+        yield _csv_line([
+            startup.get('id', ''),
+            startup.get('name', ''),
+            owners.get(owner_id) or "Noma'lum",
+            startup.get('category', 'Boshqa'),
+            startup.get('status', 'pending'),
+            startup.get('current_members', 0),
+            startup.get('max_members', 0),
+            format_datetime(startup.get('created_at', '')),
+            startup.get('description', '')
+        ])
+
+@app.route('/api/export/users.csv')
+@login_required
+def export_users_csv():
+    """Foydalanuvchilarni CSV ko'rinishida oqim bilan yuklash"""
+    if not DB_AVAILABLE:
+        return jsonify({'success': False, 'error': 'Database mavjud emas'}), 500
+    
+    startup_counts = get_startup_counts_by_owner()
+    projection = {
+        'user_id': 1, 'first_name': 1, 'last_name': 1, 'username': 1, 'phone': 1,
+        'specialization': 1, 'experience': 1, 'joined_at': 1
+    }
+    
+    def generate():
+        yield _csv_line(['ID', 'Ism', 'Familiya', 'Username', 'Telefon', 'Mutaxassislik',
+                         'Tajriba', 'Startaplar soni', 'Status', "Ro'yxat sanasi"])
+        for user in iter_users(projection=projection):
+            user_id = user.get('user_id')
+            yield _csv_line([
+                user_id,
+                user.get('first_name', ''),
+                user.get('last_name', ''),
+                f"@{user.get('username')}" if user.get('username') else '',
+                user.get('phone', ''),
+                user.get('specialization', ''),
+                user.get('experience', ''),
+                startup_counts.get(user_id, 0),
+                'active',
+                format_datetime(user.get('joined_at', ''))
+            ])
+    
+    return _csv_response(generate(), f"users_export_{datetime.now().strftime('%Y-%m-%d')}.csv")
+
+@app.route('/api/export/startups.csv')
+@login_required
+def export_startups_csv():
+    """Startaplarni CSV ko'rinishida oqim bilan yuklash"""
+    if not DB_AVAILABLE:
+        return jsonify({'success': False, 'error': 'Database mavjud emas'}), 500
+    
+    projection = {
+        'id': 1, 'name': 1, 'owner_id': 1, 'category': 1, 'status': 1,
+        'current_members': 1, 'max_members': 1, 'created_at': 1, 'description': 1
+    }
+    
+    def generate():
+        yield _csv_line(['ID', 'Nomi', 'Egasi', 'Kategoriya', 'Status', "A'zolar soni",
+                         "Maks a'zolar", 'Yaratilgan sana', 'Tavsif'])
+        batch = []
+        for startup in iter_startups(projection=projection):
+            batch.append(startup)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield from _startup_export_rows(batch)
+                batch = []
+        if batch:
+            yield from _startup_export_rows(batch)
+    
+    return _csv_response(generate(), f"startups_export_{datetime.now().strftime('%Y-%m-%d')}.csv")
+
 @app.route('/api/startups')
 @login_required
 def get_startups_list():
@@ -799,12 +992,7 @@ def get_startups_list():
                         owner_name = f"User {owner_id}"
             
             # A'zolar soni
-            startup_id = str(startup.get('_id', ''))
-            members_count = 0
-            try:
-                members_count = get_startup_member_count(startup_id) or 0
-            except:
-                pass
+            members_count = startup.get('current_members', 0) or 0
             
             # Status matni
             status_texts = {
@@ -973,7 +1161,7 @@ def approve_startup(startup_id):
                         f"🏷️ <b>Kategoriya:</b> {startup.get('category', '—')}\n"
                         f"🔧 <b>Kerakli mutaxassislar:</b>\n{startup.get('required_skills', '—')}\n\n"
                         f"👥 <b>A'zolar:</b> 0 / {startup.get('max_members', '—')}\n\n"
-                        f"➕ <b>O'z startupingizni yaratish uchun:</b> @{bot.get_me().username}"
+                        f"➕ <b>O'z startupingizni yaratish uchun:</b> @{tg.username()}"
                     )
                     
                     # Tugma yaratish
@@ -1103,18 +1291,17 @@ def complete_startup(startup_id):
                 if startup:
                     # Barcha a'zolarga xabar
                     members = get_all_startup_members(startup_id)
-                    for member_id in members:
-                        try:
-                            bot.send_message(
-                                member_id,
-                                f"🏁 <b>Startup yakunlandi</b>\n\n"
-                                f"🎯 <b>{startup['name']}</b>\n"
-                                f"📅 <b>Yakunlangan sana:</b> {datetime.now().strftime('%d-%m-%Y')}\n"
-                                f"📝 <b>Natijalar:</b>\n{results}",
-                                parse_mode='HTML'
-                            )
-                        except Exception as e:
-                            logger.error(f"Memberga xabar yuborishda xato {member_id}: {e}")
+                    member_text = (
+                        f"🏁 <b>Startup yakunlandi</b>\n\n"
+                        f"🎯 <b>{startup['name']}</b>\n"
+                        f"📅 <b>Yakunlangan sana:</b> {datetime.now().strftime('%d-%m-%Y')}\n"
+                        f"📝 <b>Natijalar:</b>\n{results}"
+                    )
+                    fanout.send(
+                        members,
+                        lambda member_id: bot.send_message(member_id, member_text, parse_mode='HTML'),
+                        label=f"Startup #{startup_id} yakuni",
+                    )
                     
                     # Muallifga alohida xabar
                     if startup.get('owner_id'):
@@ -1143,11 +1330,32 @@ def complete_startup(startup_id):
         logger.error(f"Complete startup error: {traceback.format_exc()}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _broadcast_job_data(job):
+    total = int(job.get('total') or 0)
+    sent = int(job.get('sent') or 0)
+    failed = int(job.get('failed') or 0)
+    payload = job.get('payload') or {}
+    return {
+        'id': job.get('id'),
+        'status': job.get('status'),
+        'kind': payload.get('kind', 'text'),
+        'text': payload.get('text', ''),
+        'created_by': job.get('created_by'),
+        'created_at': job.get('created_at'),
+        'started_at': job.get('started_at'),
+        'finished_at': job.get('finished_at'),
+        'total': total,
+        'sent': sent,
+        'failed': failed,
+        'progress': f"{((sent + failed) / total * 100):.1f}%" if total > 0 else "0%",
+        'success_rate': f"{(sent / (sent + failed) * 100):.1f}%" if sent + failed > 0 else "0%"
+    }
+
 @app.route('/api/broadcast', methods=['POST'])
 @login_required
 @role_required(['superadmin'])
 def broadcast_message():
-    """Xabar yuborish"""
+    """Xabar yuborish (fon ishida, javob darhol qaytadi)"""
     try:
         data = request.json
         message = data.get('message')
@@ -1158,37 +1366,61 @@ def broadcast_message():
         if not BOT_AVAILABLE or not DB_AVAILABLE:
             return jsonify({'success': False, 'error': 'Bot yoki Database mavjud emas'}), 500
         
-        sent_count = 0
-        failed_count = 0
-        
-        users_ids = get_all_users()
-        total_users = len(users_ids)
-        
-        for user_id in users_ids:
-            try:
-                bot.send_message(user_id, f"📢 <b>Yangilik!</b>\n\n{message}", parse_mode='HTML')
-                sent_count += 1
-                time.sleep(0.1)  # Flood dan qochish
-            except Exception as e:
-                logger.error(f"Foydalanuvchiga xabar yuborishda xato {user_id}: {e}")
-                failed_count += 1
-        
-        logger.info(f"Broadcast message: sent={sent_count}, failed={failed_count}, total={total_users}")
+        job = broadcaster.start(
+            {'kind': 'text', 'text': message},
+            created_by=session.get('admin_username', 'admin')
+        )
+        logger.info(f"Broadcast job #{job['id']} started by {session.get('admin_username')}")
         
         return jsonify({
             'success': True,
-            'message': 'Xabar yuborildi',
-            'data': {
-                'sent': sent_count,
-                'failed': failed_count,
-                'total': total_users,
-                'success_rate': f"{(sent_count/total_users*100):.1f}%" if total_users > 0 else "0%"
-            }
+            'message': 'Xabar yuborish boshlandi',
+            'data': _broadcast_job_data(job)
         })
     except Exception as e:
         logger.error(f"Broadcast error: {traceback.format_exc()}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/broadcast/<int:job_id>')
+@login_required
+def get_broadcast_status(job_id):
+    """Broadcast ishi holati"""
+    try:
+        job = get_broadcast_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Topilmadi'}), 404
+        return jsonify({'success': True, 'data': _broadcast_job_data(job)})
+    except Exception as e:
+        logger.error(f"Broadcast status error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/broadcast/<int:job_id>/cancel', methods=['POST'])
+@login_required
+@role_required(['superadmin'])
+def cancel_broadcast(job_id):
+    """Broadcast ishini to'xtatish"""
+    try:
+        if not BOT_AVAILABLE:
+            return jsonify({'success': False, 'error': 'Bot mavjud emas'}), 500
+        if not broadcaster.cancel(job_id):
+            return jsonify({'success': False, 'error': 'Ish faol emas'}), 400
+        return jsonify({'success': True, 'message': "Xabar yuborish to'xtatildi"})
+    except Exception as e:
+        logger.error(f"Broadcast cancel error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/broadcasts')
+@login_required
+def get_broadcasts():
+    """Oxirgi broadcast ishlari"""
+    try:
+        limit = min(int(request.args.get('limit', 10)), 50)
+        jobs = get_recent_broadcast_jobs(limit)
+        return jsonify({'success': True, 'data': [_broadcast_job_data(job) for job in jobs]})
+    except Exception as e:
+        logger.error(f"Broadcasts error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/categories')
 @login_required
 def get_categories():
@@ -1391,6 +1623,22 @@ def system_health():
             'uptime': int(time.time()),
             'timestamp': datetime.now().isoformat()
         }
+        health_data['bot_mode'] = BOT_MODE
+        if BOT_AVAILABLE and hasattr(bot, 'dispatcher'):
+            health_data['dispatcher'] = bot.dispatcher.stats()
+            if bot.journal is not None:
+                health_data['update_journal'] = bot.journal.stats()
+            if bot.recorder is not None:
+                health_data['update_recorder'] = bot.recorder.stats()
+        if BOT_AVAILABLE:
+            health_data['channel_updater'] = channel_updater.stats()
+            health_data['telegram_client'] = tg.stats()
+            health_data['card_cache'] = card_cache_stats()
+            health_data['recommendations'] = recommender.stats()
+            health_data['telegram_transport'] = transport.stats()
+            health_data['conversations'] = conversations.stats()
+            health_data['renderer'] = renderer.stats()
+        health_data['metrics'] = metrics.snapshot()
         
         return jsonify({
             'success': True,
@@ -1400,6 +1648,15 @@ def system_health():
         logger.error(f"System health error: {traceback.format_exc()}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/system/routes')
+@login_required
+def system_routes():
+    """Bot routing jadvali (debug)"""
+    if not BOT_AVAILABLE:
+        return jsonify({'success': False, 'error': 'Bot mavjud emas'}), 500
+    from main import router
+    return jsonify({'success': True, 'data': router.describe()})
+
 @app.route('/api/notifications')
 @login_required
 def get_notifications():
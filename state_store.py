@@ -0,0 +1,139 @@
+# state_store.py - Suhbat holatlari (state) uchun saqlash qatlami
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import env_int, env_str
+
+
+STATE_STORE_BACKEND = env_str("STATE_STORE_BACKEND", default="memory").lower()
+STATE_TTL_SECONDS = env_int("STATE_TTL_SECONDS", 24 * 60 * 60)
+STATE_MAX_ENTRIES = env_int("STATE_MAX_ENTRIES", 50000)
+
+
+class StateStore(ABC):
+    """(namespace, user_id) bo'yicha qiymat saqlovchi interfeys"""
+
+    @abstractmethod
+    def get(self, namespace: str, user_id: int, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, user_id: int, value: Any):
+        ...
+
+    @abstractmethod
+    def update(self, namespace: str, user_id: int, **fields) -> Dict:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, user_id: int):
+        ...
+
+    @abstractmethod
+    def clear_user(self, user_id: int):
+        ...
+
+
+class MemoryStateStore(StateStore):
+    """Jarayon ichidagi saqlash: TTL va LRU bo'yicha chegaralangan"""
+
+    def __init__(self, ttl_seconds: int = STATE_TTL_SECONDS, max_entries: int = STATE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._items: "OrderedDict[Tuple[str, int], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_live(self, key: Tuple[str, int]) -> Optional[Tuple[float, Any]]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del self._items[key]
+            return None
+        return item
+
+    def _put(self, key: Tuple[str, int], value: Any):
+        self._items[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def get(self, namespace: str, user_id: int, default: Any = None) -> Any:
+        key = (namespace, int(user_id))
+        with self._lock:
+            item = self._get_live(key)
+            if item is None:
+                return default
+            self._items.move_to_end(key)
+            value = item[1]
+        return dict(value) if isinstance(value, dict) else value
+
+    def set(self, namespace: str, user_id: int, value: Any):
+        if isinstance(value, dict):
+            value = dict(value)
+        with self._lock:
+            self._put((namespace, int(user_id)), value)
+
+    def update(self, namespace: str, user_id: int, **fields) -> Dict:
+        key = (namespace, int(user_id))
+        with self._lock:
+            item = self._get_live(key)
+            current = dict(item[1]) if item and isinstance(item[1], dict) else {}
+            current.update(fields)
+            self._put(key, current)
+        return dict(current)
+
+    def delete(self, namespace: str, user_id: int):
+        with self._lock:
+            self._items.pop((namespace, int(user_id)), None)
+
+    def clear_user(self, user_id: int):
+        uid = int(user_id)
+        with self._lock:
+            for key in [key for key in self._items if key[1] == uid]:
+                del self._items[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class MongoStateStore(StateStore):
+    """MongoDB da saqlash: bir nechta bot jarayoni uchun umumiy, TTL indeks bilan tozalanadi"""
+
+    def __init__(self, ttl_seconds: int = STATE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, namespace: str, user_id: int, default: Any = None) -> Any:
+        from db import get_conversation_state
+        value = get_conversation_state(namespace, user_id)
+        return default if value is None else value
+
+    def set(self, namespace: str, user_id: int, value: Any):
+        from db import set_conversation_state
+        set_conversation_state(namespace, user_id, value, self.ttl_seconds)
+
+    def update(self, namespace: str, user_id: int, **fields) -> Dict:
+        from db import update_conversation_state
+        return update_conversation_state(namespace, user_id, fields, self.ttl_seconds)
+
+    def delete(self, namespace: str, user_id: int):
+        from db import delete_conversation_state
+        delete_conversation_state(namespace, user_id)
+
+    def clear_user(self, user_id: int):
+        from db import clear_conversation_state
+        clear_conversation_state(user_id)
+
+
+def create_state_store(backend: Optional[str] = None, ttl_seconds: Optional[int] = None) -> StateStore:
+    backend = (backend or STATE_STORE_BACKEND).strip().lower()
+    ttl_seconds = ttl_seconds or STATE_TTL_SECONDS
+    if backend == "mongo":
+        return MongoStateStore(ttl_seconds)
+    if backend != "memory":
+        raise ValueError(f"Noma'lum STATE_STORE_BACKEND: {backend}")
+    return MemoryStateStore(ttl_seconds)
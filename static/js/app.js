@@ -1312,9 +1312,9 @@ async function handleBroadcast(e) {
         hideLoading();
         
         if (data.success) {
-            showToast('Xabar yuborildi', 'success');
+            showToast('Xabar yuborish boshlandi', 'success');
             clearMessageForm();
-            loadMessageHistory();
+            watchBroadcastJob(data.data.id);
         } else {
             showToast(data.error || 'Xabar yuborish xatosi', 'error');
         }
@@ -1353,9 +1353,9 @@ async function handleBroadcastModal(e) {
         hideLoading();
         
         if (data.success) {
-            showToast('Xabar yuborildi', 'success');
+            showToast('Xabar yuborish boshlandi', 'success');
             closeModal();
-            loadMessageHistory();
+            watchBroadcastJob(data.data.id);
         } else {
             showToast(data.error || 'Xabar yuborish xatosi', 'error');
         }
@@ -1366,18 +1366,90 @@ async function handleBroadcastModal(e) {
     }
 }
 
+const BROADCAST_STATUS_LABELS = {
+    preparing: 'Tayyorlanmoqda',
+    queued: 'Navbatda',
+    running: 'Yuborilmoqda',
+    completed: 'Yakunlandi',
+    cancelled: 'To\'xtatildi'
+};
+
+// Broadcast ishi tugaguncha holatini kuzatish
+function watchBroadcastJob(jobId) {
+    loadMessageHistory();
+    
+    const timer = setInterval(async () => {
+        try {
+            const response = await fetch(`/api/broadcast/${jobId}`);
+            const data = await response.json();
+            if (!data.success) {
+                clearInterval(timer);
+                return;
+            }
+            
+            loadMessageHistory();
+            const job = data.data;
+            if (job.status === 'completed' || job.status === 'cancelled') {
+                clearInterval(timer);
+                showToast(`Xabar yuborish yakunlandi: ${job.sent} ta yuborildi, ${job.failed} ta xato`, 'success');
+            }
+        } catch (error) {
+            console.error('Broadcast holati xatosi:', error);
+            clearInterval(timer);
+        }
+    }, 5000);
+}
+
+async function cancelBroadcast(jobId) {
+    try {
+        const response = await fetch(`/api/broadcast/${jobId}/cancel`, { method: 'POST' });
+        const data = await response.json();
+        
+        if (data.success) {
+            showToast(data.message, 'success');
+            loadMessageHistory();
+        } else {
+            showToast(data.error || 'Xatolik', 'error');
+        }
+    } catch (error) {
+        console.error('Broadcast to\'xtatish xatosi:', error);
+        showToast('Server xatosi', 'error');
+    }
+}
+
 async function loadMessageHistory() {
     try {
         const historyList = document.getElementById('messageHistory');
         if (!historyList) return;
         
-        // API orqali yuborilgan xabarlarni olish
-        historyList.innerHTML = `
-            <div class="empty-state">
-                <i class="fas fa-history"></i>
-                <p>Xabar tarixi hozircha bo'sh</p>
-            </div>
-        `;
+        const response = await fetch('/api/broadcasts');
+        const data = await response.json();
+        
+        if (!data.success || data.data.length === 0) {
+            historyList.innerHTML = `
+                <div class="empty-state">
+                    <i class="fas fa-history"></i>
+                    <p>Xabar tarixi hozircha bo'sh</p>
+                </div>
+            `;
+            return;
+        }
+        
+        historyList.innerHTML = data.data.map(job => {
+            const active = ['preparing', 'queued', 'running'].includes(job.status);
+            return `
+                <div class="history-item">
+                    <div class="history-message">${job.text || ''}</div>
+                    <div class="history-meta">
+                        <span><i class="fas fa-clock"></i> ${formatDate(job.created_at)}</span>
+                        <span><i class="fas fa-info-circle"></i> ${BROADCAST_STATUS_LABELS[job.status] || job.status}</span>
+                        <span><i class="fas fa-check"></i> ${job.sent}/${job.total}</span>
+                        <span><i class="fas fa-times"></i> ${job.failed}</span>
+                        ${active ? `<span><a href="#" onclick="cancelBroadcast(${job.id}); return false;">To'xtatish</a></span>` : ''}
+                    </div>
+                </div>
+            `;
+        }).join('');
         
     } catch (error) {
         console.error('Xabarlar yuklash xatosi:', error);
@@ -2140,134 +2212,24 @@ function toggleLegend() {
     }
 }
 
-async function exportUsers() {
-    try {
-        showLoading();
-        const users = await fetchAllUsers();
-        hideLoading();
-        
-        if (!users.length) {
-            showToast('Eksport qilish uchun foydalanuvchi yo\'q', 'info');
-            return;
-        }
-        
-        const columns = [
-            { key: 'user_id', label: 'ID' },
-            { key: 'first_name', label: 'Ism' },
-            { key: 'last_name', label: 'Familiya' },
-            { key: 'username', label: 'Username' },
-            { key: 'phone', label: 'Telefon' },
-            { key: 'specialization', label: 'Mutaxassislik' },
-            { key: 'experience', label: 'Tajriba' },
-            { key: 'startup_count', label: 'Startaplar soni' },
-            { key: 'status', label: 'Status' },
-            { key: 'joined_at', label: 'Ro\'yxat sanasi' }
-        ];
-        
-        const csv = toCSV(users, columns);
-        downloadCSV(csv, `users_export_${new Date().toISOString().slice(0, 10)}.csv`);
-        showToast('Foydalanuvchilar CSV yuklab olindi', 'success');
-    } catch (error) {
-        hideLoading();
-        console.error('Export users error:', error);
-        showToast('Eksport qilishda xatolik', 'error');
-    }
-}
-
-async function exportStartups() {
-    try {
-        showLoading();
-        const startups = await fetchAllStartups();
-        hideLoading();
-        
-        if (!startups.length) {
-            showToast('Eksport qilish uchun startap yo\'q', 'info');
-            return;
-        }
-        
-        const columns = [
-            { key: 'id', label: 'ID' },
-            { key: 'name', label: 'Nomi' },
-            { key: 'owner_name', label: 'Egasi' },
-            { key: 'category', label: 'Kategoriya' },
-            { key: 'status', label: 'Status' },
-            { key: 'member_count', label: 'A\'zolar soni' },
-            { key: 'max_members', label: 'Maks a\'zolar' },
-            { key: 'created_at', label: 'Yaratilgan sana' },
-            { key: 'description', label: 'Tavsif' }
-        ];
-        
-        const csv = toCSV(startups, columns);
-        downloadCSV(csv, `startups_export_${new Date().toISOString().slice(0, 10)}.csv`);
-        showToast('Startaplar CSV yuklab olindi', 'success');
-    } catch (error) {
-        hideLoading();
-        console.error('Export startups error:', error);
-        showToast('Eksport qilishda xatolik', 'error');
-    }
-}
-
-async function fetchAllUsers() {
-    let page = 1;
-    let totalPages = 1;
-    const perPage = 200;
-    const all = [];
-    
-    do {
-        const response = await fetch(`/api/users?page=${page}&per_page=${perPage}`);
-        const data = await response.json();
-        if (!data.success) {
-            throw new Error(data.error || 'Foydalanuvchilarni olishda xatolik');
-        }
-        all.push(...(data.data || []));
-        totalPages = data.pagination?.total_pages || 1;
-        page += 1;
-    } while (page <= totalPages);
-    
-    return all;
-}
-
-async function fetchAllStartups() {
-    let page = 1;
-    let totalPages = 1;
-    const perPage = 200;
-    const all = [];
-    
-    do {
-        const response = await fetch(`/api/startups?page=${page}&per_page=${perPage}&status=all&category=all`);
-        const data = await response.json();
-        if (!data.success) {
-            throw new Error(data.error || 'Startaplarni olishda xatolik');
-        }
-        all.push(...(data.data || []));
-        totalPages = data.pagination?.total_pages || 1;
-        page += 1;
-    } while (page <= totalPages);
-    
-    return all;
-}
-
-function toCSV(rows, columns) {
-    const header = columns.map(col => csvEscape(col.label)).join(',');
-    const lines = rows.map(row => {
-        return columns.map(col => csvEscape(row[col.key])).join(',');
-    });
-    return [header, ...lines].join('\n');
+function exportUsers() {
+    downloadFile('/api/export/users.csv');
+    showToast('Foydalanuvchilar CSV yuklanmoqda', 'success');
 }
 
-function csvEscape(value) {
-    if (value === null || value === undefined) return '""';
-    const str = String(value).replace(/"/g, '""');
-    return `"${str}"`;
+function exportStartups() {
+    downloadFile('/api/export/startups.csv');
+    showToast('Startaplar CSV yuklanmoqda', 'success');
 }
 
-function downloadCSV(csv, filename) {
-    const blob = new Blob([csv], { type: 'text/csv;charset=utf-8;' });
+function downloadFile(url) {
+    // Server CSV ni oqim bilan yuboradi, brauzer to'g'ridan-to'g'ri yuklab oladi
     const link = document.createElement('a');
-    link.href = URL.createObjectURL(blob);
-    link.download = filename;
+    link.href = url;
+    link.download = '';
+    document.body.appendChild(link);
     link.click();
-    URL.revokeObjectURL(link.href);
+    link.remove();
 }
 
 function exportChart(chartType) {
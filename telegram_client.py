@@ -0,0 +1,129 @@
+# telegram_client.py - Bot identifikatsiyasi va kanal a'zoligi uchun keshlangan qatlam
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from config import env_int
+
+
+# A'zo bo'lganlar uzoqroq, bo'lmaganlar qisqa muddat keshlanadi
+MEMBER_CACHE_TTL = env_int("MEMBER_CACHE_TTL", 600)
+NON_MEMBER_CACHE_TTL = env_int("NON_MEMBER_CACHE_TTL", 30)
+MEMBER_CACHE_MAX_ENTRIES = env_int("MEMBER_CACHE_MAX_ENTRIES", 100000)
+
+SUBSCRIBED_STATUSES = ('member', 'administrator', 'creator')
+
+
+class MembershipCache:
+    """user_id -> (a'zo/emas, muddat). Musbat va manfiy yozuvlar alohida TTL bilan"""
+
+    def __init__(self, member_ttl: int = MEMBER_CACHE_TTL, non_member_ttl: int = NON_MEMBER_CACHE_TTL,
+                 max_entries: int = MEMBER_CACHE_MAX_ENTRIES):
+        self.member_ttl = member_ttl
+        self.non_member_ttl = non_member_ttl
+        self.max_entries = max(1, max_entries)
+        self._items: "OrderedDict[int, Tuple[bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[bool]:
+        key = int(user_id)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[1] <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, user_id: int, is_member: bool):
+        ttl = self.member_ttl if is_member else self.non_member_ttl
+        if ttl <= 0:
+            return
+        key = int(user_id)
+        with self._lock:
+            self._items[key] = (is_member, time.monotonic() + ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._items.pop(int(user_id), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class TelegramClient:
+    """TeleBot ustidan yupqa qatlam: get_me va kanal a'zoligi keshlanadi, chaqiruvlar sanaladi"""
+
+    def __init__(self, bot, channel: str, members: Optional[MembershipCache] = None):
+        self.bot = bot
+        self.channel = channel
+        self.members = members or MembershipCache()
+        self._me = None
+        self._me_lock = threading.Lock()
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._counts_lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1):
+        with self._counts_lock:
+            self._counts[name] += amount
+
+    # ---------- bot identifikatsiyasi ----------
+
+    def get_me(self, refresh: bool = False):
+        if self._me is not None and not refresh:
+            self.count('get_me.cached')
+            return self._me
+        with self._me_lock:
+            if self._me is None or refresh:
+                self.count('get_me')
+                self._me = self.bot.get_me()
+            return self._me
+
+    def remember_me(self, me):
+        """Boshqa runtime (async) olgan identifikatsiyani saqlash"""
+        self._me = me
+
+    def cached_username(self) -> Optional[str]:
+        return self._me.username if self._me is not None else None
+
+    def username(self) -> Optional[str]:
+        try:
+            return self.get_me().username
+        except Exception:
+            self.count('get_me.error')
+            return None
+
+    # ---------- kanal a'zoligi ----------
+
+    def is_channel_member(self, user_id: int, trust_negative: bool = True) -> bool:
+        """Kanalga obunani tekshirish.
+
+        trust_negative=False - foydalanuvchi "Tekshirish" ni bosganda: u hozirgina
+        obuna bo'lgan bo'lishi mumkin, shuning uchun manfiy kesh e'tiborga olinmaydi.
+        """
+        cached = self.members.get(user_id)
+        if cached is True or (cached is False and trust_negative):
+            self.count('get_chat_member.cached')
+            return cached
+
+        self.count('get_chat_member')
+        try:
+            chat_member = self.bot.get_chat_member(self.channel, user_id)
+        except Exception:
+            self.count('get_chat_member.error')
+            raise
+        is_member = chat_member.status in SUBSCRIBED_STATUSES
+        self.members.put(user_id, is_member)
+        return is_member
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {'calls': counts, 'member_cache_size': len(self.members)}
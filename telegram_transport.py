@@ -0,0 +1,207 @@
+# telegram_transport.py - Telegram Bot API uchun umumiy HTTP ulanishlar puli
+#
+# telebot.apihelper har thread uchun alohida Session ochadi va uni vaqti-vaqti
+# bilan yangilaydi - har safar yangi TLS ulanish. Bu yerda bitta Session va
+# worker lar soniga mos keep-alive pul ishlatiladi, 429/5xx javoblar jitter li
+# backoff bilan qayta yuboriladi va har bir API metodi bo'yicha o'lchovlar yig'iladi.
+import contextlib
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import env_int
+import metrics
+from outbox import Outbox, is_gated
+
+logger = logging.getLogger(__name__)
+
+
+# 0 - worker lar sonidan hisoblanadi (install ga berilgan pool_size)
+TELEGRAM_POOL_SIZE = env_int("TELEGRAM_POOL_SIZE", 0)
+TELEGRAM_CONNECT_TIMEOUT = env_int("TELEGRAM_CONNECT_TIMEOUT_MS", 5000) / 1000
+TELEGRAM_READ_TIMEOUT = env_int("TELEGRAM_READ_TIMEOUT_MS", 30000) / 1000
+TELEGRAM_MAX_RETRIES = env_int("TELEGRAM_MAX_RETRIES", 3)
+TELEGRAM_RETRY_BACKOFF = env_int("TELEGRAM_RETRY_BACKOFF_MS", 500) / 1000
+TELEGRAM_RETRY_MAX_BACKOFF = env_int("TELEGRAM_RETRY_MAX_BACKOFF_MS", 10000) / 1000
+# Bundan uzoq retry_after kutilmaydi - xato chaqiruvchiga qaytadi
+TELEGRAM_MAX_RETRY_AFTER = env_int("TELEGRAM_MAX_RETRY_AFTER", 5)
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def without_retries():
+    """Shu thread dagi chaqiruvlar qayta yuborilmaydi (429 ni o'zi boshqaradigan kod uchun)"""
+    previous = getattr(_local, 'no_retry', False)
+    _local.no_retry = True
+    try:
+        yield
+    finally:
+        _local.no_retry = previous
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        parameters = response.json().get('parameters') or {}
+        return float(parameters['retry_after'])
+    except Exception:
+        return None
+
+
+def _rewind(files) -> bool:
+    """Qayta yuborishdan oldin fayllarni boshiga qaytarish. Iloji bo'lmasa False"""
+    if not files:
+        return True
+    for value in files.values():
+        handle = value[1] if isinstance(value, tuple) and len(value) >= 2 else value
+        if isinstance(handle, (bytes, str)):
+            continue
+        seek = getattr(handle, 'seek', None)
+        if seek is None:
+            return False
+        try:
+            seek(0)
+        except Exception:
+            return False
+    return True
+
+
+class _MethodStats:
+    __slots__ = ('calls', 'errors', 'retries', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_ms': round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            'max_ms': round(self.max_ms, 1),
+        }
+
+
+class TelegramTransport:
+    """apihelper.CUSTOM_REQUEST_SENDER sifatida ishlatiladigan pulli transport"""
+
+    def __init__(self, pool_size: int = 16,
+                 connect_timeout: float = TELEGRAM_CONNECT_TIMEOUT,
+                 read_timeout: float = TELEGRAM_READ_TIMEOUT,
+                 max_retries: int = TELEGRAM_MAX_RETRIES,
+                 backoff: float = TELEGRAM_RETRY_BACKOFF,
+                 max_backoff: float = TELEGRAM_RETRY_MAX_BACKOFF,
+                 max_retry_after: float = TELEGRAM_MAX_RETRY_AFTER,
+                 outbox: Optional[Outbox] = None):
+        self.pool_size = max(1, pool_size)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.outbox = outbox
+        self.session = requests.Session()
+        # pool_block: pul to'lsa yangi ulanish ochilmaydi, bo'shashini kutadi
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._stats: Dict[str, _MethodStats] = defaultdict(_MethodStats)
+        self._lock = threading.Lock()
+
+    def _delay(self, attempt: int) -> float:
+        cap = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def _record(self, method_name: str, elapsed_ms: float, error: bool = False, retry: bool = False):
+        with self._lock:
+            stats = self._stats[method_name]
+            if retry:
+                stats.retries += 1
+                return
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if error:
+                stats.errors += 1
+
+    def request(self, method: str, url: str, params=None, files=None, timeout=None, proxies=None):
+        method_name = url.rsplit('/', 1)[-1]
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        retries = 0 if getattr(_local, 'no_retry', False) else self.max_retries
+        gated = self.outbox is not None and is_gated(method_name)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if gated:
+                # Har bir urinish umumiy limitdan o'tadi (ustuvorlik thread dan olinadi)
+                self.outbox.acquire((params or {}).get('chat_id'))
+            metrics.count_call('telegram')
+            try:
+                response = self.session.request(
+                    method, url, params=params, files=files, timeout=timeout, proxies=proxies)
+            except requests.exceptions.ConnectTimeout:
+                # So'rov serverga yetmagan - qayta yuborish xavfsiz
+                if attempt >= retries or not _rewind(files):
+                    self._record(method_name, (time.monotonic() - started) * 1000, error=True)
+                    raise
+                delay = self._delay(attempt)
+            except Exception:
+                self._record(method_name, (time.monotonic() - started) * 1000, error=True)
+                raise
+            else:
+                status = response.status_code
+                delay = None
+                if attempt < retries and (status == 429 or status in RETRY_STATUSES):
+                    if status == 429:
+                        retry_after = _retry_after(response)
+                        if retry_after is None or retry_after <= self.max_retry_after:
+                            delay = max(retry_after or 0, self._delay(attempt))
+                    else:
+                        delay = self._delay(attempt)
+                    if delay is not None and not _rewind(files):
+                        delay = None
+                if delay is None:
+                    self._record(method_name, (time.monotonic() - started) * 1000, error=status != 200)
+                    return response
+                response.close()
+                logger.info(f"Telegram {method_name}: HTTP {status}, {delay:.1f}s dan keyin qayta yuboriladi")
+
+            attempt += 1
+            self._record(method_name, 0, retry=True)
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            methods = {name: stats.as_dict() for name, stats in self._stats.items()}
+        data = {'pool_size': self.pool_size, 'methods': methods}
+        if self.outbox is not None:
+            data['outbox'] = self.outbox.stats()
+        return data
+
+
+def install(pool_size: int, outbox: Optional[Outbox] = None) -> TelegramTransport:
+    """Transportni yaratib telebot.apihelper ga ulash.
+
+    TELEGRAM_POOL_SIZE berilgan bo'lsa pool_size o'rniga ishlatiladi.
+    """
+    import telebot.apihelper as apihelper
+
+    transport = TelegramTransport(pool_size=TELEGRAM_POOL_SIZE or pool_size, outbox=outbox)
+    apihelper.CONNECT_TIMEOUT = transport.connect_timeout
+    apihelper.READ_TIMEOUT = transport.read_timeout
+    apihelper.CUSTOM_REQUEST_SENDER = transport.request
+    return transport
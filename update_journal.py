@@ -0,0 +1,137 @@
+# update_journal.py - Update lar jurnali: doimiy offset va takroriy ishlovdan himoya
+#
+# Har bir update navbatga qo'yilishidan oldin MongoDB ga yoziladi (queued),
+# worker uni olishda "started" ga o'tkazadi. Qayta ishga tushganda offset
+# saqlangan joydan davom etadi, navbatda qolib ketgan (boshlanmagan) update lar
+# qayta bajariladi, boshlangan yoki qayta kelgan update lar esa tashlab
+# yuboriladi - admin_approve_ kabi callback lar ikki marta ishlamaydi.
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from config import env_int
+
+logger = logging.getLogger(__name__)
+
+
+# Xotiradagi oxirgi update id lari (DB ga bormasdan takrorni aniqlash uchun)
+UPDATE_DEDUP_WINDOW = env_int("UPDATE_DEDUP_WINDOW", 10000)
+# Qayta ishga tushganda navbatdan tiklanadigan update lar chegarasi
+UPDATE_REPLAY_LIMIT = env_int("UPDATE_REPLAY_LIMIT", 1000)
+
+
+class UpdateJournal:
+    def __init__(self, window: int = UPDATE_DEDUP_WINDOW):
+        self.window = max(1, window)
+        self._recent: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._saved_offset = 0
+        self._stats = {'accepted': 0, 'duplicates': 0, 'already_started': 0, 'replayed': 0, 'errors': 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _remember(self, update_id: int) -> bool:
+        """Xotiradagi oynaga qo'shish. Allaqachon bo'lsa False"""
+        with self._lock:
+            if update_id in self._recent:
+                return False
+            self._recent[update_id] = None
+            while len(self._recent) > self.window:
+                self._recent.popitem(last=False)
+            return True
+
+    def load_offset(self) -> int:
+        """Oxirgi qabul qilingan update_id (getUpdates shundan keyingisidan boshlanadi)"""
+        from db import get_update_offset
+        try:
+            offset = get_update_offset()
+        except Exception as e:
+            logger.error(f"Update offset o'qishda xatolik: {e}")
+            self._count('errors')
+            return 0
+        with self._lock:
+            self._offset = max(self._offset, offset)
+            self._saved_offset = max(self._saved_offset, offset)
+            return self._offset
+
+    def accept(self, update_id: int, payload: str) -> bool:
+        """Update ni jurnalga yozish. Avval kelgan bo'lsa False - qayta ishlanmaydi"""
+        from db import journal_update
+        if not self._remember(update_id):
+            self._count('duplicates')
+            return False
+        try:
+            fresh = journal_update(update_id, payload)
+        except Exception as e:
+            # DB ishlamasa update yo'qolmasin - jurnalsiz bajariladi
+            logger.error(f"Update #{update_id} jurnalga yozilmadi: {e}")
+            self._count('errors')
+            fresh = True
+        if not fresh:
+            self._count('duplicates')
+            return False
+        with self._lock:
+            self._stats['accepted'] += 1
+            self._offset = max(self._offset, update_id)
+        return True
+
+    def forget(self, update_id: int):
+        """Navbatga sig'magan update - Telegram qayta yuborganda qabul qilinsin"""
+        from db import forget_journaled_update
+        with self._lock:
+            self._recent.pop(update_id, None)
+        try:
+            forget_journaled_update(update_id)
+        except Exception as e:
+            logger.error(f"Update #{update_id} jurnaldan o'chirilmadi: {e}")
+            self._count('errors')
+
+    def begin(self, update_id: int) -> bool:
+        """Worker update ni olishdan oldin. Avval boshlangan bo'lsa False"""
+        from db import start_journaled_update
+        try:
+            started = start_journaled_update(update_id)
+        except Exception as e:
+            logger.error(f"Update #{update_id} holati yangilanmadi: {e}")
+            self._count('errors')
+            return True
+        if not started:
+            self._count('already_started')
+        return started
+
+    def pending(self, limit: int = UPDATE_REPLAY_LIMIT) -> List[str]:
+        """Navbatda qolib ketgan (boshlanmagan) update lar, id bo'yicha tartibda"""
+        from db import get_queued_updates
+        rows = get_queued_updates(limit)
+        with self._lock:
+            for update_id, _ in rows:
+                self._recent[update_id] = None
+                self._offset = max(self._offset, update_id)
+            self._stats['replayed'] += len(rows)
+        return [payload for _, payload in rows]
+
+    def flush(self):
+        """Offset o'zgargan bo'lsa saqlash (har bir polling siklida)"""
+        from db import save_update_offset
+        with self._lock:
+            offset = self._offset
+            if offset <= self._saved_offset:
+                return
+        try:
+            save_update_offset(offset)
+        except Exception as e:
+            logger.error(f"Update offset saqlanmadi: {e}")
+            self._count('errors')
+            return
+        with self._lock:
+            self._saved_offset = max(self._saved_offset, offset)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data.update({'offset': self._offset, 'saved_offset': self._saved_offset, 'window': len(self._recent)})
+        return data
@@ -0,0 +1,209 @@
+# update_recorder.py - Kelgan update larni tozalab JSONL ga yozish (replay benchmark uchun)
+#
+# UPDATE_RECORD_PATH berilsa har bir qabul qilingan update bitta qatorga
+# yoziladi: {"t": yozish boshlanganidan beri sekund, "u": update}. Shaxsiy
+# ma'lumotlar olib tashlanadi: user/chat id lari ketma-ket soxta id larga
+# almashtiriladi, ism va telefonlar o'chiriladi, file_id lar xeshlanadi,
+# erkin matn esa shaklini saqlab niqoblanadi (harf -> x, raqam -> 1) - bot
+# tugmalari va buyruqlar o'zgarmaydi, shuning uchun routing bir xil qoladi.
+# Fayl bench/replay.py bilan soxta Bot API ustida qayta o'ynatiladi.
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import env_int
+
+logger = logging.getLogger(__name__)
+
+
+UPDATE_RECORD_PATH = os.getenv("UPDATE_RECORD_PATH", "").strip()
+# Shuncha update dan keyin yozish to'xtaydi (disk to'lib qolmasin)
+UPDATE_RECORD_MAX_UPDATES = env_int("UPDATE_RECORD_MAX_UPDATES", 100000)
+UPDATE_RECORD_FLUSH_EVERY = env_int("UPDATE_RECORD_FLUSH_EVERY", 100)
+
+# Soxta id lar shu sondan boshlanadi (haqiqiy id lar bilan adashmasin)
+FAKE_ID_BASE = 7_000_000_000
+
+# User/chat obyektlari joylashadigan kalitlar
+PERSON_KEYS = frozenset({'from', 'chat', 'user', 'sender_chat', 'new_chat_member', 'old_chat_member'})
+# Replay uchun keraksiz va shaxsiy bo'lishi mumkin bo'lgan maydonlar
+DROP_KEYS = frozenset({
+    'location', 'venue', 'forward_from', 'forward_from_chat', 'forward_sender_name', 'forward_origin',
+    'forward_signature', 'via_bot', 'author_signature', 'url', 'last_name', 'bio', 'photo_url',
+    'language_code', 'is_premium', 'vcard',
+})
+MASK_KEYS = frozenset({'text', 'caption', 'query', 'title', 'description'})
+FILE_KEYS = frozenset({'file_id', 'file_unique_id'})
+
+URL_PREFIXES = ('https://t.me/', 'http://t.me/', '@')
+
+
+def mask_text(text: str) -> str:
+    """Matn shaklini saqlab niqoblash: uzunlik, bo'shliqlar, emoji va belgilar qoladi"""
+    prefix = ''
+    for candidate in URL_PREFIXES:
+        if text.startswith(candidate):
+            prefix, text = candidate, text[len(candidate):]
+            break
+    return prefix + ''.join('1' if ch.isdigit() else 'x' if ch.isalpha() else ch for ch in text)
+
+
+class UpdateRecorder:
+    def __init__(self, path: str, keep_text: Optional[Callable[[str], bool]] = None,
+                 max_updates: int = UPDATE_RECORD_MAX_UPDATES, flush_every: int = UPDATE_RECORD_FLUSH_EVERY):
+        self.path = path
+        # keep_text(text) -> True bo'lsa matn o'zgarmaydi (router.has_text)
+        self.keep_text = keep_text
+        self.max_updates = max(1, max_updates)
+        self.flush_every = max(1, flush_every)
+        self._lock = threading.Lock()
+        self._ids: Dict[int, int] = {}
+        self._file = None
+        self._started: Optional[float] = None
+        self._stats = {'recorded': 0, 'errors': 0, 'stopped': False}
+
+    # ---------- tozalash ----------
+
+    def _fake_id(self, real_id: Any) -> Any:
+        try:
+            real_id = int(real_id)
+        except (TypeError, ValueError):
+            return real_id
+        fake = self._ids.get(real_id)
+        if fake is None:
+            fake = FAKE_ID_BASE + len(self._ids) + 1
+            self._ids[real_id] = fake
+        # Guruh/kanal id lari manfiyligicha qoladi
+        return -fake if real_id < 0 else fake
+
+    @staticmethod
+    def _file_id(value: str) -> str:
+        return 'rec-' + hashlib.sha1(value.encode()).hexdigest()[:20]
+
+    def _text(self, text: str) -> str:
+        if self.keep_text is not None and self.keep_text(text):
+            return text
+        if text.startswith('/'):
+            # Buyruq qoladi; raqamli argument (referral) id sifatida almashtiriladi
+            command, _, args = text.partition(' ')
+            if not args:
+                return command
+            args = str(self._fake_id(args)) if args.strip().lstrip('-').isdigit() else mask_text(args)
+            return f"{command} {args}"
+        return mask_text(text)
+
+    def _person(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        if value.get('is_bot'):
+            # Bot (callback dagi xabar muallifi) shaxsiy ma'lumot emas
+            return {k: value[k] for k in ('id', 'is_bot', 'first_name', 'username') if k in value}
+        fake_id = self._fake_id(value.get('id'))
+        person = {'id': fake_id}
+        for key in ('is_bot', 'type'):
+            if key in value:
+                person[key] = value[key]
+        number = abs(fake_id) - FAKE_ID_BASE if isinstance(fake_id, int) else 0
+        if 'first_name' in value:
+            person['first_name'] = f"User{number}"
+        if 'username' in value:
+            person['username'] = f"user{number}"
+        if 'title' in value:
+            person['title'] = f"Chat{number}"
+        return person
+
+    def _clean(self, value: Any, key: Optional[str] = None) -> Any:
+        if isinstance(value, dict):
+            if key in PERSON_KEYS and 'id' in value:
+                return self._person(value)
+            cleaned = {}
+            for k, v in value.items():
+                if k in DROP_KEYS:
+                    continue
+                if k == 'contact':
+                    cleaned[k] = {'phone_number': mask_text(str(v.get('phone_number', ''))),
+                                  'first_name': 'Contact'}
+                    if 'user_id' in v:
+                        cleaned[k]['user_id'] = self._fake_id(v['user_id'])
+                elif k == 'chat_instance':
+                    cleaned[k] = self._file_id(str(v))
+                else:
+                    cleaned[k] = self._clean(v, k)
+            return cleaned
+        if isinstance(value, list):
+            return [self._clean(item, key) for item in value]
+        if isinstance(value, str):
+            if key in MASK_KEYS:
+                return self._text(value)
+            if key in FILE_KEYS:
+                return self._file_id(value)
+            if key in ('first_name', 'username', 'phone_number'):
+                return mask_text(value)
+        if key in ('user_id', 'chat_id'):
+            return self._fake_id(value)
+        return value
+
+    # ---------- yozish ----------
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, 'at', encoding='utf-8')
+        return open(self.path, 'a', encoding='utf-8')
+
+    def record(self, payload: str):
+        """Qabul qilingan update (asl JSON) ni tozalab yozish. Xato bot ishiga ta'sir qilmaydi"""
+        with self._lock:
+            if self._stats['stopped']:
+                return
+            try:
+                if self._file is None:
+                    self._file = self._open()
+                    self._started = time.monotonic()
+                line = json.dumps({'t': round(time.monotonic() - self._started, 3),
+                                   'u': self._clean(json.loads(payload))},
+                                  ensure_ascii=False, separators=(',', ':'))
+                self._file.write(line + '\n')
+                self._stats['recorded'] += 1
+                if self._stats['recorded'] % self.flush_every == 0:
+                    self._file.flush()
+                if self._stats['recorded'] >= self.max_updates:
+                    logger.info(f"Update yozish to'xtadi: {self.max_updates} ta chegaraga yetildi")
+                    self._close()
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error(f"Update yozilmadi: {e}")
+
+    def _close(self):
+        self._stats['stopped'] = True
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data.update({'path': self.path, 'users': len(self._ids)})
+        return data
+
+
+def create_update_recorder(keep_text: Optional[Callable[[str], bool]] = None) -> Optional[UpdateRecorder]:
+    """UPDATE_RECORD_PATH berilgan bo'lsa recorder, aks holda None"""
+    if not UPDATE_RECORD_PATH:
+        return None
+    recorder = UpdateRecorder(UPDATE_RECORD_PATH, keep_text=keep_text)
+    atexit.register(recorder.close)
+    logger.info(f"Update lar {UPDATE_RECORD_PATH} ga yozilmoqda")
+    return recorder